@@ -24,7 +24,7 @@ const AIRecommendations: React.FC = () => {
   const fetchRecommendations = async () => {
     try {
       // Get user recommendations from backend
-      const userResponse = await fetch('/backend/api/user/recommendations');
+      const userResponse = await fetch('/backend/api/user/recommendations?fields=text,urgency,impact,timeframe,channel,topic');
       const userData = await userResponse.json();
       
       // Also get system recommendations from backend
@@ -33,56 +33,22 @@ const DynamicChartArea: React.FC = () => {
   // Load charts from user charts API
   const loadChartsFromDatabase = useCallback(async () => {
     try {
-      // Get user-created charts from backend
-      const userResponse = await fetch('/backend/api/user/charts');
-      const userData = await userResponse.json();
+      // Get user-created charts together with their data in one request
+      const dashboardResponse = await fetch('/backend/api/dashboard?period=30d&limit=100');
+      const dashboardData = await dashboardResponse.json();
       
       let loadedCharts: Chart[] = [];
       
-      if (userData.items && userData.items.length > 0) {
-        // Load each user chart with its data
-        for (const userChart of userData.items) {
-          setLoadingCharts(prev => ({ ...prev, [userChart.id]: true }));
-          
-          try {
-            // Fetch chart data from backend API
-            const response = await fetch(`/backend/api/charts?chartType=${userChart.chart_type}&numericValue=${userChart.numeric_value}&metric=${userChart.metric}&period=30d`);
-            const result = await response.json();
-            
-            let chartData: ChartData[] = [];
-            if (result.success && result.data) {
-              chartData = result.data;
-            } else {
-              // Generate fallback data
-              chartData = generateFallbackData(userChart.chart_type, userChart.metric);
-            }
-            
-            loadedCharts.push({
-              id: userChart.id,
-              title: userChart.title,
-              chartType: userChart.chart_type,
-              numericValue: userChart.numeric_value,
-              metric: userChart.metric,
-              data: chartData
-            });
-          } catch (error) {
-            console.error(`Error loading data for chart ${userChart.id}:`, error);
-            // Add chart with fallback data
-            loadedCharts.push({
-              id: userChart.id,
-              title: userChart.title,
-              chartType: userChart.chart_type,
-              numericValue: userChart.numeric_value,
-              metric: userChart.metric,
-              data: generateFallbackData(userChart.chart_type, userChart.metric)
-            });
-          } finally {
-            setLoadingCharts(prev => {
-              const newState = { ...prev };
-              delete newState[userChart.id];
-              return newState;
-            });
-          }
+      if (dashboardData.charts && dashboardData.charts.length > 0) {
+        for (const userChart of dashboardData.charts) {
+          loadedCharts.push({
+            id: userChart.id,
+            title: userChart.title,
+            chartType: userChart.chart_type,
+            numericValue: userChart.numeric_value,
+            metric: userChart.metric,
+            data: userChart.data || generateFallbackData(userChart.chart_type, userChart.metric)
+          });
         }
       } else {
         // If no user charts, create some default ones
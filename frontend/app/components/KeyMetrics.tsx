@@ -25,7 +25,7 @@ const KeyMetrics: React.FC = () => {
   const fetchMetrics = async () => {
     try {
       // First try to get user metrics from backend
-      const userResponse = await fetch('/backend/api/user/metrics');
+      const userResponse = await fetch('/backend/api/user/metrics?fields=title,value,change,change_type,timeframe,channel,topic');
       const userData = await userResponse.json();
       
       // Also get system metrics from backend
@@ -91,6 +91,12 @@ const KeyMetrics: React.FC = () => {
 
   useEffect(() => {
     fetchMetrics();
+
+    // Refetch when the backend pushes a change instead of polling
+    const source = new EventSource('/backend/api/stream?entities=metrics');
+    const refetch = () => { fetchMetrics(); };
+    ['created', 'updated', 'deleted', 'bulk', 'resync'].forEach((event) => source.addEventListener(event, refetch));
+    return () => source.close();
   }, []);
 
   // Filter metrics based on global filters
@@ -26,7 +26,7 @@ const TopPriorities: React.FC = () => {
   const fetchPriorities = async () => {
     try {
       // Get user priorities from backend
-      const userResponse = await fetch('/backend/api/user/priorities');
+      const userResponse = await fetch('/backend/api/user/priorities?fields=title,deadline,status,timeframe,channel,topic');
       const userData = await userResponse.json();
       
       console.log('User priorities response:', userData);
@@ -93,6 +93,12 @@ const TopPriorities: React.FC = () => {
 
   useEffect(() => {
     fetchPriorities();
+
+    // Refetch when the backend pushes a change instead of polling
+    const source = new EventSource('/backend/api/stream?entities=priorities');
+    const refetch = () => { fetchPriorities(); };
+    ['created', 'updated', 'deleted', 'bulk', 'resync'].forEach((event) => source.addEventListener(event, refetch));
+    return () => source.close();
   }, []);
 
   // Filter priorities based on global filters
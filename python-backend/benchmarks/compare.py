@@ -0,0 +1,57 @@
+"""Diff two load.py or micro.py result files.
+
+Prints each endpoint's (or micro-benchmark's) p50/p95/p99 latency and
+throughput side by side with the relative change, and exits 1 when any
+latency percentile regressed by more than --threshold percent, so it can gate
+a change in CI. Percentiles from runs shorter than a few hundred requests are
+noisy; compare runs made with the same --rows, --concurrency and --duration
+on the same machine.
+
+    python benchmarks/compare.py benchmarks/results/abc1234-....json benchmarks/results/def5678-....json --threshold 10
+"""
+import argparse
+import json
+import sys
+
+LATENCY_KEYS = ("p50_ms", "p95_ms", "p99_ms")
+
+def load(path: str) -> dict:
+    with open(path) as f:
+        report = json.load(f)
+    return report.get("endpoints") or report.get("benchmarks") or {}
+
+def change(before, after):
+    if before in (None, 0) or after is None:
+        return None
+    return (after - before) / before * 100
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument("--threshold", type=float, default=10.0, help="percent latency increase counted as a regression")
+    args = parser.parse_args()
+
+    before, after = load(args.before), load(args.after)
+    regressions = []
+    print(f"{'name':<56}{'p50 ms':>18}{'p95 ms':>18}{'p99 ms':>18}{'req/s':>18}")
+    for name in list(before) + [name for name in after if name not in before]:
+        old, new = before.get(name, {}), after.get(name, {})
+        cells = []
+        for key in LATENCY_KEYS + ("rps",):
+            delta = change(old.get(key), new.get(key))
+            value = f"{new[key]:.1f}" if new.get(key) is not None else "-"
+            cells.append(f"{value} ({delta:+.0f}%)" if delta is not None else value)
+            if key in LATENCY_KEYS and delta is not None and delta > args.threshold:
+                regressions.append((name, key, delta))
+        print(f"{name:<56}" + "".join(f"{cell:>18}" for cell in cells))
+
+    if regressions:
+        print(f"\n❌ {len(regressions)} latency regressions over {args.threshold:g}%:")
+        for name, key, delta in regressions:
+            print(f"   {name} {key} {delta:+.0f}%")
+        sys.exit(1)
+    print(f"\n✅ No latency regressions over {args.threshold:g}%")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Throughput vs. concurrency load benchmark for the list endpoints.
+
+Starts the API under uvicorn against a scratch SQLite database (or targets
+--url), seeds a few hundred rows, then drives GET requests at increasing
+concurrency and prints requests/second and latency percentiles per level.
+With non-blocking handlers throughput should keep climbing until the
+database or CPU saturates instead of flattening at concurrency 1.
+
+    pip install -r benchmarks/requirements.txt
+    python benchmarks/concurrency.py --levels 1 4 16 64 --duration 5
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Optional
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_server(workdir: str, env: Optional[dict] = None, stdout=None):
+    """Run uvicorn from a scratch directory so the SQLite fallback lands there"""
+    port = _free_port()
+    env = dict(os.environ, PYTHONPATH=BACKEND_DIR, **(env or {}))
+    env.pop("K_SERVICE", None)
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=workdir, env=env, stdout=stdout, stderr=stdout,
+    )
+    url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            httpx.get(f"{url}/health", timeout=0.5)
+            return process, url
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("uvicorn did not start")
+
+async def seed(client: httpx.AsyncClient, rows: int):
+    for i in range(rows):
+        await client.post("/api/user/metrics", json={
+            "title": f"Metric {i}", "value": str(i), "channel": ["web", "mobile", "email"][i % 3],
+        })
+
+async def run_level(client: httpx.AsyncClient, path: str, concurrency: int, duration: float):
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            response = await client.get(path)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+
+async def main_async(args):
+    limits = httpx.Limits(max_connections=max(args.levels), max_keepalive_connections=max(args.levels))
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=30) as client:
+        if args.seed:
+            await seed(client, args.seed)
+        print(f"{'concurrency':>11} {'requests':>9} {'errors':>6} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8}")
+        for level in args.levels:
+            result = await run_level(client, args.path, level, args.duration)
+            print(f"{result['concurrency']:>11} {result['requests']:>9} {result['errors']:>6} "
+                  f"{result['rps']:>9.1f} {result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="benchmark a running server instead of starting one")
+    parser.add_argument("--path", default="/api/user/metrics?limit=20&channel=web")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds per concurrency level")
+    parser.add_argument("--seed", type=int, default=300, help="metrics to create before measuring (0 to skip)")
+    args = parser.parse_args()
+
+    if args.url:
+        asyncio.run(main_async(args))
+        return
+    with tempfile.TemporaryDirectory() as workdir:
+        process, args.url = start_server(workdir)
+        try:
+            asyncio.run(main_async(args))
+        finally:
+            process.terminate()
+            process.wait()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,358 @@
+"""Fixed-concurrency load test of every API endpoint, with results saved as JSON.
+
+Seeds a scratch SQLite database with --rows rows per model (see seed.py) and
+starts the API on it, or runs against --database-url (already seeded, e.g. a
+local Postgres) or a running server at --url. Every endpoint is then driven
+by --concurrency clients for --duration seconds: reads first (list pages with
+rotating filters, deep offset pages, cursor pages, facets, exports, search, charts,
+the dashboard, samples, system endpoints), then single and bulk writes and
+NDJSON/CSV imports (one with malformed rows to reject), then deletes. Each
+endpoint reports p50/p95/p99 latency, throughput and errors, plus the
+server's resident memory after it ran (Linux, local servers or --pid).
+
+Results go to benchmarks/results/<commit>-<timestamp>.json; compare two
+runs with compare.py.
+
+    python benchmarks/load.py --rows 100000 --concurrency 16 --duration 5
+    python benchmarks/load.py --database-url postgresql://postgres@localhost/bench --only user/metrics
+"""
+import argparse
+import asyncio
+import csv
+import io
+import json
+import os
+import platform
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, List, Optional
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from concurrency import BACKEND_DIR, start_server  # noqa: E402
+from seed import CHANNELS, LEVELS, METRICS, STATUSES, TOPICS, WORDS, seed  # noqa: E402
+
+RESULTS_DIR = os.path.join(BACKEND_DIR, "benchmarks", "results")
+ENTITIES = ("charts", "metrics", "priorities", "recommendations")
+BULK_SIZE = 50
+# Rows per import request; with rejects, every REJECT_EVERY-th row is malformed.
+IMPORT_SIZE = 500
+REJECT_EVERY = 10
+
+class Exhausted(Exception):
+    """A delete scenario ran out of rows to delete"""
+
+class Scenario:
+    """One endpoint under load; ``request(i)`` returns the kwargs for the i-th request"""
+
+    def __init__(self, name: str, method: str, request: Callable[[int], dict]):
+        self.name = name
+        self.method = method
+        self.request = request
+
+def new_row(entity: str, i: int) -> dict:
+    channel, topic = CHANNELS[i % len(CHANNELS)], TOPICS[i % len(TOPICS)]
+    common = {"channel": channel, "topic": topic, "timeframe": "month", "description": f"Load test row {i}"}
+    if entity == "charts":
+        return dict(common, title=f"Chart {i}", chart_type="bar", numeric_value="count", metric=METRICS[i % len(METRICS)])
+    if entity == "metrics":
+        return dict(common, title=f"Metric {i}", value=str(i))
+    if entity == "priorities":
+        return dict(common, title=f"Priority {i}", priority=LEVELS[i % 3], impact=LEVELS[(i + 1) % 3],
+                    status=STATUSES[i % len(STATUSES)])
+    return dict(common, text=f"Recommendation {i}", urgency=LEVELS[i % 3], impact=LEVELS[(i + 1) % 3])
+
+def updated_row(entity: str, id: str, i: int) -> dict:
+    field = "text" if entity == "recommendations" else "title"
+    return {"id": id, field: f"Updated {i}", "channel": CHANNELS[i % len(CHANNELS)]}
+
+def import_body(entity: str, i: int, fmt: str, rejects: bool = False) -> bytes:
+    """The i-th import request's NDJSON or CSV body of IMPORT_SIZE new rows"""
+    rows = [new_row(entity, i * IMPORT_SIZE + n) for n in range(IMPORT_SIZE)]
+    out = io.StringIO()
+    if fmt == "csv":
+        writer = csv.DictWriter(out, fieldnames=list(rows[0]), lineterminator="\n")
+        writer.writeheader()
+        for n, row in enumerate(rows):
+            if rejects and n % REJECT_EVERY == 0:
+                out.write(f"{row['channel']}\n")  # one column instead of all of them
+            else:
+                writer.writerow(row)
+    else:
+        for n, row in enumerate(rows):
+            out.write("{not json\n" if rejects and n % REJECT_EVERY == 0 else json.dumps(row) + "\n")
+    return out.getvalue().encode()
+
+def percentile(ordered: List[float], q: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    return ordered[max(0, min(len(ordered) - 1, round(q * len(ordered)) - 1))]
+
+def read_memory(pid: Optional[int]) -> dict:
+    """Current and peak resident set size of ``pid`` in MB (empty where /proc is unavailable)"""
+    if pid is None:
+        return {}
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            fields = dict(line.split(":", 1) for line in status)
+    except OSError:
+        return {}
+    return {"rss_mb": int(fields["VmRSS"].split()[0]) / 1024, "peak_rss_mb": int(fields["VmHWM"].split()[0]) / 1024}
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> dict:
+    if not latencies:
+        return {"requests": 0, "errors": errors}
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "max_ms": round(latencies[-1] * 1000, 3),
+    }
+
+async def run_scenario(client: httpx.AsyncClient, scenario: Scenario, concurrency: int, duration: float) -> dict:
+    latencies = []
+    errors = 0
+    counter = iter(range(sys.maxsize))
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            try:
+                kwargs = scenario.request(next(counter))
+            except Exhausted:
+                return
+            start = time.perf_counter()
+            response = await client.request(scenario.method, **kwargs)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+async def run_stream(client: httpx.AsyncClient, concurrency: int, duration: float) -> dict:
+    """Open-to-headers time of the change stream; the stream itself never ends"""
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            async with client.stream("GET", "/api/stream", params={"entities": "metrics,priorities"}) as response:
+                latencies.append(time.perf_counter() - start)
+                errors += response.status_code >= 400
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+async def prepare(client: httpx.AsyncClient, delete_pool: int) -> dict:
+    """Existing ids to update, first-page cursors, and fresh rows for the delete scenarios to consume"""
+    state = {"ids": {}, "cursors": {}, "doomed": {}}
+    for entity in ENTITIES:
+        page = (await client.get(f"/api/user/{entity}", params={"limit": 100, "include_total": "false"})).json()
+        if not page["items"]:
+            raise SystemExit(f"no {entity} to benchmark against; seed the database first (seed.py)")
+        state["ids"][entity] = [item["id"] for item in page["items"]]
+        state["cursors"][entity] = page.get("next_cursor")
+        doomed = []
+        for start in range(0, delete_pool, 1000):
+            rows = [new_row(entity, i) for i in range(start, min(delete_pool, start + 1000))]
+            response = await client.post(f"/api/user/{entity}/bulk", json=rows)
+            response.raise_for_status()
+            doomed.extend(result["id"] for result in response.json()["results"])
+        state["doomed"][entity] = doomed
+    return state
+
+def scenarios(state: dict) -> List[Scenario]:
+    ids, cursors, doomed = state["ids"], state["cursors"], state["doomed"]
+    rng = random.Random(7)
+
+    def get(path, *param_variants):
+        variants = param_variants or ({},)
+        return lambda i: {"url": path, "params": variants[i % len(variants)]}
+
+    def take(entity, count):
+        def request(i):
+            if len(doomed[entity]) < count:
+                raise Exhausted
+            return [doomed[entity].pop() for _ in range(count)]
+        return request
+
+    filters = [{}, *({"channel": channel} for channel in CHANNELS[1:]), *({"topic": topic} for topic in TOPICS[1:])]
+    result = [
+        Scenario("GET /health", "GET", get("/health")),
+        Scenario("GET /api/metrics", "GET", get("/api/metrics")),
+        Scenario("GET /api/priorities", "GET", get("/api/priorities")),
+        Scenario("GET /api/recommendations", "GET", get("/api/recommendations")),
+        Scenario("GET /api/stream/stats", "GET", get("/api/stream/stats")),
+        Scenario("GET /api/cache/stats", "GET", get("/api/cache/stats")),
+        Scenario("GET /api/db/pool", "GET", get("/api/db/pool")),
+        Scenario("GET /metrics", "GET", get("/metrics")),
+        Scenario("GET /api/charts", "GET", get("/api/charts", *(
+            {"metric": metric, "numericValue": value, "period": period}
+            for metric in METRICS[:3] for value in ("count", "average", "p90") for period in ("24h", "30d", "1y")
+        ))),
+        Scenario("GET /api/dashboard", "GET", get("/api/dashboard", *filters)),
+    ]
+    for entity in ENTITIES:
+        path = f"/api/user/{entity}"
+        result += [
+            Scenario(f"GET {path}", "GET", get(path, *({"limit": 20, **f} for f in filters))),
+            Scenario(f"GET {path} (page 50)", "GET", get(path, {"limit": 20, "page": 50})),
+            Scenario(f"GET {path} (cursor)", "GET", get(path, {"limit": 20, "include_total": "false", "cursor": cursors[entity]})),
+            Scenario(f"GET {path}/facets", "GET", get(f"{path}/facets", *filters)),
+            Scenario(f"GET {path}/export", "GET", get(f"{path}/export", *(
+                {"channel": channel, "topic": topic, "format": fmt}
+                for channel in CHANNELS[1:] for topic in TOPICS[1:] for fmt in ("ndjson", "csv", "arrow", "parquet")
+            ))),
+        ]
+        if entity in ("priorities", "recommendations"):
+            result.append(Scenario(f"GET {path}/search", "GET", get(f"{path}/search", *({"q": word} for word in WORDS))))
+            result.append(Scenario(f"GET {path} (top)", "GET", get(path, *({"top": top, **f} for top in (5, 20) for f in filters))))
+    result.append(Scenario("GET /api/user/metrics/{id}/samples", "GET", lambda i: {
+        "url": f"/api/user/metrics/{ids['metrics'][i % len(ids['metrics'])]}/samples",
+        "params": {"period": ("24h", "7d", "30d")[i % 3]},
+    }))
+
+    now = datetime.now(timezone.utc)
+    result.append(Scenario("POST /api/events", "POST", lambda i: {"url": "/api/events", "json": [
+        {"metric": rng.choice(METRICS), "value": rng.uniform(1, 100), "channel": rng.choice(CHANNELS[1:]),
+         "topic": rng.choice(TOPICS[1:]), "occurred_at": (now - timedelta(minutes=rng.randrange(1440))).isoformat()}
+        for _ in range(10)
+    ]}))
+    result.append(Scenario("POST /api/user/metrics/{id}/samples", "POST", lambda i: {
+        "url": f"/api/user/metrics/{ids['metrics'][i % len(ids['metrics'])]}/samples", "json": [{"value": i}],
+    }))
+    for entity in ENTITIES:
+        path = f"/api/user/{entity}"
+        entity_ids = ids[entity]
+        single_delete, bulk_delete = take(entity, 1), take(entity, BULK_SIZE)
+        result += [
+            Scenario(f"POST {path}", "POST", lambda i, e=entity: {"url": f"/api/user/{e}", "json": new_row(e, i)}),
+            Scenario(f"PUT {path}", "PUT", lambda i, e=entity, x=entity_ids: {
+                "url": f"/api/user/{e}", "json": updated_row(e, x[i % len(x)], i)}),
+            Scenario(f"POST {path}/bulk", "POST", lambda i, e=entity: {
+                "url": f"/api/user/{e}/bulk", "json": [new_row(e, i * BULK_SIZE + n) for n in range(BULK_SIZE)]}),
+            Scenario(f"PUT {path}/bulk", "PUT", lambda i, e=entity, x=entity_ids: {
+                "url": f"/api/user/{e}/bulk", "json": [updated_row(e, x[(i + n) % len(x)], i) for n in range(BULK_SIZE)]}),
+            Scenario(f"POST {path}/import (ndjson)", "POST", lambda i, e=entity: {
+                "url": f"/api/user/{e}/import", "params": {"format": "ndjson"}, "content": import_body(e, i, "ndjson")}),
+            Scenario(f"POST {path}/import (csv)", "POST", lambda i, e=entity: {
+                "url": f"/api/user/{e}/import", "params": {"format": "csv"}, "content": import_body(e, i, "csv")}),
+            Scenario(f"POST {path}/import (ndjson, rejects)", "POST", lambda i, e=entity: {
+                "url": f"/api/user/{e}/import", "params": {"format": "ndjson"},
+                "content": import_body(e, i, "ndjson", rejects=True)}),
+            Scenario(f"DELETE {path}", "DELETE", lambda i, p=path, take=single_delete: {"url": p, "params": {"id": take(i)[0]}}),
+            Scenario(f"DELETE {path}/bulk", "DELETE", lambda i, p=path, take=bulk_delete: {
+                "url": f"{p}/bulk", "json": {"ids": take(i)}}),
+        ]
+    return result
+
+def git_revision() -> dict:
+    def git(*args):
+        try:
+            return subprocess.run(["git", *args], cwd=BACKEND_DIR, capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+    return {"commit": git("rev-parse", "--short", "HEAD"), "dirty": bool(git("status", "--porcelain", "--", "."))}
+
+async def main_async(args, pid: Optional[int]) -> dict:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=60) as client:
+        state = await prepare(client, args.delete_pool)
+        selected = [scenario for scenario in scenarios(state) if not args.only or re.search(args.only, scenario.name)]
+        results = {}
+        print(f"{'endpoint':<56}{'req':>7}{'err':>5}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'rss MB':>8}")
+
+        def report(name, result):
+            result.update({"rss_mb": read_memory(pid).get("rss_mb")})
+            results[name] = result
+            if result["requests"]:
+                rss = f"{result['rss_mb']:>8.0f}" if result["rss_mb"] else f"{'-':>8}"
+                print(f"{name:<56}{result['requests']:>7}{result['errors']:>5}{result['rps']:>9.1f}"
+                      f"{result['p50_ms']:>9.2f}{result['p95_ms']:>9.2f}{result['p99_ms']:>9.2f}{rss}")
+            else:
+                print(f"{name:<56}{'no requests (delete pool exhausted?)':>48}")
+
+        for scenario in selected:
+            report(scenario.name, await run_scenario(client, scenario, args.concurrency, args.duration))
+        if not args.only or re.search(args.only, "GET /api/stream"):
+            report("GET /api/stream (headers)", await run_stream(client, args.concurrency, args.duration))
+        return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--url", help="benchmark a running server instead of starting one")
+    target.add_argument("--database-url", help="start the server on this (already seeded) database")
+    parser.add_argument("--pid", type=int, help="with --url, the server process to read memory from")
+    parser.add_argument("--rows", type=int, default=10000, help="rows per model for the scratch SQLite database")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=3.0, help="seconds per endpoint")
+    parser.add_argument("--delete-pool", type=int, default=5000, help="rows per model created for the delete scenarios")
+    parser.add_argument("--only", help="regex; run only the endpoints whose name matches")
+    parser.add_argument("--no-cache", action="store_true", help="disable the response cache (CACHE_TTL_SECONDS=0)")
+    parser.add_argument("--server-log", help="file for the started server's output (default: discarded)")
+    parser.add_argument("--output", help="results file (default: benchmarks/results/<commit>-<timestamp>.json)")
+    args = parser.parse_args()
+
+    env = {"CACHE_TTL_SECONDS": "0"} if args.no_cache else {}
+    with tempfile.TemporaryDirectory() as workdir:
+        process, database = None, args.url
+        if not args.url:
+            database_url = args.database_url
+            if not database_url:
+                database_url = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+                seed(database_url, args.rows, args.rows, args.rows)
+            database = args.database_url or f"scratch SQLite, {args.rows} rows per model"
+            log = open(args.server_log, "w") if args.server_log else subprocess.DEVNULL
+            process, args.url = start_server(workdir, dict(env, DATABASE_URL=database_url), stdout=log)
+        try:
+            started = datetime.now(timezone.utc)
+            results = asyncio.run(main_async(args, process.pid if process else args.pid))
+            memory = read_memory(process.pid if process else args.pid)
+        finally:
+            if process:
+                process.terminate()
+                process.wait()
+
+    revision = git_revision()
+    report = {
+        "meta": {
+            **revision,
+            "started_at": started.isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "database": database,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "response_cache": not args.no_cache,
+        },
+        "server": memory,
+        "endpoints": results,
+    }
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{revision['commit'] or 'unknown'}{'-dirty' if revision['dirty'] else ''}-{started:%Y%m%dT%H%M%SZ}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Results written to {output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""In-process micro-benchmarks of the list endpoint building blocks.
+
+Runs against --database-url (already seeded) or a scratch SQLite database
+seeded with --rows rows per model, without HTTP in the way:
+
+- filter/<entity>: build and run a filtered page query (channel + topic, no COUNT)
+- count/<entity>: the COUNT(*) behind ``total`` for the same filter
+- paginate/<entity>/{first,offset,cursor}: page 1, the middle page by OFFSET,
+  and the same middle page by cursor
+- serialize/<entity>/{fast,pydantic}: encode one --limit row page with
+  page_json and through PaginatedResponse[...]
+- import/<entity>: stream --import-rows new NDJSON rows through import_rows
+  (validation, ids, the COPY or executemany load and the commit), also
+  reported as rows per second; each run adds rows, so it goes last
+- import/<entity>/tuples/{sqlite,postgresql}: build the driver parameter
+  tuples for one --import-rows batch as each backend's load takes them
+
+Reports mean and p50/p95/p99 milliseconds per call and writes them as JSON
+(benchmarks/results/micro-<commit>-<timestamp>.json) for compare.py.
+
+    python benchmarks/micro.py --rows 100000 --repeat 200
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from load import RESULTS_DIR, git_revision, new_row, percentile  # noqa: E402
+from seed import seed  # noqa: E402
+
+async def _measure(fn, repeat: int) -> dict:
+    await fn()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return {
+        "runs": repeat,
+        "mean_ms": round(sum(timings) / repeat, 4),
+        "p50_ms": round(percentile(timings, 0.50), 4),
+        "p95_ms": round(percentile(timings, 0.95), 4),
+        "p99_ms": round(percentile(timings, 0.99), 4),
+    }
+
+async def run(args) -> dict:
+    from sqlalchemy import func, select
+    from database import AsyncSessionLocal, get_async_engine
+    from ingest import IMPORTERS, _row_tuples, import_rows
+    from ids import new_ids
+    from pydantic import TypeAdapter
+    from ranking import with_rank
+    from rollups import utcnow
+    from models import Chart, Metric, Priority, Recommendation
+    from pagination import encode_cursor, paginate
+    from schemas import ChartResponse, MetricResponse, PaginatedResponse, PriorityResponse, RecommendationResponse
+    from serialization import page_json, response_columns, response_fields
+
+    entities = [(Chart, ChartResponse), (Metric, MetricResponse), (Priority, PriorityResponse),
+                (Recommendation, RecommendationResponse)]
+    results = {}
+    print(f"{'benchmark':<40}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    async with AsyncSessionLocal(bind=get_async_engine()) as db:
+        for model, schema in entities:
+            name = model.__tablename__
+            fields = response_fields(schema)
+            columns = response_columns(model, fields)
+            total = await db.scalar(select(func.count()).select_from(model))
+            middle = max(1, total // args.limit // 2)
+            anchor = (await db.execute(
+                select(model.created_at, model.id).order_by(model.created_at, model.id)
+                .offset((middle - 1) * args.limit - 1).limit(1)
+            )).first() if middle > 1 else None
+            middle_cursor = encode_cursor(anchor.created_at, anchor.id) if anchor else ""
+
+            def filtered():
+                return select(*columns).where(model.channel == "web", model.topic == "sales")
+
+            page = await paginate(db, select(*columns), model, 1, args.limit, "", False)
+            orm_page = dict(page, items=[schema.model_validate(dict(row._mapping)) for row in page["items"]])
+            benchmarks = {
+                f"filter/{name}": lambda: paginate(db, filtered(), model, 1, args.limit, None, False),
+                f"count/{name}": lambda: db.scalar(select(func.count()).select_from(filtered().subquery())),
+                f"paginate/{name}/first": lambda: paginate(db, select(*columns), model, 1, args.limit, None, False),
+                f"paginate/{name}/offset": lambda: paginate(db, select(*columns), model, middle, args.limit, None, False),
+                f"paginate/{name}/cursor": lambda: paginate(db, select(*columns), model, middle, args.limit, middle_cursor, False),
+            }
+
+            async def fast():
+                page_json(page, fields)
+
+            async def pydantic():
+                json.dumps(PaginatedResponse[schema](**orm_page).model_dump(mode="json"), separators=(",", ":"))
+
+            benchmarks[f"serialize/{name}/fast"] = fast
+            benchmarks[f"serialize/{name}/pydantic"] = pydantic
+            for label, fn in benchmarks.items():
+                results[label] = await _measure(fn, args.repeat)
+                result = results[label]
+                print(f"{label:<40}{result['mean_ms']:>10.3f}{result['p50_ms']:>10.3f}{result['p95_ms']:>10.3f}{result['p99_ms']:>10.3f}")
+
+        for name, (model, schema) in IMPORTERS.items():
+            body = b"".join(json.dumps(new_row(name, i)).encode() + b"\n" for i in range(args.import_rows))
+
+            async def chunks():
+                yield body
+
+            label = f"import/{name}"
+            results[label] = await _measure(lambda: import_rows(db, model, schema, chunks()), args.import_repeat)
+            result = results[label]
+            result["rows_per_second"] = round(args.import_rows / (result["mean_ms"] / 1000))
+            print(f"{label:<40}{result['mean_ms']:>10.3f}{result['p50_ms']:>10.3f}{result['p95_ms']:>10.3f}"
+                  f"{result['p99_ms']:>10.3f}  {result['rows_per_second']} rows/s")
+
+            adapter, now = TypeAdapter(List[schema]), utcnow()
+            valid = adapter.dump_python(adapter.validate_python([new_row(name, i) for i in range(args.import_rows)]))
+            records = [with_rank(model, dict(fields, id=id, created_at=fields["created_at"] or now))
+                       for fields, id in zip(valid, new_ids(args.import_rows))]
+            for dialect in ("sqlite", "postgresql"):
+                async def tuples(dialect=dialect):
+                    _row_tuples(model, records, dialect)
+
+                label = f"import/{name}/tuples/{dialect}"
+                results[label] = result = await _measure(tuples, args.repeat)
+                print(f"{label:<40}{result['mean_ms']:>10.3f}{result['p50_ms']:>10.3f}{result['p95_ms']:>10.3f}{result['p99_ms']:>10.3f}")
+    await get_async_engine().dispose()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", help="an already seeded database (default: seed a scratch SQLite one)")
+    parser.add_argument("--rows", type=int, default=10000, help="rows per model for the scratch database")
+    parser.add_argument("--limit", type=int, default=20, help="page size")
+    parser.add_argument("--repeat", type=int, default=100)
+    parser.add_argument("--import-rows", type=int, default=5000, help="rows per import/<entity> run")
+    parser.add_argument("--import-repeat", type=int, default=5)
+    parser.add_argument("--output", help="results file (default: benchmarks/results/micro-<commit>-<timestamp>.json)")
+    args = parser.parse_args()
+
+    started = datetime.now(timezone.utc)
+    with tempfile.TemporaryDirectory() as workdir:
+        database_url = args.database_url
+        if not database_url:
+            database_url = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+            seed(database_url, args.rows, 0, 0)
+        # database.py reads DATABASE_URL when the engines are first created.
+        os.environ["DATABASE_URL"] = database_url
+        os.environ.pop("K_SERVICE", None)
+        results = asyncio.run(run(args))
+
+    revision = git_revision()
+    report = {
+        "meta": {**revision, "started_at": started.isoformat(), "rows": None if args.database_url else args.rows,
+                 "limit": args.limit, "repeat": args.repeat, "import_rows": args.import_rows},
+        "benchmarks": results,
+    }
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"micro-{revision['commit'] or 'unknown'}{'-dirty' if revision['dirty'] else ''}-{started:%Y%m%dT%H%M%SZ}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Results written to {output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""Seed a database with benchmark volumes of every model.
+
+Creates the schema (tables, indexes, migrations) and inserts --rows charts,
+metrics, priorities and recommendations with realistic filter value spreads
+and creation times over the past year, --events raw events with their
+rollups, and --samples metric history points. Rows go in with multi-row
+INSERTs in --batch sized chunks, so 10M rows per model is a matter of time,
+not memory.
+
+    python benchmarks/seed.py --database-url sqlite:///./bench.db --rows 100000
+    python benchmarks/seed.py --database-url postgresql://postgres@localhost/bench --rows 10000000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from sqlalchemy import create_engine, func, insert, select  # noqa: E402
+
+from database import Base  # noqa: E402
+from ids import new_ids  # noqa: E402
+from migrations import ensure_schema  # noqa: E402
+from models import Chart, Event, Metric, MetricRollup, MetricSample, Priority, Recommendation  # noqa: E402
+from ranking import with_rank  # noqa: E402
+from rollups import GRANULARITIES, bucket_floor  # noqa: E402
+from sketches import TDigest  # noqa: E402
+
+TIMEFRAMES = ["today", "week", "month", "quarter", "year"]
+CHANNELS = ["all", "web", "mobile", "email", "social"]
+TOPICS = ["all", "sales", "marketing", "product", "support"]
+LEVELS = ["high", "medium", "low"]
+STATUSES = ["pending", "in-progress", "completed", "planned"]
+CATEGORIES = ["optimization", "feature", "bug-fix", "ai-generated"]
+METRICS = ["revenue", "daily_users", "orders", "user_segments", "category"]
+WORDS = ("revenue growth churn onboarding campaign mobile checkout retention pricing funnel "
+         "conversion email search latency engagement referral upsell cohort").split()
+
+def _text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+def _common(rng: random.Random, now: datetime) -> dict:
+    return {
+        "timeframe": rng.choice(TIMEFRAMES),
+        "channel": rng.choice(CHANNELS),
+        "topic": rng.choice(TOPICS),
+        "description": _text(rng, 12),
+        "created_at": now - timedelta(seconds=rng.randrange(365 * 86400)),
+    }
+
+def chart_row(rng, now):
+    return dict(_common(rng, now), title=_text(rng, 3), chart_type=rng.choice(["bar", "pie"]),
+                numeric_value=rng.choice(["count", "sum", "average", "median", "p90", "p99"]),
+                metric=rng.choice(METRICS))
+
+def metric_row(rng, now):
+    change = round(rng.uniform(-20, 20), 2)
+    return dict(_common(rng, now), title=_text(rng, 3), value=f"{rng.uniform(0, 100000):,.0f}", change=change,
+                change_type="positive" if change > 0 else "negative" if change < 0 else "neutral",
+                unit=rng.choice(["$", "%", "count"]))
+
+def priority_row(rng, now):
+    return dict(_common(rng, now), title=_text(rng, 5), priority=rng.choice(LEVELS), impact=rng.choice(LEVELS),
+                status=rng.choice(STATUSES), deadline=(now + timedelta(days=rng.randrange(180))).date().isoformat(),
+                assignee=rng.choice(["Product Team", "Marketing Team", "Support", None]))
+
+def recommendation_row(rng, now):
+    return dict(_common(rng, now), text=_text(rng, 10), urgency=rng.choice(LEVELS), impact=rng.choice(LEVELS),
+                category=rng.choice(CATEGORIES), implemented=rng.random() < 0.3)
+
+ROW_BUILDERS = {Chart: chart_row, Metric: metric_row, Priority: priority_row, Recommendation: recommendation_row}
+
+def seed_rows(engine, model, rows: int, batch: int, rng: random.Random) -> float:
+    """Insert ``rows`` generated rows of ``model``; returns seconds taken"""
+    started = time.perf_counter()
+    now = datetime.now(timezone.utc)
+    build = ROW_BUILDERS[model]
+    for start in range(0, rows, batch):
+        count = min(batch, rows - start)
+        chunk = [with_rank(model, dict(build(rng, now), id=id)) for id in new_ids(count)]
+        with engine.begin() as conn:
+            conn.execute(insert(model.__table__), chunk)
+    return time.perf_counter() - started
+
+def seed_events(engine, events: int, batch: int, rng: random.Random) -> float:
+    """Insert ``events`` raw events over the past 90 days and their hour/day/month rollups.
+
+    Same rows and sketches as ``record_events``, but the rollups are
+    aggregated in memory for the whole run and written once at the end
+    instead of upserted per batch, which is what makes millions of events
+    feasible. Needs an empty metric_rollups table.
+    """
+    started = time.perf_counter()
+    with engine.connect() as conn:
+        if conn.execute(select(func.count()).select_from(MetricRollup.__table__)).scalar():
+            raise SystemExit("metric_rollups is not empty; seed events into a fresh database")
+    now = datetime.now(timezone.utc)
+    deltas = defaultdict(lambda: {"count": 0, "sum": 0.0, "min": None, "max": None})
+    digests = defaultdict(TDigest)
+    for start in range(0, events, batch):
+        chunk = []
+        for _ in range(min(batch, events - start)):
+            row = {"metric": rng.choice(METRICS), "value": round(rng.lognormvariate(3, 1), 2),
+                   "channel": rng.choice(CHANNELS[1:]), "topic": rng.choice(TOPICS[1:]),
+                   "occurred_at": now - timedelta(seconds=rng.randrange(90 * 86400))}
+            chunk.append(row)
+            for granularity in GRANULARITIES:
+                key = (granularity, bucket_floor(row["occurred_at"], granularity), row["metric"], row["channel"], row["topic"])
+                delta = deltas[key]
+                delta["count"] += 1
+                delta["sum"] += row["value"]
+                delta["min"] = row["value"] if delta["min"] is None else min(delta["min"], row["value"])
+                delta["max"] = row["value"] if delta["max"] is None else max(delta["max"], row["value"])
+                digests[key].add(row["value"])
+        with engine.begin() as conn:
+            conn.execute(insert(Event.__table__), chunk)
+
+    rollups = [
+        dict(zip(("granularity", "bucket_start", "metric", "channel", "topic"), key), sketch=digests[key].to_json(), **delta)
+        for key, delta in deltas.items()
+    ]
+    for start in range(0, len(rollups), batch):
+        with engine.begin() as conn:
+            conn.execute(insert(MetricRollup.__table__), rollups[start:start + batch])
+    return time.perf_counter() - started
+
+def seed_samples(engine, samples: int, batch: int, rng: random.Random) -> float:
+    """Hourly history points spread over the first 100 metrics"""
+    started = time.perf_counter()
+    with engine.connect() as conn:
+        metric_ids = list(conn.execute(Metric.__table__.select().with_only_columns(Metric.id).limit(100)).scalars())
+    if not metric_ids:
+        return 0.0
+    now = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    per_metric = -(-samples // len(metric_ids))
+    rows = ({"metric_id": metric_id, "recorded_at": now - timedelta(hours=hour), "value": rng.uniform(0, 1000)}
+            for metric_id in metric_ids for hour in range(per_metric))
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == batch:
+            with engine.begin() as conn:
+                conn.execute(insert(MetricSample.__table__), chunk)
+            chunk = []
+    if chunk:
+        with engine.begin() as conn:
+            conn.execute(insert(MetricSample.__table__), chunk)
+    return time.perf_counter() - started
+
+def seed(database_url: str, rows: int, events: int, samples: int, batch: int = 5000, seed_value: int = 42) -> dict:
+    """Create the schema and seed every model; returns seconds per table"""
+    connect_args = {"check_same_thread": False} if database_url.startswith("sqlite") else {}
+    engine = create_engine(database_url, connect_args=connect_args)
+    Base.metadata.create_all(engine)
+    ensure_schema(engine)
+    rng = random.Random(seed_value)
+    timings = {}
+    for model in ROW_BUILDERS:
+        timings[model.__tablename__] = seed_rows(engine, model, rows, batch, rng)
+        print(f"✅ Seeded {rows} {model.__tablename__} in {timings[model.__tablename__]:.1f}s")
+    timings["events"] = seed_events(engine, events, batch, rng)
+    print(f"✅ Seeded {events} events in {timings['events']:.1f}s")
+    timings["metric_samples"] = seed_samples(engine, samples, batch, rng)
+    print(f"✅ Seeded {samples} metric samples in {timings['metric_samples']:.1f}s")
+    engine.dispose()
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", required=True)
+    parser.add_argument("--rows", type=int, default=10000, help="rows per user model")
+    parser.add_argument("--events", type=int, help="raw events (default: --rows)")
+    parser.add_argument("--samples", type=int, help="metric samples (default: --rows)")
+    parser.add_argument("--batch", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=42, help="random seed, for reproducible data")
+    args = parser.parse_args()
+    seed(args.database_url, args.rows, args.rows if args.events is None else args.events,
+         args.rows if args.samples is None else args.samples, args.batch, args.seed)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""List response serialization: Pydantic per row vs. column tuples + orjson.
+
+Seeds a scratch SQLite database, then builds the same limit=100 page of every
+user entity both ways and reports milliseconds per page. The old path loads
+ORM objects and serializes PaginatedResponse[...] through Pydantic; the fast
+path (what the list endpoints use) selects the response columns as tuples and
+encodes them with orjson. The two outputs are checked to be identical.
+
+    python benchmarks/serialization.py --rows 2000 --limit 100 --repeat 200
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _seed_rows(model, count: int):
+    channels = ["web", "mobile", "email"]
+    common = lambda i: {"channel": channels[i % 3], "topic": "sales", "timeframe": "month",
+                        "description": "Lorem ipsum dolor sit amet " * 8}
+    if model.__tablename__ == "charts":
+        return [dict(common(i), title=f"Chart {i}", chart_type="bar", numeric_value="sum", metric="revenue")
+                for i in range(count)]
+    if model.__tablename__ == "metrics":
+        return [dict(common(i), title=f"Metric {i}", value=str(i), change=i / 10, change_type="positive", unit="$")
+                for i in range(count)]
+    if model.__tablename__ == "priorities":
+        return [dict(common(i), title=f"Priority {i}", priority="high", impact="low", status="pending",
+                     deadline="2025-01-01", assignee="sam") for i in range(count)]
+    return [dict(common(i), text=f"Recommendation {i}", urgency="high", impact="low", category="feature",
+                 implemented=i % 2 == 0) for i in range(count)]
+
+async def _time(fn, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        await fn()
+    return (time.perf_counter() - started) / repeat * 1000
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    os.chdir(tempfile.mkdtemp())
+    sys.path.insert(0, BACKEND_DIR)
+    from sqlalchemy import insert, select
+    from database import AsyncSessionLocal, get_async_engine, init_db
+    from ids import new_ids
+    from models import Chart, Metric, Priority, Recommendation
+    from pagination import encode_cursor, paginate
+    from schemas import ChartResponse, MetricResponse, PaginatedResponse, PriorityResponse, RecommendationResponse
+    from serialization import page_json, response_columns, response_fields
+
+    init_db()
+    entities = [(Chart, ChartResponse), (Metric, MetricResponse), (Priority, PriorityResponse),
+                (Recommendation, RecommendationResponse)]
+    async with AsyncSessionLocal() as db:
+        for model, _ in entities:
+            rows = _seed_rows(model, args.rows)
+            await db.execute(insert(model.__table__), [dict(row, id=id) for row, id in zip(rows, new_ids(len(rows)))])
+        await db.commit()
+
+    print(f"{'entity':<16}{'encode ms':>20}{'query+encode ms':>22}")
+    print(f"{'':<16}{'pydantic':>10}{'fast':>10}{'pydantic':>11}{'fast':>11}")
+    for model, schema in entities:
+        async with AsyncSessionLocal() as db:
+            fields = response_fields(schema)
+            ordered = select(model).order_by(model.created_at, model.id).limit(args.limit + 1)
+
+            async def old_page():
+                db.expunge_all()
+                rows = (await db.scalars(ordered)).all()
+                items = rows[:args.limit]
+                next_cursor = encode_cursor(items[-1].created_at, items[-1].id) if len(rows) > args.limit else None
+                return {"items": items, "total": None, "page": 1, "limit": args.limit, "total_pages": None,
+                        "next_cursor": next_cursor}
+
+            async def new_page():
+                return await paginate(db, select(*response_columns(model, fields)), model, 1, args.limit, "", False)
+
+            orm_page, column_page = await old_page(), await new_page()
+            old = lambda page: json.dumps(PaginatedResponse[schema](**page).model_dump(mode="json"), separators=(",", ":"))
+            new = lambda page: page_json(page, fields)
+            if json.loads(old(orm_page)) != json.loads(new(column_page)):
+                raise SystemExit(f"{model.__tablename__}: fast path output differs")
+
+            async def old_encode():
+                old(orm_page)
+
+            async def new_encode():
+                new(column_page)
+
+            async def old_full():
+                old(await old_page())
+
+            async def new_full():
+                new(await new_page())
+
+            timings = [await _time(fn, args.repeat) for fn in (old_encode, new_encode, old_full, new_full)]
+        print(f"{model.__tablename__:<16}" + "".join(f"{ms:>10.3f}" if i < 2 else f"{ms:>11.3f}" for i, ms in enumerate(timings)))
+    await get_async_engine().dispose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,86 @@
+"""Server cold start: process spawn to the first successful request.
+
+Starts `uvicorn main:app` in a scratch directory (so the SQLite fallback
+database starts empty) and polls a database-backed endpoint until it answers
+200, then stops the server and starts it again on the now-initialized
+database. "fresh" is the very first start of a deployment; "existing" is
+every later cold start (a new Cloud Run instance against a database that
+already has the schema), which is the common case. --no-pyc runs a copy of
+the app without __pycache__, the way an image built without a compileall
+step starts on Cloud Run.
+
+    python benchmarks/startup.py --repeat 5 [--path /api/user/metrics?limit=1] [--app-dir ../other-checkout] [--no-pyc]
+"""
+import argparse
+import os
+import shutil
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def _first_request(app_dir: str, workdir: str, path: str, timeout: float, env: dict) -> float:
+    port = _free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--app-dir", app_dir, "--port", str(port)],
+        cwd=workdir,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}{path}", timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.005)
+        raise SystemExit(f"no 200 from {path} within {timeout}s")
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--path", default="/api/user/metrics?limit=1")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--app-dir", default=BACKEND_DIR, help="backend checkout to start (to compare revisions)")
+    parser.add_argument("--no-pyc", action="store_true", help="start from source without cached bytecode")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    fresh, existing = [], []
+    for _ in range(args.repeat):
+        workdir = tempfile.mkdtemp()
+        app_dir = args.app_dir
+        if args.no_pyc:
+            app_dir = os.path.join(workdir, "app")
+            shutil.copytree(args.app_dir, app_dir, ignore=shutil.ignore_patterns("__pycache__", "*.db"))
+            env["PYTHONDONTWRITEBYTECODE"] = "1"
+        try:
+            fresh.append(_first_request(app_dir, workdir, args.path, args.timeout, env))
+            existing.append(_first_request(app_dir, workdir, args.path, args.timeout, env))
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"{'database':<12}{'median ms':>12}{'min ms':>10}{'max ms':>10}")
+    for name, timings in (("fresh", fresh), ("existing", existing)):
+        print(f"{name:<12}{statistics.median(timings) * 1000:>12.0f}{min(timings) * 1000:>10.0f}{max(timings) * 1000:>10.0f}")
+
+if __name__ == "__main__":
+    main()
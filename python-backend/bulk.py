@@ -0,0 +1,83 @@
+from typing import List
+
+from fastapi import HTTPException
+from sqlalchemy import bindparam, delete, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ids import new_ids
+from ranking import RANK_INPUTS, rank_score, with_rank
+
+# Rows per executemany / IN (...) round trip.
+BULK_CHUNK_SIZE = 500
+MAX_BULK_ITEMS = 50_000
+
+def check_batch_size(items: list):
+    if not items:
+        raise HTTPException(status_code=400, detail="Batch is empty")
+    if len(items) > MAX_BULK_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {MAX_BULK_ITEMS} items")
+
+def _chunks(items: list):
+    for start in range(0, len(items), BULK_CHUNK_SIZE):
+        yield start, items[start:start + BULK_CHUNK_SIZE]
+
+async def bulk_create(db: AsyncSession, model, items: List[dict]) -> List[dict]:
+    """Insert rows with Core executemany, chunk by chunk, without building ORM objects.
+
+    The caller owns the transaction, so a failure rolls back the whole batch.
+    """
+    table = model.__table__
+    ids = new_ids(len(items))
+    results = []
+    for start, chunk in _chunks(items):
+        rows = [with_rank(model, dict(item, id=ids[start + offset])) for offset, item in enumerate(chunk)]
+        await db.execute(insert(table), rows)
+        results += [{"index": start + offset, "id": row["id"], "status": "created"} for offset, row in enumerate(rows)]
+    return results
+
+async def bulk_update(db: AsyncSession, model, items: List[dict]) -> List[dict]:
+    """Apply partial updates; rows are grouped by the set of fields they change.
+
+    Each chunk costs one SELECT to find which ids exist plus one executemany
+    UPDATE per distinct field set. Missing ids are reported as not_found.
+    For ranked tables the same SELECT reads the values the rank is computed
+    from, so every updated row gets its new rank_score without another query.
+    """
+    table = model.__table__
+    inputs = [table.c[name] for name in RANK_INPUTS.get(table.name, ())]
+    results = []
+    for start, chunk in _chunks(items):
+        existing = {row.id: row._asdict() for row in await db.execute(
+            select(table.c.id, *inputs).where(table.c.id.in_([item["id"] for item in chunk]))
+        )}
+
+        groups = {}
+        for offset, item in enumerate(chunk):
+            if item["id"] not in existing:
+                results.append({"index": start + offset, "id": item["id"], "status": "not_found"})
+                continue
+            if inputs:
+                item = dict(item, rank_score=rank_score(model, {**existing[item["id"]], **item}))
+            fields = tuple(sorted(field for field in item if field != "id"))
+            groups.setdefault(fields, []).append({"_id": item["id"], **{field: item[field] for field in fields}})
+            results.append({"index": start + offset, "id": item["id"], "status": "updated"})
+
+        for fields, params in groups.items():
+            if fields:
+                # SET columns come from the parameter keys, as in any Core executemany UPDATE.
+                await db.execute(update(table).where(table.c.id == bindparam("_id")), params)
+    return results
+
+async def bulk_delete(db: AsyncSession, model, ids: List[str]) -> List[dict]:
+    """Delete by id with DELETE ... RETURNING so missing ids cost no extra query"""
+    table = model.__table__
+    results = []
+    for start, chunk in _chunks(ids):
+        deleted = set((await db.scalars(
+            delete(table).where(table.c.id.in_(chunk)).returning(table.c.id)
+        )).all())
+        results += [
+            {"index": start + offset, "id": id, "status": "deleted" if id in deleted else "not_found"}
+            for offset, id in enumerate(chunk)
+        ]
+    return results
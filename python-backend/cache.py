@@ -0,0 +1,242 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+
+from serialization import dumps, loads
+from workers import shared_counters
+
+# Query parameters that filter rows, mapped to the column they compare against.
+# Anything else (page, limit, cursor, period, ...) never decides whether a write
+# can change a cached response.
+NAMESPACE_FILTERS = {
+    "charts": {"timeframe": "timeframe", "channel": "channel", "topic": "topic", "chartType": "chart_type"},
+    "metrics": {"timeframe": "timeframe", "channel": "channel", "topic": "topic"},
+    "priorities": {"timeframe": "timeframe", "channel": "channel", "topic": "topic",
+                   "status": "status", "priority": "priority", "impact": "impact"},
+    "recommendations": {"timeframe": "timeframe", "channel": "channel", "topic": "topic", "urgency": "urgency",
+                        "impact": "impact", "category": "category", "implemented": "implemented"},
+    "chart_data": {"metric": "metric", "channel": "channel", "topic": "topic"},
+}
+
+def _normalize(value) -> Optional[str]:
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+def make_key(namespace: str, params: dict) -> str:
+    """Stable key for a parameter set; "all" and None both mean unfiltered"""
+    normalized = {name: _normalize(value) for name, value in params.items() if value is not None and value != "all"}
+    return f"{namespace}:{json.dumps(normalized, sort_keys=True, separators=(',', ':'))}"
+
+def row_values(obj) -> dict:
+    """Column values of an ORM row, for matching it against cached filters"""
+    return {column.key: getattr(obj, column.key) for column in obj.__table__.columns}
+
+def _params_from_key(namespace: str, key: str) -> dict:
+    return json.loads(key[len(namespace) + 1:])
+
+def _affected(namespace: str, params: dict, rows: List[dict]) -> bool:
+    filters = NAMESPACE_FILTERS.get(namespace, {})
+    for row in rows:
+        if all(_normalize(row.get(field)) == params[name] for name, field in filters.items() if name in params):
+            return True
+    return False
+
+class MemoryBackend:
+    """In-process LRU with per-entry TTL, capped by entry count and total bytes.
+
+    With several workers, ``shared`` holds the write counters every worker
+    sees. A worker remembers the last value of each namespace's counter its
+    entries account for; when another worker's write moves it, the next
+    lookup drops the whole namespace, so no worker serves a response older
+    than a write made through any of them.
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 64 * 1024 * 1024, shared=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (expires_at, payload)
+        self._indexes: Dict[str, set] = defaultdict(set)
+        self._counters: Dict[str, int] = defaultdict(int)
+        self._shared = shared
+        self._seen: Dict[str, int] = {}  # namespace -> shared write counter its entries account for
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _drop(self, key: str):
+        _, payload = self._entries.pop(key)
+        self._bytes -= len(payload)
+        self._indexes[key.split(":", 1)[0]].discard(key)
+
+    def _sync(self, namespace: str, writes: int, own_write: bool = False):
+        # Drop the namespace if someone else's write moved its counter past what we have seen.
+        seen = self._seen.setdefault(namespace, writes - own_write)
+        if writes != seen + own_write:
+            for key in list(self._indexes[namespace]):
+                self._drop(key)
+        self._seen[namespace] = writes
+
+    async def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            if self._shared is not None:
+                namespace = key.split(":", 1)[0]
+                self._sync(namespace, self._shared.get(f"writes:{namespace}"))
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    async def set(self, namespace: str, key: str, payload: bytes, ttl: float):
+        if len(payload) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + ttl, payload)
+            self._indexes[namespace].add(key)
+            self._bytes += len(payload)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+
+    async def keys(self, namespace: str) -> List[str]:
+        with self._lock:
+            return list(self._indexes[namespace])
+
+    async def delete(self, keys: Iterable[str]):
+        with self._lock:
+            for key in keys:
+                if key in self._entries:
+                    self._drop(key)
+
+    async def incr(self, name: str) -> int:
+        with self._lock:
+            if self._shared is None:
+                self._counters[name] += 1
+                return self._counters[name]
+            value = self._shared.incr(name)
+            if name.startswith("writes:"):
+                self._sync(name[len("writes:"):], value, own_write=True)
+            return value
+
+    async def counter(self, name: str) -> int:
+        with self._lock:
+            return self._shared.get(name) if self._shared is not None else self._counters[name]
+
+class RedisBackend:
+    """Redis (or any server speaking its protocol) shared by every instance.
+
+    Redis owns expiry and eviction: entries get a TTL, and the size cap and
+    LRU policy come from the server's ``maxmemory`` / ``allkeys-lru`` settings.
+    Each namespace keeps a set of its live keys for targeted invalidation.
+    """
+
+    def __init__(self, url: str, max_bytes: int = 64 * 1024 * 1024, prefix: str = "glanceable:"):
+        import redis.asyncio as redis
+
+        self._redis = redis.from_url(url)
+        self.max_bytes = max_bytes
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self._redis.get(self.prefix + key)
+
+    async def set(self, namespace: str, key: str, payload: bytes, ttl: float):
+        if len(payload) > self.max_bytes:
+            return
+        index = f"{self.prefix}index:{namespace}"
+        async with self._redis.pipeline(transaction=False) as pipe:
+            pipe.set(self.prefix + key, payload, px=int(ttl * 1000))
+            pipe.sadd(index, key)
+            pipe.expire(index, int(ttl) + 60)
+            await pipe.execute()
+
+    async def keys(self, namespace: str) -> List[str]:
+        members = await self._redis.smembers(f"{self.prefix}index:{namespace}")
+        return [member.decode() if isinstance(member, bytes) else member for member in members]
+
+    async def delete(self, keys: Iterable[str]):
+        keys = list(keys)
+        if not keys:
+            return
+        namespace = keys[0].split(":", 1)[0]
+        async with self._redis.pipeline(transaction=False) as pipe:
+            pipe.delete(*(self.prefix + key for key in keys))
+            pipe.srem(f"{self.prefix}index:{namespace}", *keys)
+            await pipe.execute()
+
+    async def incr(self, name: str) -> int:
+        return await self._redis.incr(f"{self.prefix}counter:{name}")
+
+    async def counter(self, name: str) -> int:
+        return int(await self._redis.get(f"{self.prefix}counter:{name}") or 0)
+
+class ResponseCache:
+    """Read-through cache for JSON responses, invalidated by the write handlers.
+
+    A write bumps its namespace's write counter before deleting the keys whose
+    filters match the written rows, and a loader result is only stored if that
+    counter did not move while it ran, so a read racing a write does not cache
+    the pre-write response.
+    """
+
+    def __init__(self, backend, ttl: float = 30.0):
+        self.backend = backend
+        self.ttl = ttl
+        self.stats = defaultdict(lambda: {"hits": 0, "misses": 0, "invalidations": 0})
+
+    async def get_or_load(self, namespace: str, params: dict, loader: Callable[[], Awaitable[dict]]) -> dict:
+        async def load_bytes():
+            return dumps(await loader())
+        return loads(await self.get_or_load_bytes(namespace, params, load_bytes))
+
+    async def get_or_load_bytes(self, namespace: str, params: dict, loader: Callable[[], Awaitable[bytes]]) -> bytes:
+        """Like get_or_load for loaders that already produce JSON, returned undecoded"""
+        key = make_key(namespace, params)
+        payload = await self.backend.get(key)
+        if payload is not None:
+            self.stats[namespace]["hits"] += 1
+            return payload
+
+        self.stats[namespace]["misses"] += 1
+        version = await self.backend.counter(f"writes:{namespace}")
+        payload = await loader()
+        if await self.backend.counter(f"writes:{namespace}") == version:
+            await self.backend.set(namespace, key, payload, self.ttl)
+        return payload
+
+    async def invalidate(self, namespace: str, rows: Optional[List[dict]] = None):
+        """Drop cached responses a write to ``rows`` could change (all of them when rows is None)"""
+        await self.backend.incr(f"writes:{namespace}")
+        keys = await self.backend.keys(namespace)
+        if rows is not None:
+            keys = [key for key in keys if _affected(namespace, _params_from_key(namespace, key), rows)]
+        await self.backend.delete(keys)
+        self.stats[namespace]["invalidations"] += len(keys)
+
+    def snapshot(self) -> dict:
+        return {namespace: dict(counts) for namespace, counts in self.stats.items()}
+
+def create_response_cache() -> ResponseCache:
+    """Build the cache from CACHE_BACKEND (memory, redis or none) and friends"""
+    backend_name = os.getenv("CACHE_BACKEND", "memory")
+    ttl = float(os.getenv("CACHE_TTL_SECONDS", "30"))
+    max_bytes = int(os.getenv("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+    if backend_name == "redis":
+        backend = RedisBackend(os.getenv("CACHE_URL", "redis://localhost:6379/0"), max_bytes=max_bytes)
+    elif backend_name == "none":
+        backend = MemoryBackend(max_entries=0, max_bytes=0)
+    else:
+        backend = MemoryBackend(int(os.getenv("CACHE_MAX_ENTRIES", "1024")), max_bytes, shared_counters())
+    print(f"✅ Response cache: {backend_name} (ttl {ttl:g}s)")
+    return ResponseCache(backend, ttl)
+
+response_cache = create_response_cache()
@@ -0,0 +1,208 @@
+import asyncio
+import errno
+import json
+import os
+import socket
+from typing import AsyncIterator, Dict, Optional, Set
+
+from workers import state_dir, worker_index
+
+STREAM_ENTITIES = ("metrics", "priorities")
+
+HEARTBEAT_SECONDS = 15.0
+
+def _encode(event: str, data: dict) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n".encode()
+
+class Subscriber:
+    """One stream connection: its filters and a bounded buffer of encoded events"""
+
+    def __init__(self, entities: Set[str], filters: Dict[str, str], buffer_size: int):
+        self.entities = entities
+        self.filters = filters
+        self.queue: "asyncio.Queue[bytes]" = asyncio.Queue(maxsize=buffer_size)
+        self.dropped = 0
+        self.resync_pending = False
+
+    def wants(self, entity: str, rows) -> bool:
+        if entity not in self.entities:
+            return False
+        if rows is None:
+            return True
+        return any(all(row.get(field) == value for field, value in self.filters.items()) for row in rows)
+
+    def offer(self, message: bytes):
+        """Queue without waiting; a client that fell behind gets one resync instead"""
+        if self.resync_pending:
+            self.dropped += 1
+            return
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.dropped += self.queue.qsize() + 1
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(_encode("resync", {"dropped": self.dropped}))
+            self.resync_pending = True
+
+    async def next(self) -> bytes:
+        message = await self.queue.get()
+        if self.queue.empty():
+            # Anything published after the resync is newer than the client's refetch.
+            self.resync_pending = False
+        return message
+
+class WorkerRelay:
+    """Carries published changes to the other workers of this server.
+
+    Each worker binds a Unix datagram socket in the shared state directory
+    and sends every change to its siblings' sockets without waiting: a
+    sibling whose socket buffer is full misses the message (it is counted
+    in ``dropped``), and a socket nobody listens on any more is removed.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.path = os.path.join(directory, f"changes-{worker_index()}.sock")
+        self.sent = 0
+        self.dropped = 0
+        self._socket = None
+
+    def start(self, deliver):
+        """Listen for siblings' changes on the running loop and pass each to ``deliver``"""
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        # A socket left at this path belongs to a worker that exited: this one holds its index now.
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self._socket.bind(self.path)
+        self._socket.setblocking(False)
+
+        def receive():
+            while True:
+                try:
+                    message = self._socket.recv(1 << 20)
+                except BlockingIOError:
+                    return
+                deliver(**json.loads(message))
+
+        asyncio.get_running_loop().add_reader(self._socket.fileno(), receive)
+
+    def stop(self):
+        if self._socket is not None:
+            asyncio.get_running_loop().remove_reader(self._socket.fileno())
+            self._socket.close()
+            self._socket = None
+            os.unlink(self.path)
+
+    def send(self, message: bytes, fallback: bytes):
+        if self._socket is None:
+            return
+        for name in os.listdir(self.directory):
+            peer = os.path.join(self.directory, name)
+            if not name.startswith("changes-") or peer == self.path:
+                continue
+            try:
+                try:
+                    self._socket.sendto(message, peer)
+                except OSError as e:
+                    if e.errno != errno.EMSGSIZE:
+                        raise
+                    self._socket.sendto(fallback, peer)
+                self.sent += 1
+            except BlockingIOError:
+                self.dropped += 1
+            except (ConnectionRefusedError, FileNotFoundError):
+                try:
+                    os.unlink(peer)
+                except FileNotFoundError:
+                    pass
+
+class ChangeBroker:
+    """Fans out create/update/delete events from the write handlers to stream subscribers.
+
+    Publishing never blocks a write: each message is encoded once and offered to
+    every matching subscriber's bounded queue. A subscriber whose queue is full
+    has it emptied and replaced by a single ``resync`` event telling the client
+    to refetch, so a slow reader costs at most ``buffer_size`` messages. An idle
+    subscriber is just a coroutine parked on its queue plus a heartbeat.
+    """
+
+    def __init__(self, buffer_size: int = 256, max_subscribers: int = 10_000):
+        self.buffer_size = buffer_size
+        self.max_subscribers = max_subscribers
+        self._subscribers: Set[Subscriber] = set()
+        self.published = 0
+        self.relay: Optional[WorkerRelay] = None
+
+    def start_relay(self):
+        """Share changes with the server's other workers, when there are any"""
+        directory = state_dir()
+        if directory:
+            self.relay = WorkerRelay(directory)
+            self.relay.start(self._deliver)
+
+    def stop_relay(self):
+        if self.relay is not None:
+            self.relay.stop()
+
+    def subscribe(self, entities: Set[str], filters: Dict[str, Optional[str]]) -> Optional[Subscriber]:
+        if len(self._subscribers) >= self.max_subscribers:
+            return None
+        filters = {field: value for field, value in filters.items() if value is not None and value != "all"}
+        subscriber = Subscriber(entities, filters, self.buffer_size)
+        self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        self._subscribers.discard(subscriber)
+
+    def publish(self, entity: str, change: str, item: Optional[dict] = None, rows=None):
+        """Send ``change`` to subscribers whose filters match any of ``rows``.
+
+        ``rows`` are the column values before and/or after the write, so an
+        update that moves a row out of a subscriber's filter still reaches it.
+        Bulk writes pass no rows and reach every subscriber of the entity.
+        Other workers get the change through the relay and do the same.
+        """
+        if self.relay is not None:
+            change_json = json.dumps({"entity": entity, "change": change, "item": item, "rows": rows},
+                                     separators=(",", ":"), default=str).encode()
+            # A change too large for one datagram reaches the siblings' subscribers as a bulk refetch.
+            fallback = json.dumps({"entity": entity, "change": "bulk", "item": None, "rows": None}).encode()
+            self.relay.send(change_json, fallback)
+        self._deliver(entity, change, item, rows)
+
+    def _deliver(self, entity: str, change: str, item: Optional[dict], rows):
+        if not self._subscribers:
+            return
+        message = _encode(change, {"entity": entity, "item": item})
+        self.published += 1
+        for subscriber in list(self._subscribers):
+            if subscriber.wants(entity, rows):
+                subscriber.offer(message)
+
+    async def stream(self, subscriber: Subscriber) -> AsyncIterator[bytes]:
+        """Server-Sent Events body for one subscriber, with comment heartbeats"""
+        try:
+            yield b"retry: 5000\n\n"
+            while True:
+                try:
+                    yield await asyncio.wait_for(subscriber.next(), HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield b": keep-alive\n\n"
+        finally:
+            self.unsubscribe(subscriber)
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": len(self._subscribers),
+            "published": self.published,
+            "buffered": sum(subscriber.queue.qsize() for subscriber in self._subscribers),
+            "dropped": sum(subscriber.dropped for subscriber in self._subscribers),
+            **({"relayed": self.relay.sent, "relay_dropped": self.relay.dropped} if self.relay else {}),
+        }
+
+change_broker = ChangeBroker(
+    int(os.getenv("STREAM_BUFFER_SIZE", "256")),
+    int(os.getenv("STREAM_MAX_SUBSCRIBERS", "10000")),
+)
@@ -0,0 +1,88 @@
+"""Atomicity check for the streaming importer (ingest.py).
+
+Imports two batches of metrics and makes the second fail after its rows are
+loaded, then exits non-zero unless exactly the first batch (rows, samples
+and one table version bump) is left. On Postgres this covers the COPY path.
+
+    python check_imports.py                                  # temporary SQLite file
+    python check_imports.py --database-url postgresql://...  # local Postgres
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+
+import orjson
+from sqlalchemy import func, select
+
+BATCH_SIZE = 3
+
+async def _chunks():
+    for i in range(BATCH_SIZE * 2):
+        yield orjson.dumps({"title": f"Import check {i}", "value": str(i)}) + b"\n"
+
+async def _check() -> int:
+    import ingest
+    from database import AsyncSessionLocal, get_async_engine, get_engine, init_db
+    from etags import table_version
+    from ids import claim_worker_id, release_worker_lease
+    from models import Metric, MetricSample
+
+    init_db()
+    claim_worker_id(get_engine())
+    record_samples = ingest.record_samples
+    calls = 0
+
+    async def failing_after_load(db, samples):
+        nonlocal calls
+        calls += 1
+        await record_samples(db, samples)
+        if calls == 2:
+            raise RuntimeError("forced failure after the second batch was loaded")
+
+    try:
+        async with AsyncSessionLocal() as db:
+            before = (await db.scalar(select(func.count()).select_from(Metric)),
+                      await db.scalar(select(func.count()).select_from(MetricSample)),
+                      await table_version(db, "metrics"))
+        ingest.record_samples = failing_after_load
+        try:
+            async with AsyncSessionLocal() as db:
+                await ingest.import_rows(db, Metric, ingest.MetricImport, _chunks(), batch_size=BATCH_SIZE)
+            print("❌ The forced failure did not happen")
+            return 1
+        except RuntimeError:
+            pass
+        finally:
+            ingest.record_samples = record_samples
+        async with AsyncSessionLocal() as db:
+            after = (await db.scalar(select(func.count()).select_from(Metric)),
+                     await db.scalar(select(func.count()).select_from(MetricSample)),
+                     await table_version(db, "metrics"))
+    finally:
+        release_worker_lease(get_engine())
+        await get_async_engine().dispose()
+        get_engine().dispose()
+
+    expected = (before[0] + BATCH_SIZE, before[1] + BATCH_SIZE, before[2] + 1)
+    if after != expected:
+        print(f"❌ (metrics, samples, version) went from {before} to {after}, expected {expected}")
+        return 1
+    print(f"✅ A failed import batch left nothing behind on {get_engine().dialect.name}")
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", help="defaults to a temporary SQLite database")
+    args = parser.parse_args()
+
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+        sys.exit(asyncio.run(_check()))
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'imports.db')}"
+        sys.exit(asyncio.run(_check()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import hashlib
+import json
+from typing import Optional
+
+from fastapi import Request, Response
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import get_async_engine
+from models import TableVersion
+
+# Tables whose GET responses carry version-derived ETags.
+VERSIONED_TABLES = ("charts", "metrics", "priorities", "recommendations", "events")
+
+# User data: clients may store it but must revalidate with If-None-Match every time.
+PRIVATE_REVALIDATE = "private, no-cache"
+# Fixed system payloads.
+PUBLIC_STATIC = "public, max-age=300"
+
+async def table_version(db: AsyncSession, table: str) -> int:
+    return await db.scalar(select(TableVersion.version).where(TableVersion.table_name == table)) or 0
+
+async def bump_version(table: str) -> None:
+    """Advance a table's version once the caller's write has committed.
+
+    In a short transaction of its own on the primary, so writers to one table
+    hold its version row for a single statement rather than for their whole
+    write, and readers only see the new version once the data is visible.
+    """
+    async with get_async_engine().begin() as conn:
+        result = await conn.execute(
+            update(TableVersion).where(TableVersion.table_name == table).values(version=TableVersion.version + 1)
+        )
+        if result.rowcount == 0:
+            await conn.execute(insert(TableVersion).values(table_name=table, version=1))
+
+def make_etag(*parts) -> str:
+    digest = hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()[:20]
+    return f'"{digest}"'
+
+def _matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [candidate.strip() for candidate in header.split(",")]
+    return "*" in candidates or any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+def not_modified(request: Request, etag: str, cache_control: str = PRIVATE_REVALIDATE) -> Optional[Response]:
+    """A 304 when the client already holds ``etag``, otherwise None"""
+    if _matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+    return None
+
+def caching_headers(etag: str, cache_control: str = PRIVATE_REVALIDATE) -> dict:
+    return {"ETag": etag, "Cache-Control": cache_control}
@@ -0,0 +1,149 @@
+import asyncio
+import csv
+import io
+from datetime import datetime
+from typing import AsyncIterator, List, Sequence
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Boolean, DateTime, Float, Integer, Select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import AsyncSessionLocal
+from serialization import dumps, rows_to_items
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+# Rows fetched from the server-side cursor and written out per chunk (one Parquet row group each).
+EXPORT_BATCH_SIZE = 1000
+
+async def _partitions(db: AsyncSession, query: Select, batch_size: int) -> AsyncIterator[list]:
+    """Rows of ``query`` in batches from a server-side cursor.
+
+    Runs on its own session (on the request session's engine, so a replica
+    read stays on the replica): the response body is produced after the
+    handler returns, when the request session may already be closed. When
+    the client goes away mid-export every further await is cancelled, so
+    the close is shielded to hand the connection back to the pool cleanly.
+    """
+    session = AsyncSessionLocal(bind=db.bind)
+    try:
+        result = await session.stream(query.execution_options(yield_per=batch_size))
+        async for rows in result.partitions():
+            yield rows
+    finally:
+        await asyncio.shield(session.close())
+
+async def _ndjson(fields: Sequence[str], partitions) -> AsyncIterator[bytes]:
+    async for rows in partitions:
+        yield b"".join(dumps(item) + b"\n" for item in rows_to_items(fields, rows))
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+async def _csv(fields: Sequence[str], partitions) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    async for rows in partitions:
+        writer.writerows([_csv_value(value) for value in row[:len(fields)]] for row in rows)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+class _Drain(io.RawIOBase):
+    """Write-only file that hands out what was written since the last drain.
+
+    Keeps the absolute position for tell(), which the Parquet writer needs
+    for the column chunk offsets in the footer, without keeping the bytes.
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data, self._chunks = b"".join(self._chunks), []
+        return data
+
+def _arrow_schema(pa, model, fields: Sequence[str]):
+    def arrow_type(column):
+        if isinstance(column.type, Boolean):
+            return pa.bool_()
+        if isinstance(column.type, Integer):
+            return pa.int64()
+        if isinstance(column.type, Float):
+            return pa.float64()
+        if isinstance(column.type, DateTime):
+            return pa.timestamp("us", tz="UTC")
+        return pa.string()
+    return pa.schema([(name, arrow_type(model.__table__.c[name])) for name in fields])
+
+async def _columnar(fmt: str, model, fields: Sequence[str], partitions) -> AsyncIterator[bytes]:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = _arrow_schema(pa, model, fields)
+    sink = _Drain()
+    writer = pq.ParquetWriter(sink, schema) if fmt == "parquet" else pa.ipc.new_stream(sink, schema)
+    async for rows in partitions:
+        columns = [pa.array([row[index] for row in rows], type=field.type) for index, field in enumerate(schema)]
+        if fmt == "parquet":
+            writer.write_table(pa.Table.from_arrays(columns, schema=schema))
+        else:
+            writer.write_batch(pa.RecordBatch.from_arrays(columns, schema=schema))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+def export_response(db: AsyncSession, model, query: Select, fields: Sequence[str], fmt: str) -> StreamingResponse:
+    """Stream every row of a column SELECT as NDJSON, CSV, an Arrow IPC stream or Parquet.
+
+    ``query`` selects response_columns(model, fields) with the filters
+    applied. Rows come off a server-side cursor ``EXPORT_BATCH_SIZE`` at a
+    time and each batch is encoded and sent before the next is fetched, so
+    memory stays flat whatever the table size. Ordered by (created_at, id)
+    like the list endpoints.
+    """
+    if fmt not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(EXPORT_MEDIA_TYPES)}")
+    if fmt in ("arrow", "parquet"):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise HTTPException(status_code=501, detail=f"{fmt} export requires pyarrow on the server")
+
+    partitions = _partitions(db, query.order_by(model.created_at, model.id), EXPORT_BATCH_SIZE)
+    if fmt == "ndjson":
+        body = _ndjson(fields, partitions)
+    elif fmt == "csv":
+        body = _csv(fields, partitions)
+    else:
+        body = _columnar(fmt, model, fields, partitions)
+    filename = f"{model.__tablename__}.{fmt}"
+    return StreamingResponse(body, media_type=EXPORT_MEDIA_TYPES[fmt],
+                             headers={"Content-Disposition": f'attachment; filename="{filename}"'})
@@ -0,0 +1,83 @@
+from typing import Dict
+
+from sqlalchemy import Boolean, and_, func, literal, or_, select, true, tuple_, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from cache import NAMESPACE_FILTERS
+
+def _criteria_by_filter(model, namespace: str, params: dict) -> dict:
+    return {
+        name: getattr(model, column) == params[name]
+        for name, column in NAMESPACE_FILTERS[namespace].items()
+        if params.get(name) is not None and params[name] != "all"
+    }
+
+def filter_criteria(model, namespace: str, params: dict) -> list:
+    """WHERE clauses for the filter parameters that are set (None and "all" mean unfiltered)"""
+    return list(_criteria_by_filter(model, namespace, params).values())
+
+def _facet_key(column, value) -> str:
+    """Spell a value the way it is passed back as a filter (SQLite returns booleans as 0/1)"""
+    if isinstance(column.type, Boolean):
+        return "true" if value else "false"
+    return str(value)
+
+async def facet_counts(db: AsyncSession, model, namespace: str, params: dict) -> dict:
+    """Row counts per value of every filter dimension, plus the total, in one statement.
+
+    Each dimension is counted under every filter but its own, so the values
+    next to an active filter keep the counts a click on them would give; the
+    total is under all of them. Postgres computes all dimensions in a single
+    scan with GROUPING SETS, each dimension's count FILTERed by the other
+    dimensions' predicates; GROUPING() tells which set a row belongs to, so
+    real NULLs are not mistaken for the rolled-up column. SQLite has no
+    GROUPING SETS, so it gets the equivalent UNION ALL of one GROUP BY per
+    dimension, still one round trip and one statement for the cache to store.
+    """
+    dimensions = {name: getattr(model, column) for name, column in NAMESPACE_FILTERS[namespace].items()}
+    columns = list(dimensions.values())
+    criteria = _criteria_by_filter(model, namespace, params)
+    others = {name: [clause for other, clause in criteria.items() if other != name] for name in dimensions}
+    facets: Dict[str, Dict[str, int]] = {name: {} for name in dimensions}
+    total = 0
+
+    if db.bind.dialect.name == "postgresql":
+        sets = [tuple_(column) for column in columns] + [tuple_()]
+        query = (
+            select(
+                *columns,
+                *(func.grouping(column) for column in columns),
+                func.count().filter(and_(true(), *criteria.values())),
+                *(func.count().filter(and_(true(), *others[name])) for name in dimensions),
+            )
+            .select_from(model)
+            # Rows that count for at least one dimension.
+            .where(or_(*(and_(true(), *clauses) for clauses in others.values())))
+            .group_by(func.grouping_sets(*sets))
+        )
+        for row in (await db.execute(query)).all():
+            values, grouped = row[:len(columns)], row[len(columns):2 * len(columns)]
+            counts = row[2 * len(columns):]
+            if all(grouped):
+                total = counts[0]
+                continue
+            index = grouped.index(0)
+            if values[index] is not None and counts[index + 1]:
+                facets[list(dimensions)[index]][_facet_key(columns[index], values[index])] = counts[index + 1]
+    else:
+        parts = [
+            select(literal("").label("dimension"), literal(None).label("value"), func.count())
+            .select_from(model)
+            .where(*criteria.values())
+        ]
+        for name, column in dimensions.items():
+            parts.append(
+                select(literal(name), column, func.count()).where(*others[name], column.isnot(None)).group_by(column)
+            )
+        for name, value, count in (await db.execute(union_all(*parts))).all():
+            if not name:
+                total = count
+            else:
+                facets[name][_facet_key(dimensions[name], value)] = count
+
+    return {"total": total, "facets": facets}
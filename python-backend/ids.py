@@ -0,0 +1,201 @@
+import asyncio
+import os
+import random
+import socket
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+
+from models import IdWorkerLease
+from workers import worker_index
+
+# Snowflake layout: 41 bits of milliseconds since EPOCH_MS, 10 worker bits, 12 sequence bits.
+EPOCH_MS = 1704067200000  # 2024-01-01T00:00:00Z
+WORKER_BITS = 10
+SEQUENCE_BITS = 12
+MAX_WORKER_ID = (1 << WORKER_BITS) - 1
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+ID_WIDTH = 19  # zero-padded so string order matches numeric (and time) order
+
+LEASE_TTL = timedelta(minutes=10)
+# new_id re-claims a lease this close to its expiry instead of minting under it.
+LEASE_SAFETY_MARGIN = timedelta(minutes=1)
+
+class SnowflakeGenerator:
+    """Monotonic, time-ordered 64-bit ids rendered as fixed-width strings.
+
+    Ids from one generator strictly increase even if the wall clock steps
+    back or more than 4096 ids are requested in one millisecond: the
+    generator keeps its own clock and borrows the next millisecond instead
+    of waiting. Uniqueness across processes comes from the worker id.
+    """
+
+    def __init__(self, worker_id: int):
+        self._lock = threading.Lock()
+        self._last_ms = 0
+        self._sequence = 0
+        self.worker_id = worker_id
+        self.expires_at = None  # when the worker id's lease runs out; None for a pinned WORKER_ID
+
+    @property
+    def worker_id(self) -> int:
+        return self._worker_id
+
+    @worker_id.setter
+    def worker_id(self, worker_id: int):
+        if not 0 <= worker_id <= MAX_WORKER_ID:
+            raise ValueError(f"worker_id must be between 0 and {MAX_WORKER_ID}")
+        self._worker_id = worker_id
+
+    def next_int(self) -> int:
+        with self._lock:
+            now_ms = int(time.time() * 1000) - EPOCH_MS
+            if now_ms > self._last_ms:
+                self._last_ms = now_ms
+                self._sequence = 0
+            elif self._sequence < MAX_SEQUENCE:
+                self._sequence += 1
+            else:
+                self._last_ms += 1
+                self._sequence = 0
+            return (self._last_ms << (WORKER_BITS + SEQUENCE_BITS)) | (self._worker_id << SEQUENCE_BITS) | self._sequence
+
+    def next_id(self) -> str:
+        return str(self.next_int()).zfill(ID_WIDTH)
+
+    def next_ids(self, count: int):
+        return [self.next_id() for _ in range(count)]
+
+def _pinned_worker_id(index: int) -> int:
+    worker_id = int(os.environ["WORKER_ID"]) + index
+    if not 0 <= worker_id <= MAX_WORKER_ID:
+        raise RuntimeError(f"WORKER_ID {os.environ['WORKER_ID']} plus worker index {index} is outside 0..{MAX_WORKER_ID}")
+    return worker_id
+
+def _initial_worker_id() -> int:
+    if os.getenv("WORKER_ID"):
+        return _pinned_worker_id(0)
+    return random.randint(0, MAX_WORKER_ID)
+
+generator = SnowflakeGenerator(_initial_worker_id())
+_lease_owner = f"{socket.gethostname()}:{os.getpid()}:{random.getrandbits(32):08x}"
+_lease_engine = None
+_lease_lock = threading.RLock()
+
+def _check_lease() -> None:
+    """Re-claim the worker id before minting if its lease is about to run out.
+
+    The background renewal normally keeps the lease well ahead; this covers
+    a renewal that kept failing, so ids are never minted under a worker id
+    another instance may already have taken over. Raises when no lease can
+    be had. The re-claim blocks, but only on this degraded path.
+    """
+    if generator.expires_at is None or _utcnow() < generator.expires_at - LEASE_SAFETY_MARGIN:
+        return
+    with _lease_lock:
+        if generator.expires_at - LEASE_SAFETY_MARGIN <= _utcnow():
+            if _lease_engine is None:
+                raise RuntimeError("The id worker lease has expired")
+            renew_worker_lease(_lease_engine)
+
+def new_id() -> str:
+    """Next id for a chart, metric, priority or recommendation"""
+    _check_lease()
+    return generator.next_id()
+
+def new_ids(count: int):
+    _check_lease()
+    return generator.next_ids(count)
+
+def id_timestamp(id: str) -> datetime:
+    """Creation time encoded in an id produced by new_id"""
+    ms = (int(id) >> (WORKER_BITS + SEQUENCE_BITS)) + EPOCH_MS
+    return datetime.fromtimestamp(ms / 1000, tz=timezone.utc)
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+def claim_worker_id(engine: Engine) -> int:
+    """Lease a worker id no other live instance holds and point the generator at it.
+
+    Leases live in id_worker_leases and expire after LEASE_TTL unless renewed,
+    so ids stay unique across Cloud Run instances without a coordinator.
+    WORKER_ID in the environment pins the id and skips leasing; the workers
+    of one server take WORKER_ID, WORKER_ID + 1, ... by worker index.
+    """
+    global _lease_engine
+    if os.getenv("WORKER_ID"):
+        generator.worker_id = _pinned_worker_id(worker_index())
+        return generator.worker_id
+
+    _lease_engine = engine
+
+    table = IdWorkerLease.__table__
+    for _ in range(10):
+        now = _utcnow()
+        with engine.begin() as conn:
+            leases = {row.worker_id: row.expires_at for row in conn.execute(select(table.c.worker_id, table.c.expires_at))}
+        free = [worker_id for worker_id in range(MAX_WORKER_ID + 1) if worker_id not in leases]
+        expired = [worker_id for worker_id, expires_at in leases.items()
+                   if expires_at.replace(tzinfo=expires_at.tzinfo or timezone.utc) < now]
+        if not free and not expired:
+            raise RuntimeError("All id worker leases are taken")
+
+        worker_id = random.choice(free or expired)
+        try:
+            with engine.begin() as conn:
+                if worker_id in leases:
+                    claimed = conn.execute(
+                        update(table)
+                        .where(table.c.worker_id == worker_id, table.c.expires_at == leases[worker_id])
+                        .values(owner=_lease_owner, expires_at=now + LEASE_TTL)
+                    ).rowcount == 1
+                else:
+                    conn.execute(insert(table).values(worker_id=worker_id, owner=_lease_owner, expires_at=now + LEASE_TTL))
+                    claimed = True
+        except IntegrityError:
+            claimed = False
+        if claimed:
+            generator.worker_id = worker_id
+            generator.expires_at = now + LEASE_TTL
+            print(f"✅ Leased id worker {worker_id}")
+            return worker_id
+    raise RuntimeError("Could not lease an id worker after 10 attempts")
+
+def renew_worker_lease(engine: Engine) -> None:
+    """Extend our lease, or claim a fresh worker id if it was lost"""
+    if os.getenv("WORKER_ID"):
+        return
+    table = IdWorkerLease.__table__
+    with _lease_lock:
+        expires_at = _utcnow() + LEASE_TTL
+        with engine.begin() as conn:
+            renewed = conn.execute(
+                update(table)
+                .where(table.c.worker_id == generator.worker_id, table.c.owner == _lease_owner)
+                .values(expires_at=expires_at)
+            ).rowcount == 1
+        if renewed:
+            generator.expires_at = expires_at
+        else:
+            claim_worker_id(engine)
+
+def release_worker_lease(engine: Engine) -> None:
+    if os.getenv("WORKER_ID"):
+        return
+    table = IdWorkerLease.__table__
+    with engine.begin() as conn:
+        conn.execute(delete(table).where(table.c.worker_id == generator.worker_id, table.c.owner == _lease_owner))
+
+async def keep_worker_lease(engine: Engine) -> None:
+    """Background task: renew the lease well before it expires"""
+    while True:
+        await asyncio.sleep(LEASE_TTL.total_seconds() / 3)
+        try:
+            await asyncio.to_thread(renew_worker_lease, engine)
+        except Exception as e:
+            print(f"❌ Failed to renew id worker lease: {e}")
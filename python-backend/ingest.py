@@ -0,0 +1,298 @@
+import argparse
+import asyncio
+import codecs
+import csv
+import io
+import os
+import sys
+import time
+from collections import defaultdict
+from operator import itemgetter
+from typing import AsyncIterator, Callable, List, Optional, Tuple
+
+import orjson
+from fastapi import HTTPException
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import DateTime, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from etags import bump_version
+from ids import new_ids
+from models import Chart, Metric, Priority, Recommendation
+from ranking import with_rank
+from rollups import as_utc, utcnow
+from samples import record_samples, samples_for
+from schemas import ChartImport, MetricImport, PriorityImport, RecommendationImport
+
+IMPORT_FORMATS = ("ndjson", "csv")
+
+# Rows validated, loaded and committed together.
+IMPORT_BATCH_SIZE = 5000
+
+# Rejected rows listed in an import's result; the CLI writes every one to its rejects file.
+MAX_REPORTED_REJECTS = 1000
+
+IMPORTERS = {
+    "charts": (Chart, ChartImport),
+    "metrics": (Metric, MetricImport),
+    "priorities": (Priority, PriorityImport),
+    "recommendations": (Recommendation, RecommendationImport),
+}
+
+async def _records(chunks: AsyncIterator[bytes], fmt: str) -> AsyncIterator[Tuple[int, str]]:
+    """(line number, text) of each record in a byte stream, without holding more than one chunk.
+
+    An NDJSON record is a line. A CSV record ends at a newline outside
+    quotes, so quoted fields may span lines: a line with an odd number of
+    quote characters opens (or closes) a multi-line record.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    record, record_line, open_quotes, line_number = [], 1, False, 0
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            line_number += 1
+            if fmt == "csv":
+                if not record:
+                    record_line = line_number
+                record.append(line)
+                open_quotes ^= line.count('"') % 2 == 1
+                if open_quotes:
+                    continue
+                line, record = "\n".join(record), []
+            else:
+                record_line = line_number
+            yield record_line, line
+    pending += decoder.decode(b"", final=True)
+    if pending or record:
+        line_number += 1
+        yield (record_line if record else line_number), "\n".join(record + [pending])
+
+def _reject(line: int, errors: List[str], text: str) -> dict:
+    return {"line": line, "errors": errors, "record": text}
+
+def _parse_ndjson(batch: List[Tuple[int, str]]):
+    rows, rejects = [], []
+    for line, text in batch:
+        try:
+            row = orjson.loads(text)
+        except orjson.JSONDecodeError as e:
+            rejects.append(_reject(line, [f"invalid JSON: {e}"], text))
+            continue
+        if not isinstance(row, dict):
+            rejects.append(_reject(line, ["expected a JSON object"], text))
+            continue
+        rows.append((line, text, row))
+    return rows, rejects
+
+def _parse_csv(batch: List[Tuple[int, str]], header: List[str]):
+    rows, rejects = [], []
+    # Every record is complete, so one reader over the batch yields exactly one row per record.
+    parsed = csv.reader(io.StringIO("\n".join(text for _, text in batch)))
+    for (line, text), values in zip(batch, parsed):
+        if len(values) != len(header):
+            rejects.append(_reject(line, [f"expected {len(header)} columns, got {len(values)}"], text))
+            continue
+        # Empty cells are missing values, so optional fields get their defaults.
+        rows.append((line, text, {name: value for name, value in zip(header, values) if value != ""}))
+    return rows, rejects
+
+def validate_batch(adapter: TypeAdapter, rows: list):
+    """Validate a batch of parsed rows in one Pydantic call.
+
+    Returns ((line, text, row), validated fields) pairs and rejects. A batch with bad
+    rows is validated a second time without them, so the common all-valid
+    batch costs a single pass.
+    """
+    try:
+        return list(zip(rows, adapter.dump_python(adapter.validate_python([row for _, _, row in rows])))), []
+    except ValidationError as e:
+        errors = defaultdict(list)
+        for error in e.errors(include_url=False):
+            index, *field = error["loc"]
+            errors[index].append(f"{'.'.join(map(str, field)) or 'row'}: {error['msg']}")
+    rejects = [_reject(line, errors[index], text) for index, (line, text, _) in enumerate(rows) if index in errors]
+    good = [row for index, row in enumerate(rows) if index not in errors]
+    if not good:
+        return [], rejects
+    return list(zip(good, adapter.dump_python(adapter.validate_python([row for _, _, row in good])))), rejects
+
+def _row_tuples(model, records: List[dict], dialect: str) -> Tuple[List[str], List[tuple]]:
+    """Column names and the driver's parameter tuples for ``records``, built a column at a time.
+
+    On SQLite the DateTime columns are converted to the text SQLAlchemy
+    stores (pagination.SQLITE_TIMESTAMP_FORMAT: the values are UTC, so the
+    isoformat offset is cut off); everything else, and everything on
+    Postgres, goes to the driver as is.
+    """
+    columns = list(records[0])
+    values = [list(map(itemgetter(column), records)) for column in columns]
+    if dialect == "sqlite":
+        for index, column in enumerate(columns):
+            if isinstance(model.__table__.c[column].type, DateTime):
+                values[index] = [None if value is None else value.isoformat(" ", "microseconds")[:26] for value in values[index]]
+    return columns, list(zip(*values))
+
+async def _load(db: AsyncSession, model, columns: List[str], rows: List[tuple]) -> None:
+    """COPY on Postgres (asyncpg), one executemany INSERT on SQLite (aiosqlite).
+
+    Both go straight to the driver: at import volumes SQLAlchemy's per-row
+    parameter processing costs more than the database's own work. The load
+    joins the session's transaction, so it commits with the batch's samples
+    or not at all.
+    """
+    connection = (await (await db.connection()).get_raw_connection()).driver_connection
+    if db.bind.dialect.name == "postgresql":
+        if not connection.is_in_transaction():
+            # The asyncpg adapter only BEGINs on the first statement; a COPY before it would autocommit.
+            await db.execute(text("SELECT 1"))
+        if not connection.is_in_transaction():
+            raise RuntimeError("COPY must run inside the session's transaction")
+        await connection.copy_records_to_table(
+            model.__tablename__, records=rows, columns=columns,
+        )
+    else:
+        await connection.executemany(
+            f"INSERT INTO {model.__tablename__} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+            rows,
+        )
+
+async def import_rows(
+    db: AsyncSession,
+    model,
+    schema,
+    chunks: AsyncIterator[bytes],
+    fmt: str = "ndjson",
+    on_reject: Optional[Callable[[dict], None]] = None,
+    batch_size: int = IMPORT_BATCH_SIZE,
+) -> dict:
+    """Stream NDJSON or CSV rows into ``model``, validated against ``schema``, a batch at a time.
+
+    Each batch is parsed and validated in a worker thread while the
+    previous one is loaded, committed and version-bumped, so the
+    event loop stays free, memory is bounded by two batches and a failure
+    keeps the batches already committed. CSV needs a header row
+    naming the fields. Bad rows are passed to ``on_reject`` and the first
+    MAX_REPORTED_REJECTS are returned; metrics also get their first sample
+    at ``created_at``.
+    """
+    if fmt not in IMPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(IMPORT_FORMATS)}")
+    adapter = TypeAdapter(List[schema])
+    started = time.perf_counter()
+    imported, rejected, reported = 0, 0, []
+    header = None
+    dialect = db.bind.dialect.name
+
+    def prepare(batch):
+        # CPU only, so it runs in a worker thread while the previous batch is written.
+        if fmt == "csv":
+            rows, rejects = _parse_csv(batch, header)
+        else:
+            rows, rejects = _parse_ndjson(batch)
+        valid, invalid = validate_batch(adapter, rows) if rows else ([], [])
+        now = utcnow()
+        records = [
+            with_rank(model, dict(fields, id=id, created_at=as_utc(fields["created_at"] or now)))
+            for (_, fields), id in zip(valid, new_ids(len(valid)))
+        ]
+        samples = []
+        if model is Metric and records:
+            created = {record["id"]: record["created_at"] for record in records}
+            samples = [dict(sample, recorded_at=created[sample["metric_id"]])
+                       for sample in samples_for((record["id"], record["value"]) for record in records)]
+        columns, rows = _row_tuples(model, records, dialect) if records else ([], [])
+        return columns, rows, samples, sorted(rejects + invalid, key=lambda reject: reject["line"])
+
+    async def write(prepared):
+        nonlocal imported, rejected
+        columns, rows, samples, rejects = prepared
+        if rows:
+            await _load(db, model, columns, rows)
+            if samples:
+                await record_samples(db, samples)
+            await db.commit()
+            await bump_version(model.__tablename__)
+            imported += len(rows)
+        for reject in rejects:
+            rejected += 1
+            if len(reported) < MAX_REPORTED_REJECTS:
+                reported.append(reject)
+            if on_reject:
+                on_reject(reject)
+
+    # One batch is prepared while the one before it is written.
+    preparing = None
+    batch = []
+    async for line, text in _records(chunks, fmt):
+        if not text.strip():
+            continue
+        if fmt == "csv" and header is None:
+            header = next(csv.reader([text]))
+            continue
+        batch.append((line, text))
+        if len(batch) == batch_size:
+            prepared = asyncio.ensure_future(asyncio.to_thread(prepare, batch))
+            if preparing:
+                await write(await preparing)
+            preparing, batch = prepared, []
+    if preparing:
+        await write(await preparing)
+    if batch:
+        await write(await asyncio.to_thread(prepare, batch))
+
+    seconds = time.perf_counter() - started
+    return {"imported": imported, "rejected": rejected, "seconds": round(seconds, 3),
+            "rows_per_second": round((imported + rejected) / seconds) if seconds else None, "rejects": reported}
+
+async def _file_chunks(path: str, size: int = 1 << 20) -> AsyncIterator[bytes]:
+    with (open(path, "rb") if path != "-" else sys.stdin.buffer) as f:
+        while chunk := f.read(size):
+            yield chunk
+
+async def _import_file(args) -> dict:
+    from database import AsyncSessionLocal, get_async_engine, get_engine, init_db
+    from ids import claim_worker_id, release_worker_lease
+
+    model, schema = IMPORTERS[args.entity]
+    init_db()
+    claim_worker_id(get_engine())
+    try:
+        with open(args.rejects, "wb") as rejects:
+            async with AsyncSessionLocal() as db:
+                return await import_rows(
+                    db, model, schema, _file_chunks(args.path), args.format,
+                    on_reject=lambda reject: rejects.write(orjson.dumps(reject) + b"\n"), batch_size=args.batch_size,
+                )
+    finally:
+        release_worker_lease(get_engine())
+        await get_async_engine().dispose()
+
+def main():
+    """Import a file from the command line into the configured database (DATABASE_URL, GCP SQL or SQLite).
+
+        python ingest.py metrics history.csv [--rejects history.rejects.ndjson]
+        zcat priorities.ndjson.gz | python ingest.py priorities - --format ndjson
+    """
+    parser = argparse.ArgumentParser(description="Stream an NDJSON or CSV file into a user entity table")
+    parser.add_argument("entity", choices=list(IMPORTERS))
+    parser.add_argument("path", help="file to import, or - for stdin")
+    parser.add_argument("--format", choices=IMPORT_FORMATS, help="default: from the file extension (.csv or NDJSON)")
+    parser.add_argument("--rejects", help="NDJSON file for rejected rows (default: <path>.rejects.ndjson)")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    args = parser.parse_args()
+    args.format = args.format or ("csv" if args.path.lower().endswith(".csv") else "ndjson")
+    args.rejects = args.rejects or (f"{args.path}.rejects.ndjson" if args.path != "-" else "rejects.ndjson")
+
+    result = asyncio.run(_import_file(args))
+    print(f"✅ Imported {result['imported']} {args.entity} in {result['seconds']:.1f}s "
+          f"({result['rows_per_second']} rows/s)")
+    if result["rejected"]:
+        print(f"⚠️ Rejected {result['rejected']} rows, see {args.rejects}")
+    elif os.path.exists(args.rejects):
+        os.remove(args.rejects)
+
+if __name__ == "__main__":
+    main()
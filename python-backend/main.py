@@ -1,24 +1,49 @@
-from fastapi import FastAPI, HTTPException, Depends, Query
+from fastapi import FastAPI, HTTPException, Depends, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse
 from typing import List, Optional
-import uvicorn
-import time
-from sqlalchemy.orm import Session
-from database import get_db, init_db
+import asyncio
+import os
+from datetime import datetime
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import AsyncSessionLocal, get_async_db, get_async_engine, get_engine, get_replicas, init_db
 from models import Chart, Metric, Priority, Recommendation
+from rollups import NUMERIC_VALUES, record_events, query_chart, query_chart_values, bucket_floor, granularity_for, parse_period, utcnow
+from pagination import paginate
+from ids import new_id, claim_worker_id, keep_worker_lease, release_worker_lease
+from cache import response_cache, row_values
+from etags import PUBLIC_STATIC, bump_version, caching_headers, make_etag, not_modified, table_version
+from bulk import check_batch_size, bulk_create, bulk_update, bulk_delete
+from changes import STREAM_ENTITIES, change_broker
+from samples import (
+    MAX_POINTS, delete_samples, display_value, ensure_sample_partitions, keep_sample_partitions, latest_reading,
+    parse_numeric, query_samples, record_samples, refresh_changes, samples_for,
+)
+from facets import facet_counts, filter_criteria
+from export import EXPORT_MEDIA_TYPES, export_response
+from ingest import IMPORT_FORMATS, import_rows
+from ranking import rank_score, top_ranked, with_rank
+from pooling import pool_settings, pool_status, prewarm_pool
+from replicas import PrimaryAfterWriteMiddleware
+from profiling import ProfilingMiddleware, adopt_metrics, keep_metrics_published, publish_metrics, render_metrics
+from search import search_select, search_terms
+from serialization import JSONResponse, dumps, page_json, response_columns, response_fields, rows_to_items
 from schemas import (
     ChartCreate, ChartUpdate, ChartResponse,
     MetricCreate, MetricUpdate, MetricResponse, 
     PriorityCreate, PriorityUpdate, PriorityResponse,
     RecommendationCreate, RecommendationUpdate, RecommendationResponse,
-    PaginatedResponse
+    ChartImport, MetricImport, PriorityImport, RecommendationImport,
+    MetricSampleCreate, EventCreate, BulkDeleteRequest, PaginatedResponse
 )
 from pydantic import BaseModel
 
 app = FastAPI(
     title="Glanceable API",
     description="FastAPI backend for Glanceable dashboard with GCP SQL database",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=JSONResponse,
 )
 
 # Configure CORS
@@ -41,47 +66,230 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(PrimaryAfterWriteMiddleware)
+app.add_middleware(ProfilingMiddleware)
 
 @app.on_event("startup")
 async def startup_event():
+    engine = get_engine()
     init_db()
+    ensure_sample_partitions(engine)
+    claim_worker_id(engine)
+    app.state.worker_lease_task = asyncio.create_task(keep_worker_lease(engine))
+    app.state.partition_task = asyncio.create_task(keep_sample_partitions(engine))
+    # In the background, so the instance starts serving without waiting for every connection.
+    app.state.prewarm_task = asyncio.create_task(prewarm_connections())
+    app.state.replica_check_task = asyncio.create_task(get_replicas().keep_checked())
+    # With several workers: relay stream changes between them and publish metrics for the others' /metrics.
+    change_broker.start_relay()
+    adopt_metrics()
+    app.state.metrics_publish_task = asyncio.create_task(keep_metrics_published())
+
+async def prewarm_connections():
+    """Open the steady pool so the first requests don't pay connection setup"""
+    prewarm = int(os.getenv("DB_POOL_PREWARM", str(pool_settings()["pool_size"])))
+    opened = await prewarm_pool(get_async_engine(), prewarm)
+    if opened < prewarm:
+        print(f"❌ Pre-warmed {opened}/{prewarm} database connections")
+    elif opened:
+        print(f"✅ Pre-warmed {opened} database connections")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    app.state.prewarm_task.cancel()
+    app.state.replica_check_task.cancel()
+    app.state.worker_lease_task.cancel()
+    app.state.partition_task.cancel()
+    app.state.metrics_publish_task.cancel()
+    change_broker.stop_relay()
+    publish_metrics()
+    release_worker_lease(get_engine())
+    await get_async_engine().dispose()
+    await get_replicas().dispose()
 
 # Health check endpoint
 @app.get("/health")
 async def health_check():
     return {"status": "healthy", "service": "glanceable-api"}
 
+@app.get("/api/stream")
+async def stream_changes(
+    entities: str = Query(",".join(STREAM_ENTITIES)),
+    timeframe: Optional[str] = None,
+    channel: Optional[str] = None,
+    topic: Optional[str] = None
+):
+    """Server-Sent Events feed of metric/priority creates, updates and deletes.
+
+    Events are ``created``/``updated`` (item is the full row), ``deleted`` (item
+    is the id), ``bulk`` (refetch the entity) and ``resync`` (this client fell
+    behind and missed events; refetch everything).
+    """
+    requested = {entity.strip() for entity in entities.split(",") if entity.strip()}
+    unknown = requested - set(STREAM_ENTITIES)
+    if unknown or not requested:
+        raise HTTPException(status_code=400, detail=f"entities must be drawn from {', '.join(STREAM_ENTITIES)}")
+
+    subscriber = change_broker.subscribe(requested, {"timeframe": timeframe, "channel": channel, "topic": topic})
+    if subscriber is None:
+        raise HTTPException(status_code=503, detail="Too many stream subscribers", headers={"Retry-After": "5"})
+    return StreamingResponse(
+        change_broker.stream(subscriber),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/api/stream/stats", response_model=dict)
+async def get_stream_stats():
+    """Subscriber and buffer counters for this worker's change stream (and its relay to the other workers)"""
+    return change_broker.stats()
+
+@app.get("/api/db/pool", response_model=dict)
+async def get_pool_stats():
+    """Connection pool occupancy, checkout wait times and timeouts for this worker, and read replica health"""
+    return {"async": pool_status(get_async_engine()), "sync": pool_status(get_engine()), "settings": pool_settings(),
+            "replicas": get_replicas().status()}
+
+@app.get("/metrics", include_in_schema=False)
+async def get_prometheus_metrics():
+    """Per-route latency, query and serialization metrics summed over every worker, in Prometheus text format"""
+    return Response(render_metrics(), media_type="text/plain; version=0.0.4")
+
+@app.get("/api/cache/stats", response_model=dict)
+async def get_cache_stats():
+    """Response cache hit/miss/invalidation counters for this worker"""
+    return {"backend": type(response_cache.backend).__name__, "ttl": response_cache.ttl, "namespaces": response_cache.snapshot()}
+
 # Chart endpoints
 @app.get("/api/charts", response_model=dict)
 async def get_chart_data(
+    request: Request,
     chartType: str = Query("bar", enum=["bar", "pie"]),
-    numericValue: str = Query("count", enum=["count", "average", "sum", "median"]),
+    numericValue: str = Query("count", enum=["count", "average", "sum", "median", "p90", "p99"]),
     metric: str = Query("revenue", enum=["revenue", "daily_users", "orders", "user_segments", "category"]),
-    period: str = Query("30d")
-):
-    """Generate sample chart data based on parameters"""
-    # Sample data generation logic
-    if chartType == "pie":
-        sample_data = [
-            {"id": "segment1", "label": "Premium", "value": 350},
-            {"id": "segment2", "label": "Regular", "value": 800},
-            {"id": "segment3", "label": "Basic", "value": 450},
-            {"id": "segment4", "label": "Trial", "value": 200}
-        ]
-    else:  # bar chart
-        sample_data = [
-            {"id": "jan", "label": "January", "value": 28000},
-            {"id": "feb", "label": "February", "value": 31000},
-            {"id": "mar", "label": "March", "value": 35000},
-            {"id": "apr", "label": "April", "value": 29000}
-        ]
-    
-    return {"success": True, "data": sample_data}
+    period: str = Query("30d"),
+    channel: Optional[str] = "all",
+    topic: Optional[str] = "all",
+    groupBy: str = Query("channel", enum=["channel", "topic"]),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Aggregate chart data from the metric rollups"""
+    params = {"chartType": chartType, "numericValue": numericValue, "metric": metric, "period": period,
+              "channel": channel, "topic": topic, "groupBy": groupBy}
+
+    try:
+        # The window slides with time, so the current bucket is part of the validator.
+        current_bucket = bucket_floor(utcnow(), granularity_for(parse_period(period)))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # Part of the cache key too, so a lagging read replica cannot refill the cache with pre-write data.
+    params["version"] = await table_version(db, "events")
+    etag = make_etag("chart_data", params, current_bucket)
+    unchanged = not_modified(request, etag)
+    if unchanged:
+        return unchanged
+
+    async def load():
+        try:
+            data = await db.run_sync(lambda session: query_chart(
+                session, metric=metric, numeric_value=numericValue, period=period,
+                chart_type=chartType, channel=channel, topic=topic, group_by=groupBy,
+            ))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return {"success": True, "data": data}
+
+    return JSONResponse(await response_cache.get_or_load("chart_data", params, load), headers=caching_headers(etag))
+
+# Dashboard
+@app.get("/api/dashboard", response_model=dict)
+async def get_dashboard(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    timeframe: Optional[str] = None,
+    channel: Optional[str] = None,
+    topic: Optional[str] = None,
+    chartType: Optional[str] = None,
+    period: str = Query("30d"),
+    limit: int = Query(50, ge=1, le=100)
+):
+    """Every matching chart definition with its computed data in one response.
+
+    Charts sharing a metric and chart type are computed in a single pass for
+    all their numericValues, and the distinct computations run concurrently,
+    each on its own session.
+    """
+    try:
+        current_bucket = bucket_floor(utcnow(), granularity_for(parse_period(period)))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    params = {"timeframe": timeframe, "channel": channel, "topic": topic, "chartType": chartType,
+              "period": period, "limit": limit}
+    events_version = await table_version(db, "events")
+    etag = make_etag("dashboard", await table_version(db, "charts"), events_version, params, current_bucket)
+    unchanged = not_modified(request, etag)
+    if unchanged:
+        return unchanged
+
+    chart_fields = response_fields(ChartResponse)
+    query = select(*response_columns(Chart, chart_fields))
+    if timeframe and timeframe != "all":
+        query = query.where(Chart.timeframe == timeframe)
+    if channel and channel != "all":
+        query = query.where(Chart.channel == channel)
+    if topic and topic != "all":
+        query = query.where(Chart.topic == topic)
+    if chartType and chartType != "all":
+        query = query.where(Chart.chart_type == chartType)
+    charts = (await db.execute(query.order_by(Chart.created_at, Chart.id).limit(limit))).all()
+
+    groups = {}
+    for chart in charts:
+        if chart.numeric_value in NUMERIC_VALUES:
+            groups.setdefault((chart.metric, chart.chart_type), set()).add(chart.numeric_value)
+
+    async def compute(metric, chart_type, numeric_values):
+        async def load():
+            async with AsyncSessionLocal(bind=db.bind) as session:
+                return await session.run_sync(lambda sync_session: query_chart_values(
+                    sync_session, metric, numeric_values, period, chart_type=chart_type,
+                ))
+        group_params = {"metric": metric, "chartType": chart_type, "period": period,
+                        "numericValues": ",".join(numeric_values), "version": events_version}
+        return await response_cache.get_or_load("chart_data", group_params, load)
+
+    keys = list(groups)
+    computed = dict(zip(keys, await asyncio.gather(
+        *(compute(metric, chart_type, sorted(groups[(metric, chart_type)])) for metric, chart_type in keys)
+    )))
+
+    items = rows_to_items(chart_fields, charts)
+    for item in items:
+        values = computed.get((item["metric"], item["chart_type"]), {})
+        item["data"] = values.get(item["numeric_value"], [])
+    return Response(dumps({"success": True, "period": period, "charts": items}), media_type="application/json",
+                    headers=caching_headers(etag))
+
+# Event ingestion
+@app.post("/api/events", response_model=dict)
+async def create_events(
+    events: List[EventCreate],
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Record raw metric events and update the hour/day/month rollups"""
+    recorded = await db.run_sync(lambda session: record_events(session, [event.dict() for event in events]))
+    await db.commit()
+    await bump_version("events")
+    touched = {(event.metric, event.channel, event.topic) for event in events}
+    await response_cache.invalidate("chart_data", [
+        {"metric": metric, "channel": channel, "topic": topic} for metric, channel, topic in touched
+    ])
+    return {"message": "Events recorded successfully", "recorded": recorded}
 
 @app.get("/api/metrics", response_model=dict)
-async def get_system_metrics():
+async def get_system_metrics(request: Request):
     """Get system-level metrics"""
-    return {
+    payload = {
         "metrics": [
             {"id": "1", "title": "Total Revenue", "value": "$45.2K", "change": "+12%", "changeType": "positive"},
             {"id": "2", "title": "Active Users", "value": "2,847", "change": "+5%", "changeType": "positive"},
@@ -89,181 +297,480 @@ async def get_system_metrics():
             {"id": "4", "title": "Avg Order Value", "value": "$127", "change": "-2%", "changeType": "negative"}
         ]
     }
+    etag = make_etag(payload)
+    unchanged = not_modified(request, etag, PUBLIC_STATIC)
+    if unchanged:
+        return unchanged
+    return JSONResponse(payload, headers=caching_headers(etag, PUBLIC_STATIC))
 
 @app.get("/api/priorities", response_model=dict)
-async def get_system_priorities():
+async def get_system_priorities(request: Request):
     """Get system-level priorities"""
-    return {
+    payload = {
         "priorities": [
             {"id": "1", "title": "Review Q4 financials", "deadline": "Today", "status": "in-progress"},
             {"id": "2", "title": "Update team on project status", "deadline": "Dec 15", "status": "pending"}
         ]
     }
+    etag = make_etag(payload)
+    unchanged = not_modified(request, etag, PUBLIC_STATIC)
+    if unchanged:
+        return unchanged
+    return JSONResponse(payload, headers=caching_headers(etag, PUBLIC_STATIC))
 
 @app.get("/api/recommendations", response_model=dict)
-async def get_system_recommendations():
+async def get_system_recommendations(request: Request):
     """Get system-level recommendations"""
-    return {
+    payload = {
         "recommendations": [
             "Optimize checkout flow to reduce cart abandonment",
             "Implement A/B testing for landing page conversion",
             "Add live chat support for customer inquiries"
         ]
     }
+    etag = make_etag(payload)
+    unchanged = not_modified(request, etag, PUBLIC_STATIC)
+    if unchanged:
+        return unchanged
+    return JSONResponse(payload, headers=caching_headers(etag, PUBLIC_STATIC))
 
 # User Charts CRUD
 @app.get("/api/user/charts", response_model=PaginatedResponse[ChartResponse])
 async def get_user_charts(
-    db: Session = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
     timeframe: Optional[str] = None,
     channel: Optional[str] = None,
     topic: Optional[str] = None,
     chartType: Optional[str] = None,
     page: int = Query(1, ge=1),
-    limit: int = Query(10, ge=1, le=100)
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = None,
+    include_total: bool = True,
+    fields: Optional[str] = Query(None, description="Comma-separated response fields (id is always included)")
 ):
-    query = db.query(Chart)
-    
-    if timeframe and timeframe != "all":
-        query = query.filter(Chart.timeframe == timeframe)
-    if channel and channel != "all":
-        query = query.filter(Chart.channel == channel)
-    if topic and topic != "all":
-        query = query.filter(Chart.topic == topic)
-    if chartType and chartType != "all":
-        query = query.filter(Chart.chart_type == chartType)
-    
-    total = query.count()
-    charts = query.offset((page - 1) * limit).limit(limit).all()
-    
-    return PaginatedResponse(
-        items=charts,
-        total=total,
-        page=page,
-        limit=limit,
-        total_pages=(total + limit - 1) // limit
-    )
+    selected = response_fields(ChartResponse, fields)
+    params = {"timeframe": timeframe, "channel": channel, "topic": topic, "chartType": chartType,
+              "page": page, "limit": limit, "cursor": cursor, "include_total": include_total,
+              "fields": ",".join(selected) if fields else None}
+
+    params["version"] = await table_version(db, "charts")
+    etag = make_etag("charts", params)
+    unchanged = not_modified(request, etag)
+    if unchanged:
+        return unchanged
+
+    async def load():
+        query = select(*response_columns(Chart, selected))
+
+        if timeframe and timeframe != "all":
+            query = query.where(Chart.timeframe == timeframe)
+        if channel and channel != "all":
+            query = query.where(Chart.channel == channel)
+        if topic and topic != "all":
+            query = query.where(Chart.topic == topic)
+        if chartType and chartType != "all":
+            query = query.where(Chart.chart_type == chartType)
+
+        page_data = await paginate(db, query, Chart, page, limit, cursor, include_total)
+        return page_json(page_data, selected)
+
+    return Response(await response_cache.get_or_load_bytes("charts", params, load), media_type="application/json",
+                    headers=caching_headers(etag))
+
+@app.get("/api/user/charts/facets", response_model=dict)
+async def get_user_chart_facets(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    timeframe: Optional[str] = None,
+    channel: Optional[str] = None,
+    topic: Optional[str] = None,
+    chartType: Optional[str] = None
+):
+    """Counts per value of every chart filter, narrowed by the filters given, in one query"""
+    params = {"timeframe": timeframe, "channel": channel, "topic": topic, "chartType": chartType}
+
+    params["version"] = await table_version(db, "charts")
+    etag = make_etag("charts", "facets", params)
+    unchanged = not_modified(request, etag)
+    if unchanged:
+        return unchanged
+
+    async def load():
+        return dumps(await facet_counts(db, Chart, "charts", params))
+
+    return Response(await response_cache.get_or_load_bytes("charts", {**params, "facets": True}, load),
+                    media_type="application/json", headers=caching_headers(etag))
+
+@app.get("/api/user/charts/export")
+async def export_user_charts(
+    db: AsyncSession = Depends(get_async_db),
+    timeframe: Optional[str] = None,
+    channel: Optional[str] = None,
+    topic: Optional[str] = None,
+    chartType: Optional[str] = None,
+    format: str = Query("ndjson", enum=list(EXPORT_MEDIA_TYPES)),
+    fields: Optional[str] = Query(None, description="Comma-separated response fields (id is always included)")
+):
+    """Every matching chart, streamed as NDJSON, CSV, an Arrow IPC stream or Parquet (no paging)"""
+    selected = response_fields(ChartResponse, fields)
+    params = {"timeframe": timeframe, "channel": channel, "topic": topic, "chartType": chartType}
+    query = select(*response_columns(Chart, selected)).where(*filter_criteria(Chart, "charts", params))
+    return export_response(db, Chart, query, selected, format)
 
 @app.post("/api/user/charts", response_model=dict)
 async def create_user_chart(
     chart: ChartCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     chart_data = chart.dict()
-    chart_data["id"] = str(int(time.time() * 1000))  # Generate timestamp-based ID
+    chart_data["id"] = new_id()
     db_chart = Chart(**chart_data)
     db.add(db_chart)
-    db.commit()
-    db.refresh(db_chart)
+    await db.commit()
+    await bump_version("charts")
+    await db.refresh(db_chart)
+    await response_cache.invalidate("charts", [row_values(db_chart)])
     return {"message": "Chart created successfully", "chart": {"id": db_chart.id, "title": db_chart.title, "chart_type": db_chart.chart_type, "numeric_value": db_chart.numeric_value, "metric": db_chart.metric}}
 
 @app.put("/api/user/charts", response_model=dict)
 async def update_user_chart(
     chart: ChartUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    db_chart = db.query(Chart).filter(Chart.id == chart.id).first()
+    db_chart = await db.get(Chart, chart.id)
     if not db_chart:
         raise HTTPException(status_code=404, detail="Chart not found")
     
+    before = row_values(db_chart)
     for field, value in chart.dict(exclude_unset=True).items():
         if field != "id":
             setattr(db_chart, field, value)
     
-    db.commit()
-    db.refresh(db_chart)
+    await db.commit()
+    await bump_version("charts")
+    await db.refresh(db_chart)
+    await response_cache.invalidate("charts", [before, row_values(db_chart)])
     return {"message": "Chart updated successfully", "chart": {"id": db_chart.id, "title": db_chart.title, "chart_type": db_chart.chart_type, "numeric_value": db_chart.numeric_value, "metric": db_chart.metric}}
 
 @app.delete("/api/user/charts")
 async def delete_user_chart(
     id: str = Query(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    db_chart = db.query(Chart).filter(Chart.id == id).first()
+    db_chart = await db.get(Chart, id)
     if not db_chart:
         raise HTTPException(status_code=404, detail="Chart not found")
     
-    db.delete(db_chart)
-    db.commit()
+    await db.delete(db_chart)
+    await db.commit()
+    await bump_version("charts")
+    await response_cache.invalidate("charts", [row_values(db_chart)])
     return {"message": "Chart deleted successfully", "chart": {"id": db_chart.id, "title": db_chart.title}}
 
+@app.post("/api/user/charts/bulk", response_model=dict)
+async def bulk_create_user_charts(
+    charts: List[ChartCreate],
+    db: AsyncSession = Depends(get_async_db)
+):
+    check_batch_size(charts)
+    results = await bulk_create(db, Chart, [chart.dict() for chart in charts])
+    await db.commit()
+    await bump_version("charts")
+    await response_cache.invalidate("charts")
+    return {"message": "Charts created successfully", "created": len(results), "results": results}
+
+@app.put("/api/user/charts/bulk", response_model=dict)
+async def bulk_update_user_charts(
+    charts: List[ChartUpdate],
+    db: AsyncSession = Depends(get_async_db)
+):
+    check_batch_size(charts)
+    results = await bulk_update(db, Chart, [chart.dict(exclude_unset=True) for chart in charts])
+    await db.commit()
+    await bump_version("charts")
+    await response_cache.invalidate("charts")
+    updated = sum(1 for result in results if result["status"] == "updated")
+    return {"message": "Charts updated successfully", "updated": updated, "results": results}
+
+@app.delete("/api/user/charts/bulk", response_model=dict)
+async def bulk_delete_user_charts(
+    request: BulkDeleteRequest,
+    db: AsyncSession = Depends(get_async_db)
+):
+    check_batch_size(request.ids)
+    results = await bulk_delete(db, Chart, request.ids)
+    await db.commit()
+    await bump_version("charts")
+    await response_cache.invalidate("charts")
+    deleted = sum(1 for result in results if result["status"] == "deleted")
+    return {"message": "Charts deleted successfully", "deleted": deleted, "results": results}
+
+@app.post("/api/user/charts/import", response_model=dict)
+async def import_user_charts(
+    request: Request,
+    format: str = Query("ndjson", enum=list(IMPORT_FORMATS)),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Load charts from an NDJSON or CSV request body, streamed and committed in batches; bad rows are reported, not loaded"""
+    result = await import_rows(db, Chart, ChartImport, request.stream(), format)
+    await response_cache.invalidate("charts")
+    return {"message": "Charts imported", **result}
+
 # User Metrics CRUD
 @app.get("/api/user/metrics", response_model=PaginatedResponse[MetricResponse])
 async def get_user_metrics(
-    db: Session = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
     timeframe: Optional[str] = None,
     channel: Optional[str] = None,
     topic: Optional[str] = None,
     page: int = Query(1, ge=1),
-    limit: int = Query(10, ge=1, le=100)
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = None,
+    include_total: bool = True,
+    fields: Optional[str] = Query(None, description="Comma-separated response fields (id is always included)")
 ):
-    query = db.query(Metric)
-    
-    if timeframe and timeframe != "all":
-        query = query.filter(Metric.timeframe == timeframe)
-    if channel and channel != "all":
-        query = query.filter(Metric.channel == channel)
-    if topic and topic != "all":
-        query = query.filter(Metric.topic == topic)
-    
-    total = query.count()
-    metrics = query.offset((page - 1) * limit).limit(limit).all()
-    
-    return PaginatedResponse(
-        items=metrics,
-        total=total,
-        page=page,
-        limit=limit,
-        total_pages=(total + limit - 1) // limit
-    )
+    selected = response_fields(MetricResponse, fields)
+    params = {"timeframe": timeframe, "channel": channel, "topic": topic,
+              "page": page, "limit": limit, "cursor": cursor, "include_total": include_total,
+              "fields": ",".join(selected) if fields else None}
+
+    params["version"] = await table_version(db, "metrics")
+    etag = make_etag("metrics", params)
+    unchanged = not_modified(request, etag)
+    if unchanged:
+        return unchanged
+
+    async def load():
+        query = select(*response_columns(Metric, selected))
+
+        if timeframe and timeframe != "all":
+            query = query.where(Metric.timeframe == timeframe)
+        if channel and channel != "all":
+            query = query.where(Metric.channel == channel)
+        if topic and topic != "all":
+            query = query.where(Metric.topic == topic)
+
+        page_data = await paginate(db, query, Metric, page, limit, cursor, include_total)
+        return page_json(page_data, selected)
+
+    return Response(await response_cache.get_or_load_bytes("metrics", params, load), media_type="application/json",
+                    headers=caching_headers(etag))
+
+@app.get("/api/user/metrics/facets", response_model=dict)
+async def get_user_metric_facets(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    timeframe: Optional[str] = None,
+    channel: Optional[str] = None,
+    topic: Optional[str] = None
+):
+    """Counts per value of every metric filter, narrowed by the filters given, in one query"""
+    params = {"timeframe": timeframe, "channel": channel, "topic": topic}
+
+    params["version"] = await table_version(db, "metrics")
+    etag = make_etag("metrics", "facets", params)
+    unchanged = not_modified(request, etag)
+    if unchanged:
+        return unchanged
+
+    async def load():
+        return dumps(await facet_counts(db, Metric, "metrics", params))
+
+    return Response(await response_cache.get_or_load_bytes("metrics", {**params, "facets": True}, load),
+                    media_type="application/json", headers=caching_headers(etag))
+
+@app.get("/api/user/metrics/export")
+async def export_user_metrics(
+    db: AsyncSession = Depends(get_async_db),
+    timeframe: Optional[str] = None,
+    channel: Optional[str] = None,
+    topic: Optional[str] = None,
+    format: str = Query("ndjson", enum=list(EXPORT_MEDIA_TYPES)),
+    fields: Optional[str] = Query(None, description="Comma-separated response fields (id is always included)")
+):
+    """Every matching metric, streamed as NDJSON, CSV, an Arrow IPC stream or Parquet (no paging)"""
+    selected = response_fields(MetricResponse, fields)
+    params = {"timeframe": timeframe, "channel": channel, "topic": topic}
+    query = select(*response_columns(Metric, selected)).where(*filter_criteria(Metric, "metrics", params))
+    return export_response(db, Metric, query, selected, format)
 
 @app.post("/api/user/metrics", response_model=dict)
 async def create_user_metric(
     metric: MetricCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     metric_data = metric.dict()
-    metric_data["id"] = str(int(time.time() * 1000))
+    metric_data["id"] = new_id()
     db_metric = Metric(**metric_data)
     db.add(db_metric)
-    db.commit()
-    db.refresh(db_metric)
+    await record_samples(db, samples_for([(db_metric.id, db_metric.value)]))
+    await db.commit()
+    await bump_version("metrics")
+    await db.refresh(db_metric)
+    await response_cache.invalidate("metrics", [row_values(db_metric)])
+    change_broker.publish("metrics", "created", MetricResponse.model_validate(db_metric).model_dump(mode="json"), [row_values(db_metric)])
     return {"message": "Metric created successfully", "metric": {"id": db_metric.id, "title": db_metric.title, "value": db_metric.value, "change": db_metric.change, "change_type": db_metric.change_type}}
 
 @app.put("/api/user/metrics", response_model=dict)
 async def update_user_metric(
     metric: MetricUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    db_metric = db.query(Metric).filter(Metric.id == metric.id).first()
+    db_metric = await db.get(Metric, metric.id)
     if not db_metric:
         raise HTTPException(status_code=404, detail="Metric not found")
     
-    for field, value in metric.dict(exclude_unset=True).items():
+    before = row_values(db_metric)
+    updates = metric.dict(exclude_unset=True)
+    for field, value in updates.items():
         if field != "id":
             setattr(db_metric, field, value)
+
+    if "value" in updates:
+        await record_samples(db, samples_for([(db_metric.id, db_metric.value)]))
+    if "value" in updates or "timeframe" in updates:
+        await db.flush()
+        await refresh_changes(db, [db_metric.id])
     
-    db.commit()
-    db.refresh(db_metric)
+    await db.commit()
+    await bump_version("metrics")
+    await db.refresh(db_metric)
+    await response_cache.invalidate("metrics", [before, row_values(db_metric)])
+    change_broker.publish("metrics", "updated", MetricResponse.model_validate(db_metric).model_dump(mode="json"), [before, row_values(db_metric)])
     return {"message": "Metric updated successfully", "metric": {"id": db_metric.id, "title": db_metric.title, "value": db_metric.value, "change": db_metric.change, "change_type": db_metric.change_type}}
 
 @app.delete("/api/user/metrics")
 async def delete_user_metric(
     id: str = Query(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    db_metric = db.query(Metric).filter(Metric.id == id).first()
+    db_metric = await db.get(Metric, id)
     if not db_metric:
         raise HTTPException(status_code=404, detail="Metric not found")
     
-    db.delete(db_metric)
-    db.commit()
+    await db.delete(db_metric)
+    await delete_samples(db, [db_metric.id])
+    await db.commit()
+    await bump_version("metrics")
+    await response_cache.invalidate("metrics", [row_values(db_metric)])
+    change_broker.publish("metrics", "deleted", {"id": db_metric.id}, [row_values(db_metric)])
     return {"message": "Metric deleted successfully", "metric": {"id": db_metric.id, "title": db_metric.title}}
 
+@app.get("/api/user/metrics/{metric_id}/samples", response_model=dict)
+async def get_metric_samples(
+    metric_id: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    period: str = Query("30d"),
+    points: int = Query(100, ge=1, le=MAX_POINTS),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """A metric's history over [start, end), downsampled to at most ``points`` min/max/avg buckets"""
+    if not await db.get(Metric, metric_id):
+        raise HTTPException(status_code=404, detail="Metric not found")
+    end = end or utcnow()
+    try:
+        start = start or end - parse_period(period)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    return await query_samples(db, metric_id, start, end, points)
+
+@app.post("/api/user/metrics/{metric_id}/samples", response_model=dict)
+async def create_metric_samples(
+    metric_id: str,
+    samples: List[MetricSampleCreate],
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Append readings to a metric's history; its value becomes the latest reading and its change is recomputed"""
+    check_batch_size(samples)
+    db_metric = await db.get(Metric, metric_id)
+    if not db_metric:
+        raise HTTPException(status_code=404, detail="Metric not found")
+
+    before = row_values(db_metric)
+    await record_samples(db, [{"metric_id": metric_id, **sample.dict()} for sample in samples])
+    # Backfilled readings can be older than the latest one, so it is read back rather than taken from the request.
+    latest = await latest_reading(db, metric_id)
+    if latest is not None and parse_numeric(db_metric.value) != latest:
+        db_metric.value = display_value(latest, db_metric.value)
+    await refresh_changes(db, [metric_id])
+    await db.commit()
+    await bump_version("metrics")
+    await db.refresh(db_metric)
+    await response_cache.invalidate("metrics", [before, row_values(db_metric)])
+    change_broker.publish("metrics", "updated", MetricResponse.model_validate(db_metric).model_dump(mode="json"), [before, row_values(db_metric)])
+    return {"message": "Samples recorded successfully", "recorded": len(samples), "metric": {"id": db_metric.id, "title": db_metric.title, "value": db_metric.value, "change": db_metric.change, "change_type": db_metric.change_type}}
+
+@app.post("/api/user/metrics/bulk", response_model=dict)
+async def bulk_create_user_metrics(
+    metrics: List[MetricCreate],
+    db: AsyncSession = Depends(get_async_db)
+):
+    check_batch_size(metrics)
+    results = await bulk_create(db, Metric, [metric.dict() for metric in metrics])
+    await record_samples(db, samples_for((result["id"], metric.value) for result, metric in zip(results, metrics)))
+    await db.commit()
+    await bump_version("metrics")
+    await response_cache.invalidate("metrics")
+    change_broker.publish("metrics", "bulk")
+    return {"message": "Metrics created successfully", "created": len(results), "results": results}
+
+@app.put("/api/user/metrics/bulk", response_model=dict)
+async def bulk_update_user_metrics(
+    metrics: List[MetricUpdate],
+    db: AsyncSession = Depends(get_async_db)
+):
+    check_batch_size(metrics)
+    items = [metric.dict(exclude_unset=True) for metric in metrics]
+    results = await bulk_update(db, Metric, items)
+    changed = [(result["id"], item) for result, item in zip(results, items) if result["status"] == "updated"]
+    samples = samples_for((id, item["value"]) for id, item in changed if "value" in item)
+    await record_samples(db, samples)
+    # Only a new reading or a different timeframe window moves `change`.
+    await refresh_changes(db, list({sample["metric_id"] for sample in samples} | {id for id, item in changed if "timeframe" in item}))
+    await db.commit()
+    await bump_version("metrics")
+    await response_cache.invalidate("metrics")
+    change_broker.publish("metrics", "bulk")
+    updated = sum(1 for result in results if result["status"] == "updated")
+    return {"message": "Metrics updated successfully", "updated": updated, "results": results}
+
+@app.delete("/api/user/metrics/bulk", response_model=dict)
+async def bulk_delete_user_metrics(
+    request: BulkDeleteRequest,
+    db: AsyncSession = Depends(get_async_db)
+):
+    check_batch_size(request.ids)
+    results = await bulk_delete(db, Metric, request.ids)
+    await delete_samples(db, request.ids)
+    await db.commit()
+    await bump_version("metrics")
+    await response_cache.invalidate("metrics")
+    change_broker.publish("metrics", "bulk")
+    deleted = sum(1 for result in results if result["status"] == "deleted")
+    return {"message": "Metrics deleted successfully", "deleted": deleted, "results": results}
+
+@app.post("/api/user/metrics/import", response_model=dict)
+async def import_user_metrics(
+    request: Request,
+    format: str = Query("ndjson", enum=list(IMPORT_FORMATS)),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Load metrics from an NDJSON or CSV request body, streamed and committed in batches; bad rows are reported, not loaded"""
+    result = await import_rows(db, Metric, MetricImport, request.stream(), format)
+    await response_cache.invalidate("metrics")
+    change_broker.publish("metrics", "bulk")
+    return {"message": "Metrics imported", **result}
+
 # User Priorities CRUD
 @app.get("/api/user/priorities", response_model=PaginatedResponse[PriorityResponse])
 async def get_user_priorities(
-    db: Session = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
     timeframe: Optional[str] = None,
     channel: Optional[str] = None,
     topic: Optional[str] = None,
@@ -271,81 +778,247 @@ async def get_user_priorities(
     priority: Optional[str] = None,
     impact: Optional[str] = None,
     page: int = Query(1, ge=1),
-    limit: int = Query(10, ge=1, le=100)
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = None,
+    include_total: bool = True,
+    fields: Optional[str] = Query(None, description="Comma-separated response fields (id is always included)"),
+    top: Optional[int] = Query(None, ge=1, le=100, description="Only the N highest-ranked rows, best first (no paging or total)")
 ):
-    query = db.query(Priority)
-    
-    if timeframe and timeframe != "all":
-        query = query.filter(Priority.timeframe == timeframe)
-    if channel and channel != "all":
-        query = query.filter(Priority.channel == channel)
-    if topic and topic != "all":
-        query = query.filter(Priority.topic == topic)
-    if status and status != "all":
-        query = query.filter(Priority.status == status)
-    if priority and priority != "all":
-        query = query.filter(Priority.priority == priority)
-    if impact and impact != "all":
-        query = query.filter(Priority.impact == impact)
-    
-    total = query.count()
-    priorities = query.offset((page - 1) * limit).limit(limit).all()
-    
-    return PaginatedResponse(
-        items=priorities,
-        total=total,
-        page=page,
-        limit=limit,
-        total_pages=(total + limit - 1) // limit
-    )
+    selected = response_fields(PriorityResponse, fields)
+    params = {"timeframe": timeframe, "channel": channel, "topic": topic,
+              "status": status, "priority": priority, "impact": impact,
+              "page": page, "limit": limit, "cursor": cursor, "include_total": include_total,
+              "fields": ",".join(selected) if fields else None, "top": top}
+
+    params["version"] = await table_version(db, "priorities")
+    etag = make_etag("priorities", params)
+    unchanged = not_modified(request, etag)
+    if unchanged:
+        return unchanged
+
+    async def load():
+        query = select(*response_columns(Priority, selected))
+
+        if timeframe and timeframe != "all":
+            query = query.where(Priority.timeframe == timeframe)
+        if channel and channel != "all":
+            query = query.where(Priority.channel == channel)
+        if topic and topic != "all":
+            query = query.where(Priority.topic == topic)
+        if status and status != "all":
+            query = query.where(Priority.status == status)
+        if priority and priority != "all":
+            query = query.where(Priority.priority == priority)
+        if impact and impact != "all":
+            query = query.where(Priority.impact == impact)
+
+        if top:
+            return page_json(await top_ranked(db, query, Priority, top), selected)
+        page_data = await paginate(db, query, Priority, page, limit, cursor, include_total)
+        return page_json(page_data, selected)
+
+    return Response(await response_cache.get_or_load_bytes("priorities", params, load), media_type="application/json",
+                    headers=caching_headers(etag))
+
+@app.get("/api/user/priorities/facets", response_model=dict)
+async def get_user_priority_facets(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    timeframe: Optional[str] = None,
+    channel: Optional[str] = None,
+    topic: Optional[str] = None,
+    status: Optional[str] = None,
+    priority: Optional[str] = None,
+    impact: Optional[str] = None
+):
+    """Counts per value of every priority filter, narrowed by the filters given, in one query"""
+    params = {"timeframe": timeframe, "channel": channel, "topic": topic,
+              "status": status, "priority": priority, "impact": impact}
+
+    params["version"] = await table_version(db, "priorities")
+    etag = make_etag("priorities", "facets", params)
+    unchanged = not_modified(request, etag)
+    if unchanged:
+        return unchanged
+
+    async def load():
+        return dumps(await facet_counts(db, Priority, "priorities", params))
+
+    return Response(await response_cache.get_or_load_bytes("priorities", {**params, "facets": True}, load),
+                    media_type="application/json", headers=caching_headers(etag))
+
+@app.get("/api/user/priorities/export")
+async def export_user_priorities(
+    db: AsyncSession = Depends(get_async_db),
+    timeframe: Optional[str] = None,
+    channel: Optional[str] = None,
+    topic: Optional[str] = None,
+    status: Optional[str] = None,
+    priority: Optional[str] = None,
+    impact: Optional[str] = None,
+    format: str = Query("ndjson", enum=list(EXPORT_MEDIA_TYPES)),
+    fields: Optional[str] = Query(None, description="Comma-separated response fields (id is always included)")
+):
+    """Every matching priority, streamed as NDJSON, CSV, an Arrow IPC stream or Parquet (no paging)"""
+    selected = response_fields(PriorityResponse, fields)
+    params = {"timeframe": timeframe, "channel": channel, "topic": topic, "status": status, "priority": priority, "impact": impact}
+    query = select(*response_columns(Priority, selected)).where(*filter_criteria(Priority, "priorities", params))
+    return export_response(db, Priority, query, selected, format)
+
+@app.get("/api/user/priorities/search", response_model=dict)
+async def search_user_priorities(
+    request: Request,
+    q: str = Query(..., min_length=1),
+    db: AsyncSession = Depends(get_async_db),
+    timeframe: Optional[str] = None,
+    channel: Optional[str] = None,
+    topic: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    fields: Optional[str] = Query(None, description="Comma-separated response fields (id is always included)")
+):
+    """Ranked full-text search over priority titles and descriptions; every word matches as a prefix"""
+    terms = search_terms(q)
+    selected = response_fields(PriorityResponse, fields)
+    params = {"search": " ".join(terms), "timeframe": timeframe, "channel": channel, "topic": topic,
+              "limit": limit, "fields": ",".join(selected) if fields else None}
+
+    params["version"] = await table_version(db, "priorities")
+    etag = make_etag("priorities", params)
+    unchanged = not_modified(request, etag)
+    if unchanged:
+        return unchanged
+
+    async def load():
+        query = search_select(db.bind.dialect.name, Priority, response_columns(Priority, selected), terms)
+
+        if timeframe and timeframe != "all":
+            query = query.where(Priority.timeframe == timeframe)
+        if channel and channel != "all":
+            query = query.where(Priority.channel == channel)
+        if topic and topic != "all":
+            query = query.where(Priority.topic == topic)
+
+        rows = (await db.execute(query.limit(limit))).all()
+        items = rows_to_items(selected, rows)
+        for item, row in zip(items, rows):
+            item["score"] = row.score
+        return dumps({"items": items, "query": q})
+
+    return Response(await response_cache.get_or_load_bytes("priorities", params, load), media_type="application/json",
+                    headers=caching_headers(etag))
 
 @app.post("/api/user/priorities", response_model=dict)
 async def create_user_priority(
     priority: PriorityCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     priority_data = priority.dict()
-    priority_data["id"] = str(int(time.time() * 1000))
-    db_priority = Priority(**priority_data)
+    priority_data["id"] = new_id()
+    db_priority = Priority(**with_rank(Priority, priority_data))
     db.add(db_priority)
-    db.commit()
-    db.refresh(db_priority)
+    await db.commit()
+    await bump_version("priorities")
+    await db.refresh(db_priority)
+    await response_cache.invalidate("priorities", [row_values(db_priority)])
+    change_broker.publish("priorities", "created", PriorityResponse.model_validate(db_priority).model_dump(mode="json"), [row_values(db_priority)])
     return {"message": "Priority created successfully", "priority": {"id": db_priority.id, "title": db_priority.title, "priority": db_priority.priority, "impact": db_priority.impact, "status": db_priority.status}}
 
 @app.put("/api/user/priorities", response_model=dict)
 async def update_user_priority(
     priority: PriorityUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    db_priority = db.query(Priority).filter(Priority.id == priority.id).first()
+    db_priority = await db.get(Priority, priority.id)
     if not db_priority:
         raise HTTPException(status_code=404, detail="Priority not found")
     
+    before = row_values(db_priority)
     for field, value in priority.dict(exclude_unset=True).items():
         if field != "id":
             setattr(db_priority, field, value)
+    db_priority.rank_score = rank_score(Priority, row_values(db_priority))
     
-    db.commit()
-    db.refresh(db_priority)
+    await db.commit()
+    await bump_version("priorities")
+    await db.refresh(db_priority)
+    await response_cache.invalidate("priorities", [before, row_values(db_priority)])
+    change_broker.publish("priorities", "updated", PriorityResponse.model_validate(db_priority).model_dump(mode="json"), [before, row_values(db_priority)])
     return {"message": "Priority updated successfully", "priority": {"id": db_priority.id, "title": db_priority.title, "priority": db_priority.priority, "impact": db_priority.impact, "status": db_priority.status}}
 
 @app.delete("/api/user/priorities")
 async def delete_user_priority(
     id: str = Query(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    db_priority = db.query(Priority).filter(Priority.id == id).first()
+    db_priority = await db.get(Priority, id)
     if not db_priority:
         raise HTTPException(status_code=404, detail="Priority not found")
     
-    db.delete(db_priority)
-    db.commit()
+    await db.delete(db_priority)
+    await db.commit()
+    await bump_version("priorities")
+    await response_cache.invalidate("priorities", [row_values(db_priority)])
+    change_broker.publish("priorities", "deleted", {"id": db_priority.id}, [row_values(db_priority)])
     return {"message": "Priority deleted successfully", "priority": {"id": db_priority.id, "title": db_priority.title}}
 
+@app.post("/api/user/priorities/bulk", response_model=dict)
+async def bulk_create_user_priorities(
+    priorities: List[PriorityCreate],
+    db: AsyncSession = Depends(get_async_db)
+):
+    check_batch_size(priorities)
+    results = await bulk_create(db, Priority, [priority.dict() for priority in priorities])
+    await db.commit()
+    await bump_version("priorities")
+    await response_cache.invalidate("priorities")
+    change_broker.publish("priorities", "bulk")
+    return {"message": "Priorities created successfully", "created": len(results), "results": results}
+
+@app.put("/api/user/priorities/bulk", response_model=dict)
+async def bulk_update_user_priorities(
+    priorities: List[PriorityUpdate],
+    db: AsyncSession = Depends(get_async_db)
+):
+    check_batch_size(priorities)
+    results = await bulk_update(db, Priority, [priority.dict(exclude_unset=True) for priority in priorities])
+    await db.commit()
+    await bump_version("priorities")
+    await response_cache.invalidate("priorities")
+    change_broker.publish("priorities", "bulk")
+    updated = sum(1 for result in results if result["status"] == "updated")
+    return {"message": "Priorities updated successfully", "updated": updated, "results": results}
+
+@app.delete("/api/user/priorities/bulk", response_model=dict)
+async def bulk_delete_user_priorities(
+    request: BulkDeleteRequest,
+    db: AsyncSession = Depends(get_async_db)
+):
+    check_batch_size(request.ids)
+    results = await bulk_delete(db, Priority, request.ids)
+    await db.commit()
+    await bump_version("priorities")
+    await response_cache.invalidate("priorities")
+    change_broker.publish("priorities", "bulk")
+    deleted = sum(1 for result in results if result["status"] == "deleted")
+    return {"message": "Priorities deleted successfully", "deleted": deleted, "results": results}
+
+@app.post("/api/user/priorities/import", response_model=dict)
+async def import_user_priorities(
+    request: Request,
+    format: str = Query("ndjson", enum=list(IMPORT_FORMATS)),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Load priorities from an NDJSON or CSV request body, streamed and committed in batches; bad rows are reported, not loaded"""
+    result = await import_rows(db, Priority, PriorityImport, request.stream(), format)
+    await response_cache.invalidate("priorities")
+    change_broker.publish("priorities", "bulk")
+    return {"message": "Priorities imported", **result}
+
 # User Recommendations CRUD
 @app.get("/api/user/recommendations", response_model=PaginatedResponse[RecommendationResponse])
 async def get_user_recommendations(
-    db: Session = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
     timeframe: Optional[str] = None,
     channel: Optional[str] = None,
     topic: Optional[str] = None,
@@ -354,80 +1027,240 @@ async def get_user_recommendations(
     category: Optional[str] = None,
     implemented: Optional[bool] = None,
     page: int = Query(1, ge=1),
-    limit: int = Query(10, ge=1, le=100)
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = None,
+    include_total: bool = True,
+    fields: Optional[str] = Query(None, description="Comma-separated response fields (id is always included)"),
+    top: Optional[int] = Query(None, ge=1, le=100, description="Only the N highest-ranked rows, best first (no paging or total)")
 ):
-    query = db.query(Recommendation)
-    
-    if timeframe and timeframe != "all":
-        query = query.filter(Recommendation.timeframe == timeframe)
-    if channel and channel != "all":
-        query = query.filter(Recommendation.channel == channel)
-    if topic and topic != "all":
-        query = query.filter(Recommendation.topic == topic)
-    if urgency and urgency != "all":
-        query = query.filter(Recommendation.urgency == urgency)
-    if impact and impact != "all":
-        query = query.filter(Recommendation.impact == impact)
-    if category and category != "all":
-        query = query.filter(Recommendation.category == category)
-    if implemented is not None:
-        query = query.filter(Recommendation.implemented == implemented)
-    
-    total = query.count()
-    recommendations = query.offset((page - 1) * limit).limit(limit).all()
-    
-    return PaginatedResponse(
-        items=recommendations,
-        total=total,
-        page=page,
-        limit=limit,
-        total_pages=(total + limit - 1) // limit
-    )
+    selected = response_fields(RecommendationResponse, fields)
+    params = {"timeframe": timeframe, "channel": channel, "topic": topic,
+              "urgency": urgency, "impact": impact, "category": category, "implemented": implemented,
+              "page": page, "limit": limit, "cursor": cursor, "include_total": include_total,
+              "fields": ",".join(selected) if fields else None, "top": top}
+
+    params["version"] = await table_version(db, "recommendations")
+    etag = make_etag("recommendations", params)
+    unchanged = not_modified(request, etag)
+    if unchanged:
+        return unchanged
+
+    async def load():
+        query = select(*response_columns(Recommendation, selected))
+
+        if timeframe and timeframe != "all":
+            query = query.where(Recommendation.timeframe == timeframe)
+        if channel and channel != "all":
+            query = query.where(Recommendation.channel == channel)
+        if topic and topic != "all":
+            query = query.where(Recommendation.topic == topic)
+        if urgency and urgency != "all":
+            query = query.where(Recommendation.urgency == urgency)
+        if impact and impact != "all":
+            query = query.where(Recommendation.impact == impact)
+        if category and category != "all":
+            query = query.where(Recommendation.category == category)
+        if implemented is not None:
+            query = query.where(Recommendation.implemented == implemented)
+
+        if top:
+            return page_json(await top_ranked(db, query, Recommendation, top), selected)
+        page_data = await paginate(db, query, Recommendation, page, limit, cursor, include_total)
+        return page_json(page_data, selected)
+
+    return Response(await response_cache.get_or_load_bytes("recommendations", params, load), media_type="application/json",
+                    headers=caching_headers(etag))
+
+@app.get("/api/user/recommendations/facets", response_model=dict)
+async def get_user_recommendation_facets(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    timeframe: Optional[str] = None,
+    channel: Optional[str] = None,
+    topic: Optional[str] = None,
+    urgency: Optional[str] = None,
+    impact: Optional[str] = None,
+    category: Optional[str] = None,
+    implemented: Optional[bool] = None
+):
+    """Counts per value of every recommendation filter, narrowed by the filters given, in one query"""
+    params = {"timeframe": timeframe, "channel": channel, "topic": topic, "urgency": urgency,
+              "impact": impact, "category": category, "implemented": implemented}
+
+    params["version"] = await table_version(db, "recommendations")
+    etag = make_etag("recommendations", "facets", params)
+    unchanged = not_modified(request, etag)
+    if unchanged:
+        return unchanged
+
+    async def load():
+        return dumps(await facet_counts(db, Recommendation, "recommendations", params))
+
+    return Response(await response_cache.get_or_load_bytes("recommendations", {**params, "facets": True}, load),
+                    media_type="application/json", headers=caching_headers(etag))
+
+@app.get("/api/user/recommendations/export")
+async def export_user_recommendations(
+    db: AsyncSession = Depends(get_async_db),
+    timeframe: Optional[str] = None,
+    channel: Optional[str] = None,
+    topic: Optional[str] = None,
+    urgency: Optional[str] = None,
+    impact: Optional[str] = None,
+    category: Optional[str] = None,
+    implemented: Optional[bool] = None,
+    format: str = Query("ndjson", enum=list(EXPORT_MEDIA_TYPES)),
+    fields: Optional[str] = Query(None, description="Comma-separated response fields (id is always included)")
+):
+    """Every matching recommendation, streamed as NDJSON, CSV, an Arrow IPC stream or Parquet (no paging)"""
+    selected = response_fields(RecommendationResponse, fields)
+    params = {"timeframe": timeframe, "channel": channel, "topic": topic, "urgency": urgency, "impact": impact, "category": category, "implemented": implemented}
+    query = select(*response_columns(Recommendation, selected)).where(*filter_criteria(Recommendation, "recommendations", params))
+    return export_response(db, Recommendation, query, selected, format)
+
+@app.get("/api/user/recommendations/search", response_model=dict)
+async def search_user_recommendations(
+    request: Request,
+    q: str = Query(..., min_length=1),
+    db: AsyncSession = Depends(get_async_db),
+    timeframe: Optional[str] = None,
+    channel: Optional[str] = None,
+    topic: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    fields: Optional[str] = Query(None, description="Comma-separated response fields (id is always included)")
+):
+    """Ranked full-text search over recommendation text and descriptions; every word matches as a prefix"""
+    terms = search_terms(q)
+    selected = response_fields(RecommendationResponse, fields)
+    params = {"search": " ".join(terms), "timeframe": timeframe, "channel": channel, "topic": topic,
+              "limit": limit, "fields": ",".join(selected) if fields else None}
+
+    params["version"] = await table_version(db, "recommendations")
+    etag = make_etag("recommendations", params)
+    unchanged = not_modified(request, etag)
+    if unchanged:
+        return unchanged
+
+    async def load():
+        query = search_select(db.bind.dialect.name, Recommendation, response_columns(Recommendation, selected), terms)
+
+        if timeframe and timeframe != "all":
+            query = query.where(Recommendation.timeframe == timeframe)
+        if channel and channel != "all":
+            query = query.where(Recommendation.channel == channel)
+        if topic and topic != "all":
+            query = query.where(Recommendation.topic == topic)
+
+        rows = (await db.execute(query.limit(limit))).all()
+        items = rows_to_items(selected, rows)
+        for item, row in zip(items, rows):
+            item["score"] = row.score
+        return dumps({"items": items, "query": q})
+
+    return Response(await response_cache.get_or_load_bytes("recommendations", params, load), media_type="application/json",
+                    headers=caching_headers(etag))
 
 @app.post("/api/user/recommendations", response_model=dict)
 async def create_user_recommendation(
     recommendation: RecommendationCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     recommendation_data = recommendation.dict()
-    recommendation_data["id"] = str(int(time.time() * 1000))
-    db_recommendation = Recommendation(**recommendation_data)
+    recommendation_data["id"] = new_id()
+    db_recommendation = Recommendation(**with_rank(Recommendation, recommendation_data))
     db.add(db_recommendation)
-    db.commit()
-    db.refresh(db_recommendation)
+    await db.commit()
+    await bump_version("recommendations")
+    await db.refresh(db_recommendation)
+    await response_cache.invalidate("recommendations", [row_values(db_recommendation)])
     return {"message": "Recommendation created successfully", "recommendation": {"id": db_recommendation.id, "text": db_recommendation.text, "urgency": db_recommendation.urgency, "impact": db_recommendation.impact}}
 
 @app.put("/api/user/recommendations", response_model=dict)
 async def update_user_recommendation(
     recommendation: RecommendationUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    db_recommendation = db.query(Recommendation).filter(Recommendation.id == recommendation.id).first()
+    db_recommendation = await db.get(Recommendation, recommendation.id)
     if not db_recommendation:
         raise HTTPException(status_code=404, detail="Recommendation not found")
     
+    before = row_values(db_recommendation)
     for field, value in recommendation.dict(exclude_unset=True).items():
         if field != "id":
             setattr(db_recommendation, field, value)
+    db_recommendation.rank_score = rank_score(Recommendation, row_values(db_recommendation))
     
-    db.commit()
-    db.refresh(db_recommendation)
+    await db.commit()
+    await bump_version("recommendations")
+    await db.refresh(db_recommendation)
+    await response_cache.invalidate("recommendations", [before, row_values(db_recommendation)])
     return {"message": "Recommendation updated successfully", "recommendation": {"id": db_recommendation.id, "text": db_recommendation.text, "urgency": db_recommendation.urgency, "impact": db_recommendation.impact}}
 
 @app.delete("/api/user/recommendations")
 async def delete_user_recommendation(
     id: str = Query(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    db_recommendation = db.query(Recommendation).filter(Recommendation.id == id).first()
+    db_recommendation = await db.get(Recommendation, id)
     if not db_recommendation:
         raise HTTPException(status_code=404, detail="Recommendation not found")
     
-    db.delete(db_recommendation)
-    db.commit()
+    await db.delete(db_recommendation)
+    await db.commit()
+    await bump_version("recommendations")
+    await response_cache.invalidate("recommendations", [row_values(db_recommendation)])
     return {"message": "Recommendation deleted successfully", "recommendation": {"id": db_recommendation.id, "text": db_recommendation.text}}
 
+@app.post("/api/user/recommendations/bulk", response_model=dict)
+async def bulk_create_user_recommendations(
+    recommendations: List[RecommendationCreate],
+    db: AsyncSession = Depends(get_async_db)
+):
+    check_batch_size(recommendations)
+    results = await bulk_create(db, Recommendation, [recommendation.dict() for recommendation in recommendations])
+    await db.commit()
+    await bump_version("recommendations")
+    await response_cache.invalidate("recommendations")
+    return {"message": "Recommendations created successfully", "created": len(results), "results": results}
+
+@app.put("/api/user/recommendations/bulk", response_model=dict)
+async def bulk_update_user_recommendations(
+    recommendations: List[RecommendationUpdate],
+    db: AsyncSession = Depends(get_async_db)
+):
+    check_batch_size(recommendations)
+    results = await bulk_update(db, Recommendation, [recommendation.dict(exclude_unset=True) for recommendation in recommendations])
+    await db.commit()
+    await bump_version("recommendations")
+    await response_cache.invalidate("recommendations")
+    updated = sum(1 for result in results if result["status"] == "updated")
+    return {"message": "Recommendations updated successfully", "updated": updated, "results": results}
+
+@app.delete("/api/user/recommendations/bulk", response_model=dict)
+async def bulk_delete_user_recommendations(
+    request: BulkDeleteRequest,
+    db: AsyncSession = Depends(get_async_db)
+):
+    check_batch_size(request.ids)
+    results = await bulk_delete(db, Recommendation, request.ids)
+    await db.commit()
+    await bump_version("recommendations")
+    await response_cache.invalidate("recommendations")
+    deleted = sum(1 for result in results if result["status"] == "deleted")
+    return {"message": "Recommendations deleted successfully", "deleted": deleted, "results": results}
+
+@app.post("/api/user/recommendations/import", response_model=dict)
+async def import_user_recommendations(
+    request: Request,
+    format: str = Query("ndjson", enum=list(IMPORT_FORMATS)),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Load recommendations from an NDJSON or CSV request body, streamed and committed in batches; bad rows are reported, not loaded"""
+    result = await import_rows(db, Recommendation, RecommendationImport, request.stream(), format)
+    await response_cache.invalidate("recommendations")
+    return {"message": "Recommendations imported", **result}
+
 if __name__ == "__main__":
-    import os
-    port = int(os.getenv("PORT", 8080))
-    uvicorn.run(app, host="0.0.0.0", port=port)
\ No newline at end of file
+    from serve import main as serve
+
+    serve()
\ No newline at end of file
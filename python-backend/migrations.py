@@ -0,0 +1,183 @@
+import hashlib
+from contextlib import contextmanager
+
+from sqlalchemy import Connection, bindparam, exc, inspect, select, text, update
+from sqlalchemy.engine import Engine
+
+from database import Base
+from models import Priority, Recommendation, SchemaMigration, TableVersion
+from ranking import RANK_INPUTS, rank_score
+from search import create_search_indexes, drop_search_indexes
+from workers import file_lock
+
+# Arbitrary constants shared by every instance so concurrent cold starts take turns.
+_MIGRATION_LOCK_KEY = 7_245_001
+_SCHEMA_LOCK_KEY = 7_245_002
+
+# Rows read and updated together by backfills.
+_BACKFILL_PAGE = 5000
+
+def _create_indexes(conn: Connection, names):
+    indexes = {index.name: index for table in Base.metadata.sorted_tables for index in table.indexes}
+    for name in names:
+        indexes[name].create(conn, checkfirst=True)
+
+def _filter_indexes(conn: Connection):
+    """Composite indexes matching the list endpoint filter shapes"""
+    names = []
+    for table in ("charts", "metrics", "priorities", "recommendations"):
+        names += [
+            f"ix_{table}_timeframe_channel_topic",
+            f"ix_{table}_channel_topic",
+            f"ix_{table}_topic",
+            f"ix_{table}_created_at_id",
+        ]
+    names += [
+        "ix_charts_chart_type",
+        "ix_priorities_status_priority_impact",
+        "ix_priorities_priority_impact",
+        "ix_priorities_impact",
+        "ix_recommendations_urgency_impact",
+        "ix_recommendations_impact",
+        "ix_recommendations_category",
+        "ix_recommendations_implemented",
+    ]
+    _create_indexes(conn, names)
+
+def _table_versions(conn: Connection):
+    """Seed the per-table version counters behind ETags"""
+    if not inspect(conn).has_table(TableVersion.__tablename__):
+        TableVersion.__table__.create(conn)
+    existing = set(conn.execute(select(TableVersion.table_name)).scalars())
+    for table in ("charts", "metrics", "priorities", "recommendations", "events"):
+        if table not in existing:
+            conn.execute(TableVersion.__table__.insert().values(table_name=table, version=0))
+
+def _search_indexes(conn: Connection):
+    """Full-text indexes over priority and recommendation text"""
+    create_search_indexes(conn)
+
+def _rank_scores(conn: Connection):
+    """Materialized ranking score behind ``top=N``, backfilled for existing rows"""
+    for model in (Priority, Recommendation):
+        table = model.__table__
+        if "rank_score" not in {column["name"] for column in inspect(conn).get_columns(table.name)}:
+            conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN rank_score INTEGER NOT NULL DEFAULT 0"))
+        inputs = [table.c[name] for name in RANK_INPUTS[table.name]]
+        # Keyset pages by id, each updated as it is read, so memory stays at one page whatever the table size.
+        last = None
+        while True:
+            page = select(table.c.id, *inputs).order_by(table.c.id).limit(_BACKFILL_PAGE)
+            rows = conn.execute(page.where(table.c.id > last) if last is not None else page).all()
+            if not rows:
+                break
+            conn.execute(
+                update(table).where(table.c.id == bindparam("_id")).values(rank_score=bindparam("_rank")),
+                [{"_id": row.id, "_rank": rank_score(model, row._asdict())} for row in rows],
+            )
+            last = rows[-1].id
+    _create_indexes(conn, ["ix_priorities_rank", "ix_recommendations_rank"])
+
+def _filtered_rank_indexes(conn: Connection):
+    """A rank index led by the timeframe/channel/topic filter, so a filtered top=N is one index range scan"""
+    _create_indexes(conn, ["ix_priorities_timeframe_channel_topic_rank", "ix_recommendations_timeframe_channel_topic_rank"])
+
+def _search_keys(conn: Connection):
+    """Re-key SQLite full-text search on search_keys instead of the implicit rowid, which VACUUM may renumber"""
+    drop_search_indexes(conn)
+    create_search_indexes(conn)
+
+def _created_at_microseconds(conn: Connection):
+    """Spell every SQLite created_at with microseconds, as cursor bounds are (pagination.py).
+
+    Rows written by the server default (CURRENT_TIMESTAMP) had whole seconds
+    only, which sort before the same instant written with ".000000".
+    """
+    if conn.dialect.name != "sqlite":
+        return
+    for table in ("charts", "metrics", "priorities", "recommendations"):
+        conn.execute(text(f"UPDATE {table} SET created_at = created_at || '.000000' WHERE length(created_at) = 19"))
+
+def _fewer_rank_indexes(conn: Connection):
+    """Drop the partial-filter rank indexes 0005 used to create: each one slowed every import and write"""
+    for table in ("priorities", "recommendations"):
+        for filters in ("timeframe_channel", "timeframe_topic", "channel_topic", "timeframe", "channel", "topic"):
+            conn.execute(text(f"DROP INDEX IF EXISTS ix_{table}_{filters}_rank"))
+
+# Append only: each entry runs once per database, in order.
+MIGRATIONS = [
+    ("0001_filter_indexes", _filter_indexes),
+    ("0002_table_versions", _table_versions),
+    ("0003_search_indexes", _search_indexes),
+    ("0004_rank_scores", _rank_scores),
+    ("0005_filtered_rank_indexes", _filtered_rank_indexes),
+    ("0006_search_keys", _search_keys),
+    ("0007_created_at_microseconds", _created_at_microseconds),
+    ("0008_fewer_rank_indexes", _fewer_rank_indexes),
+]
+
+def schema_fingerprint() -> str:
+    """Hash of the declared tables, columns, indexes and migrations"""
+    parts = [version for version, _ in MIGRATIONS]
+    for table in Base.metadata.sorted_tables:
+        parts.append(table.name)
+        parts += [f"{column.name}:{column.type!r}:{column.nullable}" for column in table.columns]
+        parts += sorted(index.name for index in table.indexes)
+    return hashlib.sha256("\n".join(parts).encode()).hexdigest()[:16]
+
+@contextmanager
+def _schema_lock(engine: Engine):
+    """One process at a time sets up the schema: instances and the workers of one server start together.
+
+    Postgres takes a session advisory lock. SQLite runs DDL outside any
+    transaction, so a lock file next to the database does the job.
+    """
+    if engine.dialect.name == "postgresql":
+        with engine.connect() as conn:
+            conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": _SCHEMA_LOCK_KEY})
+            try:
+                yield
+            finally:
+                conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": _SCHEMA_LOCK_KEY})
+    elif engine.dialect.name == "sqlite" and engine.url.database not in (None, "", ":memory:"):
+        with file_lock(f"{engine.url.database}.lock"):
+            yield
+    else:
+        yield
+
+def ensure_schema(engine: Engine):
+    """Create tables and apply migrations, unless this exact schema was already set up.
+
+    The fingerprint of the declared schema is recorded in schema_migrations
+    once everything is in place, so a cold start against an up-to-date
+    database costs one indexed lookup instead of a reflection query per table.
+    """
+    marker = f"schema:{schema_fingerprint()}"
+    try:
+        with engine.connect() as conn:
+            if conn.execute(select(SchemaMigration.version).where(SchemaMigration.version == marker)).first():
+                print("✅ Database schema up to date")
+                return
+    except exc.DBAPIError:
+        pass  # no schema_migrations table yet
+
+    with _schema_lock(engine):
+        Base.metadata.create_all(bind=engine)
+        run_migrations(engine, marker)
+
+def run_migrations(engine: Engine, marker: str = None):
+    """Apply pending migrations, recording each (and the schema ``marker``) in schema_migrations"""
+    with engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _MIGRATION_LOCK_KEY})
+        if not inspect(conn).has_table(SchemaMigration.__tablename__):
+            SchemaMigration.__table__.create(conn)
+        applied = {row.version for row in conn.execute(SchemaMigration.__table__.select())}
+        for version, migrate in MIGRATIONS:
+            if version in applied:
+                continue
+            migrate(conn)
+            conn.execute(SchemaMigration.__table__.insert().values(version=version))
+            print(f"✅ Applied migration {version}")
+        if marker and marker not in applied:
+            conn.execute(SchemaMigration.__table__.insert().values(version=marker))
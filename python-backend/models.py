@@ -1,7 +1,12 @@
-from sqlalchemy import Column, String, DateTime, Boolean, Text, Float, Integer
+from sqlalchemy import Column, String, DateTime, Boolean, Text, Float, Integer, UniqueConstraint, Index
+from datetime import datetime, timezone
+
 from sqlalchemy.sql import func
 from database import Base
 
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
 class Chart(Base):
     __tablename__ = "charts"
 
@@ -14,9 +19,18 @@ class Chart(Base):
     channel = Column(String, default="all")
     topic = Column(String, default="all")
     description = Column(Text)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Set client-side so SQLite always stores the microsecond spelling cursors compare against (see pagination.py).
+    created_at = Column(DateTime(timezone=True), default=_now, server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    __table_args__ = (
+        Index("ix_charts_timeframe_channel_topic", "timeframe", "channel", "topic", "created_at"),
+        Index("ix_charts_channel_topic", "channel", "topic", "created_at"),
+        Index("ix_charts_topic", "topic", "created_at"),
+        Index("ix_charts_created_at_id", "created_at", "id"),
+        Index("ix_charts_chart_type", "chart_type", "created_at"),
+    )
+
 class Metric(Base):
     __tablename__ = "metrics"
 
@@ -30,9 +44,17 @@ class Metric(Base):
     topic = Column(String, default="all")
     description = Column(Text)
     unit = Column(String)  # $, %, count, etc.
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Set client-side so SQLite always stores the microsecond spelling cursors compare against (see pagination.py).
+    created_at = Column(DateTime(timezone=True), default=_now, server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    __table_args__ = (
+        Index("ix_metrics_timeframe_channel_topic", "timeframe", "channel", "topic", "created_at"),
+        Index("ix_metrics_channel_topic", "channel", "topic", "created_at"),
+        Index("ix_metrics_topic", "topic", "created_at"),
+        Index("ix_metrics_created_at_id", "created_at", "id"),
+    )
+
 class Priority(Base):
     __tablename__ = "priorities"
 
@@ -47,9 +69,24 @@ class Priority(Base):
     channel = Column(String, default="all")
     topic = Column(String, default="all")
     assignee = Column(String)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    rank_score = Column(Integer, nullable=False, default=0, server_default="0")  # ranking.priority_rank, set on every write
+    # Set client-side so SQLite always stores the microsecond spelling cursors compare against (see pagination.py).
+    created_at = Column(DateTime(timezone=True), default=_now, server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    __table_args__ = (
+        Index("ix_priorities_timeframe_channel_topic", "timeframe", "channel", "topic", "created_at"),
+        Index("ix_priorities_channel_topic", "channel", "topic", "created_at"),
+        Index("ix_priorities_topic", "topic", "created_at"),
+        Index("ix_priorities_created_at_id", "created_at", "id"),
+        Index("ix_priorities_status_priority_impact", "status", "priority", "impact"),
+        Index("ix_priorities_priority_impact", "priority", "impact"),
+        Index("ix_priorities_impact", "impact"),
+        Index("ix_priorities_rank", "rank_score", "id"),
+        # top=N under the full timeframe/channel/topic filter; narrower filters walk ix_*_rank and skip non-matches.
+        Index("ix_priorities_timeframe_channel_topic_rank", "timeframe", "channel", "topic", "rank_score", "id"),
+    )
+
 class Recommendation(Base):
     __tablename__ = "recommendations"
 
@@ -63,5 +100,85 @@ class Recommendation(Base):
     channel = Column(String, default="all")
     topic = Column(String, default="all")
     description = Column(Text)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
\ No newline at end of file
+    rank_score = Column(Integer, nullable=False, default=0, server_default="0")  # ranking.recommendation_rank, set on every write
+    # Set client-side so SQLite always stores the microsecond spelling cursors compare against (see pagination.py).
+    created_at = Column(DateTime(timezone=True), default=_now, server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    __table_args__ = (
+        Index("ix_recommendations_timeframe_channel_topic", "timeframe", "channel", "topic", "created_at"),
+        Index("ix_recommendations_channel_topic", "channel", "topic", "created_at"),
+        Index("ix_recommendations_topic", "topic", "created_at"),
+        Index("ix_recommendations_created_at_id", "created_at", "id"),
+        Index("ix_recommendations_urgency_impact", "urgency", "impact"),
+        Index("ix_recommendations_impact", "impact"),
+        Index("ix_recommendations_category", "category"),
+        Index("ix_recommendations_implemented", "implemented"),
+        Index("ix_recommendations_rank", "rank_score", "id"),
+        # top=N under the full timeframe/channel/topic filter; narrower filters walk ix_*_rank and skip non-matches.
+        Index("ix_recommendations_timeframe_channel_topic_rank", "timeframe", "channel", "topic", "rank_score", "id"),
+    )
+
+class Event(Base):
+    __tablename__ = "events"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    metric = Column(String, nullable=False)  # revenue, daily_users, orders, etc.
+    value = Column(Float, nullable=False, default=1.0)
+    channel = Column(String, default="all")
+    topic = Column(String, default="all")
+    occurred_at = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        Index("ix_events_metric_occurred_at", "metric", "occurred_at"),
+    )
+
+class MetricRollup(Base):
+    __tablename__ = "metric_rollups"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    granularity = Column(String, nullable=False)  # hour, day, month
+    bucket_start = Column(DateTime(timezone=True), nullable=False)
+    metric = Column(String, nullable=False)
+    channel = Column(String, nullable=False)
+    topic = Column(String, nullable=False)
+    count = Column(Integer, nullable=False, default=0)
+    sum = Column(Float, nullable=False, default=0.0)
+    min = Column(Float)
+    max = Column(Float)
+    sketch = Column(Text)  # serialized t-digest, see sketches.py
+
+    __table_args__ = (
+        UniqueConstraint("granularity", "metric", "bucket_start", "channel", "topic", name="uq_metric_rollups_bucket"),
+    )
+
+class MetricSample(Base):
+    __tablename__ = "metric_samples"
+
+    metric_id = Column(String, primary_key=True)
+    recorded_at = Column(DateTime(timezone=True), primary_key=True)
+    value = Column(Float, nullable=False)
+
+    __table_args__ = (
+        # Append-only; Postgres keeps one partition per month (see samples.py)
+        {"postgresql_partition_by": "RANGE (recorded_at)"},
+    )
+
+class SchemaMigration(Base):
+    __tablename__ = "schema_migrations"
+
+    version = Column(String, primary_key=True)
+    applied_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class IdWorkerLease(Base):
+    __tablename__ = "id_worker_leases"
+
+    worker_id = Column(Integer, primary_key=True, autoincrement=False)
+    owner = Column(String, nullable=False)  # host:pid:random of the process holding the lease
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+
+class TableVersion(Base):
+    __tablename__ = "table_versions"
+
+    table_name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)  # bumped after every committed write (etags.bump_version)
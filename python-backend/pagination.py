@@ -0,0 +1,83 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional
+
+from fastapi import HTTPException
+from sqlalchemy import Select, String, func, select, tuple_, type_coerce
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# How SQLAlchemy's SQLite DateTime, and therefore every writer, spells a timestamp.
+SQLITE_TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+def encode_cursor(created_at: Optional[datetime], id: str) -> str:
+    payload = json.dumps([created_at.isoformat() if created_at else None, id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), str(id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def _created_at_bound(db: AsyncSession, created_at: datetime):
+    """Bind the cursor timestamp the way the column stores it.
+
+    SQLite keeps timestamps as text, compared character by character: every
+    writer stores "YYYY-MM-DD HH:MM:SS.ffffff" (migration 0007 rewrote older
+    whole-second rows), so the bound is spelled the same way, microseconds
+    included even when they are zero.
+    """
+    if db.bind.dialect.name != "sqlite":
+        return created_at
+    return type_coerce(created_at.strftime(SQLITE_TIMESTAMP_FORMAT), String)
+
+async def paginate(
+    db: AsyncSession,
+    query: Select,
+    model,
+    page: int,
+    limit: int,
+    cursor: Optional[str] = None,
+    include_total: bool = True,
+) -> dict:
+    """Page a filtered column SELECT ordered by (created_at, id).
+
+    ``query`` selects plain columns (including ``created_at`` and ``id``), so
+    items come back as rows rather than ORM objects.
+
+    Offset mode (no ``cursor``) keeps the ``page`` semantics. Cursor mode is
+    enabled by passing ``cursor`` (empty for the first page) and seeks past the
+    last row of the previous page, so deep pages cost the same as the first.
+    ``include_total=False`` skips the COUNT query. Either way one extra row is
+    fetched to tell whether a ``next_cursor`` exists.
+    """
+    total = None
+    if include_total:
+        total = await db.scalar(select(func.count()).select_from(query.order_by(None).subquery()))
+
+    query = query.order_by(model.created_at, model.id)
+    if cursor is not None:
+        if cursor:
+            created_at, last_id = decode_cursor(cursor)
+            query = query.where(tuple_(model.created_at, model.id) > tuple_(_created_at_bound(db, created_at), last_id))
+    else:
+        query = query.offset((page - 1) * limit)
+
+    rows = (await db.execute(query.limit(limit + 1))).all()
+    items = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = encode_cursor(last.created_at, last.id)
+
+    return {
+        "items": items,
+        "total": total,
+        "page": page,
+        "limit": limit,
+        "total_pages": (total + limit - 1) // limit if total is not None else None,
+        "next_cursor": next_cursor,
+    }
@@ -0,0 +1,125 @@
+import asyncio
+import os
+import threading
+import time
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+class PoolStats:
+    """Checkout waits, timeouts and connects seen by one pool"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.connects = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record_wait(self, seconds: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+
+    def record_connect(self):
+        with self._lock:
+            self.connects += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            waits = self.checkouts + self.timeouts
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "connects": self.connects,
+                "wait_avg_ms": self.wait_total / waits * 1000 if waits else 0.0,
+                "wait_max_ms": self.wait_max * 1000,
+            }
+
+class _InstrumentedPool:
+    """Times every checkout from the queue, including the ones that time out"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+        event.listen(self, "connect", self._on_connect)
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        self.stats.record_connect()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.record_wait(time.perf_counter() - started, timed_out=True)
+            raise
+        self.stats.record_wait(time.perf_counter() - started)
+        return connection
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+class InstrumentedQueuePool(_InstrumentedPool, QueuePool):
+    pass
+
+class InstrumentedAsyncQueuePool(_InstrumentedPool, AsyncAdaptedQueuePool):
+    pass
+
+def worker_count() -> int:
+    """Server processes sharing this container's connection budget (WEB_CONCURRENCY, as uvicorn and gunicorn read it)"""
+    return max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+
+def pool_settings() -> dict:
+    """Async pool sizing from the environment.
+
+    DB_MAX_CONNECTIONS is the database connection budget for this container.
+    It is split across WEB_CONCURRENCY workers. One connection per worker is
+    left for the sync engine (startup, migrations, id leases). Half of the
+    rest is the steady pool and the other half is overflow. DB_POOL_SIZE
+    and DB_MAX_OVERFLOW override the split.
+    """
+    budget = max(2, int(os.getenv("DB_MAX_CONNECTIONS", "20")) // worker_count() - 1)
+    pool_size = int(os.getenv("DB_POOL_SIZE", str((budget + 1) // 2)))
+    return {
+        "pool_size": pool_size,
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", str(max(0, budget - pool_size)))),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "10")),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "300")),
+    }
+
+def pool_status(engine) -> dict:
+    pool = engine.pool
+    status = {"class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            overflow=max(0, pool.overflow()),
+            max_overflow=pool._max_overflow,
+            timeout_seconds=pool.timeout(),
+        )
+    if hasattr(pool, "stats"):
+        status.update(pool.stats.snapshot())
+    return status
+
+async def prewarm_pool(engine, count: int) -> int:
+    """Open ``count`` connections at once and return them to the pool idle"""
+    if count <= 0:
+        return 0
+    connections = [engine.connect() for _ in range(count)]
+    results = await asyncio.gather(*(connection.start() for connection in connections), return_exceptions=True)
+    opened = 0
+    for connection, result in zip(connections, results):
+        if not isinstance(result, Exception):
+            opened += 1
+            await connection.close()
+    return opened
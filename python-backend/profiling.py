@@ -0,0 +1,261 @@
+import asyncio
+import bisect
+import glob
+import json
+import os
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from workers import state_dir, worker_index
+
+# Request latency histogram buckets, in seconds.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Queries per request histogram buckets.
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# Every Nth request gets query and serialization timing (1: all of them, 0: none). Latency is always recorded.
+PROFILE_SAMPLE_EVERY = int(os.getenv("PROFILE_SAMPLE_EVERY", "1"))
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+# How often each worker writes its metrics for the others to add up, with several workers.
+METRICS_PUBLISH_SECONDS = float(os.getenv("METRICS_PUBLISH_SECONDS", "5"))
+
+class RequestProfile:
+    __slots__ = ("queries", "query_seconds", "serialize_seconds", "slow_queries")
+
+    def __init__(self):
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.serialize_seconds = 0.0
+        self.slow_queries = 0
+
+# The profile of the request being handled, when it is sampled.
+_current: ContextVar[Optional[RequestProfile]] = ContextVar("request_profile", default=None)
+
+def record_serialization(seconds: float) -> None:
+    profile = _current.get()
+    if profile is not None:
+        profile.serialize_seconds += seconds
+
+# Every statement is timed so slow ones are always logged; per-request totals only for sampled requests.
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context.profile_started = time.perf_counter()
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context.profile_started
+    profile = _current.get()
+    slow = elapsed * 1000 >= SLOW_QUERY_MS
+    if slow:
+        print(f"⚠️ Slow query ({elapsed * 1000:.0f} ms): {' '.join(statement.split())[:2000]}")
+    if profile is not None:
+        profile.queries += 1
+        profile.query_seconds += elapsed
+        profile.slow_queries += slow
+
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+class RequestMetrics:
+    """Per-route request, query and serialization metrics for this process, in Prometheus text format.
+
+    Routes are labelled by their path template (``/api/user/metrics``, not the
+    URL), so label cardinality is bounded by the route table. Query and
+    serialization figures cover the sampled requests only;
+    ``glanceable_profiled_requests_total`` says how many those were.
+    """
+
+    HISTOGRAMS = ("latency", "queries_per_request")
+    COUNTERS = ("requests", "profiled", "query_seconds", "serialize_seconds", "slow_queries")
+
+    def __init__(self):
+        self.latency: Dict[tuple, Histogram] = defaultdict(lambda: Histogram(LATENCY_BUCKETS))
+        self.queries_per_request: Dict[tuple, Histogram] = defaultdict(lambda: Histogram(QUERY_BUCKETS))
+        self.requests: Dict[tuple, int] = defaultdict(int)
+        self.profiled: Dict[tuple, int] = defaultdict(int)
+        self.query_seconds: Dict[tuple, float] = defaultdict(float)
+        self.serialize_seconds: Dict[tuple, float] = defaultdict(float)
+        self.slow_queries: Dict[tuple, int] = defaultdict(int)
+
+    def record(self, labels: tuple, status: int, seconds: float, profile: Optional[RequestProfile]):
+        self.latency[labels].observe(seconds)
+        self.requests[labels + (str(status),)] += 1
+        if profile is not None:
+            self.profiled[labels] += 1
+            self.queries_per_request[labels].observe(profile.queries)
+            self.query_seconds[labels] += profile.query_seconds
+            self.serialize_seconds[labels] += profile.serialize_seconds
+            self.slow_queries[labels] += profile.slow_queries
+
+    def state(self) -> dict:
+        """Every series as JSON-friendly lists, for merge() in another process"""
+        state = {name: [[list(labels), hist.counts, hist.total, hist.count] for labels, hist in getattr(self, name).items()]
+                 for name in self.HISTOGRAMS}
+        state.update({name: [[list(labels), value] for labels, value in getattr(self, name).items()] for name in self.COUNTERS})
+        return state
+
+    def merge(self, state: dict):
+        """Add another process's state() to these series"""
+        for name in self.HISTOGRAMS:
+            for labels, counts, total, count in state.get(name, ()):
+                hist = getattr(self, name)[tuple(labels)]
+                hist.counts = [mine + theirs for mine, theirs in zip(hist.counts, counts)]
+                hist.total += total
+                hist.count += count
+        for name in self.COUNTERS:
+            for labels, value in state.get(name, ()):
+                getattr(self, name)[tuple(labels)] += value
+
+    def render(self) -> str:
+        lines: List[str] = []
+
+        def labelled(names, values, extra=""):
+            pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+            return "{" + ",".join(pairs + ([extra] if extra else [])) + "}"
+
+        def histogram(name, help_text, series):
+            lines.extend([f"# HELP {name} {help_text}", f"# TYPE {name} histogram"])
+            for labels, hist in sorted(series.items()):
+                cumulative = 0
+                for bound, count in zip(hist.buckets + (float("inf"),), hist.counts):
+                    cumulative += count
+                    le = 'le="+Inf"' if bound == float("inf") else f'le="{bound:g}"'
+                    lines.append(f"{name}_bucket{labelled(('method', 'route'), labels, le)} {cumulative}")
+                lines.append(f"{name}_sum{labelled(('method', 'route'), labels)} {hist.total:.6f}")
+                lines.append(f"{name}_count{labelled(('method', 'route'), labels)} {hist.count}")
+
+        def counter(name, help_text, series, names=("method", "route")):
+            lines.extend([f"# HELP {name} {help_text}", f"# TYPE {name} counter"])
+            for labels, value in sorted(series.items()):
+                lines.append(f"{name}{labelled(names, labels)} {value:.6f}" if isinstance(value, float)
+                             else f"{name}{labelled(names, labels)} {value}")
+
+        histogram("glanceable_request_duration_seconds", "Time to handle a request.", self.latency)
+        counter("glanceable_requests_total", "Requests handled.", self.requests, ("method", "route", "status"))
+        counter("glanceable_profiled_requests_total", "Requests sampled for query and serialization timing.", self.profiled)
+        histogram("glanceable_db_queries_per_request", "Database statements per sampled request.", self.queries_per_request)
+        counter("glanceable_db_query_seconds_total", "Time spent in database statements by sampled requests.", self.query_seconds)
+        counter("glanceable_serialization_seconds_total", "Time spent encoding JSON by sampled requests.", self.serialize_seconds)
+        counter("glanceable_slow_queries_total", f"Statements slower than {SLOW_QUERY_MS:g} ms in sampled requests.", self.slow_queries)
+        return "\n".join(lines) + "\n"
+
+request_metrics = RequestMetrics()
+
+def _metrics_path(directory: str, index: int) -> str:
+    return os.path.join(directory, f"metrics-{index}.json")
+
+def adopt_metrics() -> None:
+    """Carry on from the metrics the previous holder of this worker's index published.
+
+    Files are keyed by worker index, so a replacement worker takes over its
+    predecessor's counts instead of starting from zero, and the server's
+    counters never go backwards.
+    """
+    directory = state_dir()
+    if directory:
+        try:
+            with open(_metrics_path(directory, worker_index())) as f:
+                request_metrics.merge(json.load(f))
+        except FileNotFoundError:
+            pass
+
+def publish_metrics() -> None:
+    """Write this worker's metrics where its siblings' /metrics will add them up"""
+    directory = state_dir()
+    if directory:
+        path = _metrics_path(directory, worker_index())
+        with open(f"{path}.tmp", "w") as f:
+            json.dump(request_metrics.state(), f)
+        os.replace(f"{path}.tmp", path)
+
+async def keep_metrics_published() -> None:
+    """Background task: publish this worker's metrics every METRICS_PUBLISH_SECONDS"""
+    while True:
+        await asyncio.sleep(METRICS_PUBLISH_SECONDS)
+        publish_metrics()
+
+def render_metrics() -> str:
+    """Prometheus text for the whole server: this worker's live metrics plus every other worker's last published ones.
+
+    A worker that exited stays in the sum until another takes its index
+    and carries its counts on (adopt_metrics).
+    """
+    directory = state_dir()
+    if not directory:
+        return request_metrics.render()
+    combined = RequestMetrics()
+    combined.merge(request_metrics.state())
+    for path in glob.glob(os.path.join(directory, "metrics-*.json")):
+        if path != _metrics_path(directory, worker_index()):
+            with open(path) as f:
+                combined.merge(json.load(f))
+    return combined.render()
+
+class ProfilingMiddleware:
+    """Times every request and, for every PROFILE_SAMPLE_EVERY-th one, its queries and JSON encoding.
+
+    Plain ASGI, so it sees the matched endpoint (the router stores it in the
+    shared scope) and does not buffer streaming responses; Server-Sent Event
+    streams are not timed.
+    """
+
+    def __init__(self, app, sample_every: int = PROFILE_SAMPLE_EVERY):
+        self.app = app
+        self.sample_every = sample_every
+        self._seen = 0
+        self._routes: Dict[object, str] = {}
+
+    def _route(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        if endpoint not in self._routes:
+            for route in scope["app"].routes:
+                if getattr(route, "endpoint", None) is endpoint:
+                    self._routes[endpoint] = route.path
+                    break
+            else:
+                self._routes[endpoint] = getattr(endpoint, "__name__", "unknown")
+        return self._routes[endpoint]
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        self._seen += 1
+        profile = RequestProfile() if self.sample_every and self._seen % self.sample_every == 0 else None
+        token = _current.set(profile)
+        started = time.perf_counter()
+        response = {"status": 500, "streaming": False}
+
+        async def send_and_watch(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["streaming"] = any(
+                    name == b"content-type" and value.startswith(b"text/event-stream")
+                    for name, value in message.get("headers", [])
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_and_watch)
+        finally:
+            _current.reset(token)
+            if not response["streaming"]:
+                labels = (scope["method"], self._route(scope))
+                request_metrics.record(labels, response["status"], time.perf_counter() - started, profile)
@@ -0,0 +1,104 @@
+import calendar
+import re
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from rollups import utcnow
+
+LEVELS = {"high": 3, "medium": 2, "low": 1}
+# Within open work, what is already under way first.
+PRIORITY_STATUSES = {"in-progress": 3, "pending": 2, "planned": 1, "completed": 0}
+
+# A priority's deadline fills the low digits of its score: days since DEADLINE_EPOCH, counted
+# down from DEADLINE_SPAN, so within equal weights the sooner deadline ranks higher and no
+# deadline ranks last. Scores stay below 2**31.
+DEADLINE_EPOCH = date(2000, 1, 1)
+DEADLINE_SPAN = 100_000
+
+# Row values each score is computed from, per table.
+RANK_INPUTS = {
+    "priorities": ("status", "priority", "impact", "deadline", "created_at"),
+    "recommendations": ("urgency", "impact", "implemented"),
+}
+
+_DATE_FORMATS = ("%b %d", "%B %d", "%d %b", "%d %B", "%b %d, %Y", "%B %d, %Y", "%m/%d/%Y", "%d.%m.%Y")
+
+def parse_deadline(deadline: Optional[str], written: datetime) -> Optional[date]:
+    """The date a free-text deadline names, or None.
+
+    Takes ISO dates, "Dec 15"-style dates (in the year the row was created)
+    and the relative words the dashboard offers ("Today", "Next week", "End
+    of month"), read relative to when the row was created so the date does
+    not drift as the row is edited later.
+    """
+    text = " ".join((deadline or "").lower().split())
+    if not text:
+        return None
+    day = written.date()
+    quarter_end = (day.month - 1) // 3 * 3 + 3
+    relative = {
+        "today": day,
+        "tomorrow": day + timedelta(days=1),
+        "this week": day + timedelta(days=6 - day.weekday()),
+        "end of week": day + timedelta(days=6 - day.weekday()),
+        "next week": day + timedelta(days=7),
+        "end of month": day.replace(day=calendar.monthrange(day.year, day.month)[1]),
+        "next month": day + timedelta(days=30),
+        "end of quarter": date(day.year, quarter_end, calendar.monthrange(day.year, quarter_end)[1]),
+        "end of year": date(day.year, 12, 31),
+    }
+    if text in relative:
+        return relative[text]
+    try:
+        return date.fromisoformat(text[:10])
+    except ValueError:
+        pass
+    text = re.sub(r"(\d)(st|nd|rd|th)\b", r"\1", text)
+    for fmt in _DATE_FORMATS:
+        try:
+            parsed = datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+        return parsed.date() if "%Y" in fmt else parsed.replace(year=day.year).date()
+    return None
+
+def priority_rank(row: dict) -> int:
+    """Open before completed, then priority, impact, status, and the nearest deadline"""
+    status = row.get("status")
+    weight = (
+        (status != "completed") * 1000
+        + LEVELS.get(row.get("priority"), 0) * 100
+        + LEVELS.get(row.get("impact"), 0) * 10
+        + PRIORITY_STATUSES.get(status, 0)
+    )
+    due = parse_deadline(row.get("deadline"), row.get("created_at") or utcnow())
+    days = min(max((due - DEADLINE_EPOCH).days, 0), DEADLINE_SPAN - 1) if due else DEADLINE_SPAN - 1
+    return weight * DEADLINE_SPAN + DEADLINE_SPAN - 1 - days
+
+def recommendation_rank(row: dict) -> int:
+    """Not yet implemented first, then urgency and impact"""
+    return (not row.get("implemented")) * 100 + LEVELS.get(row.get("urgency"), 0) * 10 + LEVELS.get(row.get("impact"), 0)
+
+_RANKERS = {"priorities": priority_rank, "recommendations": recommendation_rank}
+
+def with_rank(model, row: dict) -> dict:
+    """``row`` (the full column values of a write) plus its rank_score, for the ranked tables"""
+    ranker = _RANKERS.get(model.__tablename__)
+    return dict(row, rank_score=ranker(row)) if ranker else row
+
+def rank_score(model, row: dict) -> int:
+    return _RANKERS[model.__tablename__](row)
+
+async def top_ranked(db: AsyncSession, query: Select, model, top: int) -> dict:
+    """The ``top`` highest-ranked rows of a filtered column SELECT, shaped like a paginate() page.
+
+    Ordered by (rank_score, id) descending: a backward walk of
+    ix_<table>_rank, or of ix_<table>_timeframe_channel_topic_rank when all
+    three of those filters are given, that stops after ``top`` matching rows,
+    with no COUNT and no sort.
+    """
+    rows = (await db.execute(query.order_by(model.rank_score.desc(), model.id.desc()).limit(top))).all()
+    return {"items": rows, "total": None, "page": 1, "limit": top, "total_pages": None, "next_cursor": None}
@@ -0,0 +1,174 @@
+import asyncio
+import itertools
+import os
+from typing import List, Optional
+
+from sqlalchemy import exc, make_url, text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+from pooling import InstrumentedAsyncQueuePool, pool_settings, pool_status
+
+READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+# Set on responses to writes; while the browser still holds it, that client's reads go to the primary.
+PRIMARY_COOKIE = "glanceable_primary"
+
+# Errors that mean the replica itself is unusable, not that the query was wrong.
+REPLICA_DOWN_ERRORS = (exc.OperationalError, exc.InterfaceError, OSError, asyncio.TimeoutError)
+
+# Seconds the replica is behind; 0 when it has replayed everything it received (and on a non-replica).
+_PG_LAG = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+
+def replica_urls() -> List[str]:
+    return [url.strip() for url in os.getenv("DB_REPLICA_URLS", "").split(",") if url.strip()]
+
+def read_after_write_seconds() -> int:
+    return int(os.getenv("DB_READ_AFTER_WRITE_SECONDS", "5"))
+
+def create_replica_engine(url: str) -> AsyncEngine:
+    """Asyncio engine for a replica URL (sqlite:///... or postgresql://...)"""
+    url = make_url(url)
+    if url.get_backend_name() == "sqlite":
+        return create_async_engine(
+            url.set(drivername="sqlite+aiosqlite"),
+            connect_args={"check_same_thread": False},
+            poolclass=InstrumentedAsyncQueuePool,
+            **pool_settings(),
+        )
+    return create_async_engine(
+        url.set(drivername="postgresql+asyncpg"),
+        connect_args={"timeout": int(os.getenv("DB_CONNECT_TIMEOUT", "5"))},
+        pool_pre_ping=True,
+        poolclass=InstrumentedAsyncQueuePool,
+        **pool_settings(),
+    )
+
+class Replica:
+    def __init__(self, engine: AsyncEngine):
+        self.engine = engine
+        self.healthy = True
+        self.lag_seconds = 0.0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+
+    def mark_down(self, error: BaseException):
+        self.healthy = False
+        self.failures += 1
+        self.last_error = f"{type(error).__name__}: {error}"
+
+class ReplicaSet:
+    """Round-robin over the read replicas that passed their last health check.
+
+    A replica is taken out when a query on it fails with a connection-level
+    error or when the periodic check finds it unreachable or lagging more
+    than ``max_lag`` seconds, and put back by the first check that passes.
+    With no healthy replica, reads go to the primary.
+    """
+
+    def __init__(self, engines: List[AsyncEngine], check_interval: float = 10.0, max_lag: float = 5.0):
+        self.replicas = [Replica(engine) for engine in engines]
+        self.check_interval = check_interval
+        self.max_lag = max_lag
+        self._next = itertools.count()
+
+    def __bool__(self) -> bool:
+        return bool(self.replicas)
+
+    def pick(self) -> Optional[AsyncEngine]:
+        for _ in range(len(self.replicas)):
+            replica = self.replicas[next(self._next) % len(self.replicas)]
+            if replica.healthy:
+                return replica.engine
+        return None
+
+    def mark_down(self, engine: AsyncEngine, error: BaseException):
+        for replica in self.replicas:
+            if replica.engine is engine and replica.healthy:
+                replica.mark_down(error)
+                print(f"❌ Read replica {engine.url.render_as_string(hide_password=True)} marked down: {replica.last_error}")
+
+    async def _check(self, replica: Replica):
+        try:
+            async with replica.engine.connect() as conn:
+                if conn.dialect.name == "postgresql":
+                    lag = await asyncio.wait_for(conn.scalar(_PG_LAG), self.check_interval)
+                else:
+                    # Reads a replicated table, so a copy without the schema does not pass.
+                    lag = await asyncio.wait_for(conn.scalar(text("SELECT 0 FROM table_versions LIMIT 1")), self.check_interval)
+        except Exception as e:
+            self.mark_down(replica.engine, e)
+            return
+        replica.lag_seconds = float(lag or 0)
+        healthy = replica.lag_seconds <= self.max_lag
+        if healthy and not replica.healthy:
+            print(f"✅ Read replica {replica.engine.url.render_as_string(hide_password=True)} back in rotation")
+        if not healthy:
+            replica.last_error = f"lagging {replica.lag_seconds:.1f}s"
+        replica.healthy = healthy
+
+    async def check(self):
+        await asyncio.gather(*(self._check(replica) for replica in self.replicas))
+
+    async def keep_checked(self):
+        while self.replicas:
+            await self.check()
+            await asyncio.sleep(self.check_interval)
+
+    def status(self) -> List[dict]:
+        return [
+            {
+                "url": replica.engine.url.render_as_string(hide_password=True),
+                "healthy": replica.healthy,
+                "lag_seconds": replica.lag_seconds,
+                "failures": replica.failures,
+                "last_error": replica.last_error,
+                "pool": pool_status(replica.engine),
+            }
+            for replica in self.replicas
+        ]
+
+    async def dispose(self):
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+def create_replica_set() -> ReplicaSet:
+    """Replicas from DB_REPLICA_URLS (comma-separated; empty means every query uses the primary)"""
+    urls = replica_urls()
+    if urls:
+        print(f"✅ Read replicas: {len(urls)} (reads stick to the primary {read_after_write_seconds()}s after a write)")
+    return ReplicaSet(
+        [create_replica_engine(url) for url in urls],
+        check_interval=float(os.getenv("DB_REPLICA_CHECK_SECONDS", "10")),
+        max_lag=float(os.getenv("DB_REPLICA_MAX_LAG_SECONDS", "5")),
+    )
+
+def reads_from_replica(method: str, cookies: dict) -> bool:
+    return method in READ_METHODS and PRIMARY_COOKIE not in cookies
+
+class PrimaryAfterWriteMiddleware:
+    """Marks clients that just wrote so their next reads see their own writes.
+
+    Successful non-read responses get a cookie that expires after
+    DB_READ_AFTER_WRITE_SECONDS; requests carrying it read from the primary.
+    Plain ASGI so streaming responses pass through untouched.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.enabled = bool(replica_urls())
+        self.cookie = f"{PRIMARY_COOKIE}=1; Max-Age={read_after_write_seconds()}; Path=/; HttpOnly; SameSite=Lax"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in READ_METHODS or not self.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                message["headers"] = [*message.get("headers", []), (b"set-cookie", self.cookie.encode())]
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
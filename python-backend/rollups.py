@@ -0,0 +1,274 @@
+import re
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import case, func, null
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from models import Event, MetricRollup
+from sketches import TDigest
+
+GRANULARITIES = ("hour", "day", "month")
+QUANTILES = {"median": 0.5, "p90": 0.9, "p99": 0.99}
+NUMERIC_VALUES = ("count", "sum", "average") + tuple(QUANTILES)
+
+_PERIOD_RE = re.compile(r"^(\d+)([hdwmy])$")
+_PERIOD_UNITS = {"h": timedelta(hours=1), "d": timedelta(days=1), "w": timedelta(weeks=1),
+                 "m": timedelta(days=30), "y": timedelta(days=365)}
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+def as_utc(dt: datetime) -> datetime:
+    """Normalize a datetime to aware UTC (SQLite hands back naive values)"""
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+def parse_period(period: str) -> timedelta:
+    """Parse a period such as 24h, 30d, 12w, 6m or 1y"""
+    match = _PERIOD_RE.match(period.strip().lower())
+    if not match or int(match.group(1)) == 0:
+        raise ValueError(f"Invalid period '{period}', expected e.g. 24h, 30d, 6m, 1y")
+    return int(match.group(1)) * _PERIOD_UNITS[match.group(2)]
+
+def granularity_for(window: timedelta) -> str:
+    """Pick the rollup granularity that keeps a chart at a readable number of bars"""
+    if window <= timedelta(days=2):
+        return "hour"
+    if window <= timedelta(days=92):
+        return "day"
+    return "month"
+
+def bucket_floor(dt: datetime, granularity: str) -> datetime:
+    dt = as_utc(dt)
+    if granularity == "hour":
+        return dt.replace(minute=0, second=0, microsecond=0)
+    if granularity == "day":
+        return dt.replace(hour=0, minute=0, second=0, microsecond=0)
+    if granularity == "month":
+        return dt.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    raise ValueError(f"Unknown granularity '{granularity}'")
+
+def bucket_label(bucket: datetime, granularity: str) -> str:
+    if granularity == "hour":
+        return bucket.strftime("%b %d %H:00")
+    if granularity == "day":
+        return bucket.strftime("%b %d")
+    return bucket.strftime("%b %Y")
+
+def _insert_for(db: Session):
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert
+    if dialect == "sqlite":
+        return sqlite.insert
+    raise RuntimeError(f"Rollup upserts are not supported on '{dialect}'")
+
+def record_events(db: Session, events: List[dict]) -> int:
+    """Append raw events and fold them into the hour/day/month rollups in one transaction.
+
+    Deltas and sketches are pre-aggregated in memory so a batch costs one
+    upsert plus one sketch merge per touched bucket rather than one per event.
+    The caller owns the commit.
+    """
+    if not events:
+        return 0
+
+    rows = []
+    deltas: Dict[Tuple, Dict[str, float]] = defaultdict(lambda: {"count": 0, "sum": 0.0, "min": None, "max": None})
+    digests: Dict[Tuple, TDigest] = defaultdict(TDigest)
+    for event in events:
+        occurred_at = as_utc(event.get("occurred_at") or utcnow())
+        row = {
+            "metric": event["metric"],
+            "value": float(event.get("value", 1.0)),
+            "channel": event.get("channel") or "all",
+            "topic": event.get("topic") or "all",
+            "occurred_at": occurred_at,
+        }
+        rows.append(row)
+        for granularity in GRANULARITIES:
+            key = (granularity, bucket_floor(occurred_at, granularity), row["metric"], row["channel"], row["topic"])
+            delta = deltas[key]
+            delta["count"] += 1
+            delta["sum"] += row["value"]
+            delta["min"] = row["value"] if delta["min"] is None else min(delta["min"], row["value"])
+            delta["max"] = row["value"] if delta["max"] is None else max(delta["max"], row["value"])
+            digests[key].add(row["value"])
+
+    db.execute(Event.__table__.insert(), rows)
+
+    insert = _insert_for(db)
+    table = MetricRollup.__table__
+    for key, delta in deltas.items():
+        granularity, bucket_start, metric, channel, topic = key
+        stmt = insert(table).values(
+            granularity=granularity, bucket_start=bucket_start, metric=metric,
+            channel=channel, topic=topic, **delta,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["granularity", "metric", "bucket_start", "channel", "topic"],
+            set_={
+                "count": table.c.count + stmt.excluded.count,
+                "sum": table.c.sum + stmt.excluded.sum,
+                "min": case((stmt.excluded.min < table.c.min, stmt.excluded.min), else_=table.c.min),
+                "max": case((stmt.excluded.max > table.c.max, stmt.excluded.max), else_=table.c.max),
+            },
+        )
+        db.execute(stmt)
+        _merge_sketch(db, key, digests[key])
+    return len(rows)
+
+def _merge_sketch(db: Session, key: Tuple, digest: TDigest) -> None:
+    """Fold a batch digest into the stored bucket sketch.
+
+    The preceding upsert already holds the row lock on Postgres (SQLite
+    serializes writers), so the read-merge-write cannot interleave with
+    another writer touching the same bucket.
+    """
+    granularity, bucket_start, metric, channel, topic = key
+    rollup = db.query(MetricRollup).filter(
+        MetricRollup.granularity == granularity,
+        MetricRollup.metric == metric,
+        MetricRollup.bucket_start == bucket_start,
+        MetricRollup.channel == channel,
+        MetricRollup.topic == topic,
+    ).with_for_update().one()
+    rollup.sketch = TDigest.from_json(rollup.sketch).merge(digest).to_json()
+    db.flush()
+
+def _finalize(numeric_value: str, count: int, total: float, digest: Optional[TDigest] = None) -> float:
+    if numeric_value == "count":
+        return count
+    if numeric_value == "sum":
+        return round(total, 4)
+    if numeric_value == "average":
+        return round(total / count, 4) if count else 0
+    if numeric_value in QUANTILES:
+        value = digest.quantile(QUANTILES[numeric_value]) if digest else None
+        return round(value, 4) if value is not None else 0
+    raise ValueError(f"Unknown numericValue '{numeric_value}'")
+
+def _apply_dimension_filters(query, model, channel: str, topic: str):
+    if channel and channel != "all":
+        query = query.filter(model.channel == channel)
+    if topic and topic != "all":
+        query = query.filter(model.topic == topic)
+    return query
+
+def query_chart(
+    db: Session,
+    metric: str,
+    numeric_value: str,
+    period: str,
+    chart_type: str = "bar",
+    channel: str = "all",
+    topic: str = "all",
+    group_by: str = "channel",
+    now: Optional[datetime] = None,
+) -> List[dict]:
+    """Aggregate a metric over a trailing period; see query_chart_values"""
+    return query_chart_values(
+        db, metric, [numeric_value], period, chart_type=chart_type,
+        channel=channel, topic=topic, group_by=group_by, now=now,
+    )[numeric_value]
+
+def query_chart_values(
+    db: Session,
+    metric: str,
+    numeric_values: List[str],
+    period: str,
+    chart_type: str = "bar",
+    channel: str = "all",
+    topic: str = "all",
+    group_by: str = "channel",
+    now: Optional[datetime] = None,
+) -> Dict[str, List[dict]]:
+    """Aggregate a metric over a trailing period, once for several numericValues.
+
+    Closed buckets are read from the rollup table. Only the unfinished current
+    bucket is aggregated from raw events. Bar charts return one point per
+    bucket; pie charts return one slice per ``group_by`` value (channel or topic).
+    The first bucket is included whole even when the window starts inside it.
+    median/p90/p99 merge the per-bucket t-digests instead of sorting raw rows.
+    Every requested numericValue is finalized from the same pass, so charts
+    sharing a metric and period cost one set of queries.
+    """
+    now = as_utc(now or utcnow())
+    window = parse_period(period)
+    granularity = granularity_for(window)
+    first_bucket = bucket_floor(now - window, granularity)
+    current_bucket = bucket_floor(now, granularity)
+
+    if chart_type == "pie":
+        rollup_key = getattr(MetricRollup, group_by)
+        event_key = getattr(Event, group_by)
+    else:
+        rollup_key = MetricRollup.bucket_start
+        event_key = Event.occurred_at
+    quantile = any(numeric_value in QUANTILES for numeric_value in numeric_values)
+
+    # key -> [count, sum, merged sketch]
+    totals: Dict[object, list] = defaultdict(lambda: [0, 0.0, TDigest()])
+
+    def normalize(key):
+        if chart_type == "pie":
+            return key
+        return bucket_floor(key, granularity)
+
+    if quantile:
+        # Sketches are merged in Python, one row per channel x topic x bucket.
+        rollups = db.query(rollup_key, MetricRollup.count, MetricRollup.sum, MetricRollup.sketch)
+    else:
+        rollups = db.query(rollup_key, func.sum(MetricRollup.count), func.sum(MetricRollup.sum), null())
+    rollups = rollups.filter(
+        MetricRollup.granularity == granularity,
+        MetricRollup.metric == metric,
+        MetricRollup.bucket_start >= first_bucket,
+        MetricRollup.bucket_start < current_bucket,
+    )
+    rollups = _apply_dimension_filters(rollups, MetricRollup, channel, topic)
+    if not quantile:
+        rollups = rollups.group_by(rollup_key)
+    for key, count, total, sketch in rollups:
+        entry = totals[normalize(key)]
+        entry[0] += count or 0
+        entry[1] += total or 0.0
+        if sketch:
+            entry[2].merge(TDigest.from_json(sketch))
+
+    live_filters = (Event.metric == metric, Event.occurred_at >= current_bucket, Event.occurred_at <= now)
+    if quantile:
+        # The current bucket is bounded, so its raw values feed the sketch directly.
+        live = db.query(event_key, Event.value).filter(*live_filters)
+        for key, value in _apply_dimension_filters(live, Event, channel, topic):
+            entry = totals[normalize(key)]
+            entry[0] += 1
+            entry[1] += value
+            entry[2].add(value)
+    else:
+        live = db.query(func.count(Event.id), func.sum(Event.value), *([event_key] if chart_type == "pie" else []))
+        live = _apply_dimension_filters(live.filter(*live_filters), Event, channel, topic)
+        if chart_type == "pie":
+            live = live.group_by(event_key)
+        for count, total, *key in live:
+            if count:
+                entry = totals[key[0] if key else current_bucket]
+                entry[0] += count
+                entry[1] += total or 0.0
+
+    results = {}
+    for numeric_value in numeric_values:
+        data = []
+        for key in sorted(totals):
+            count, total, digest = totals[key]
+            value = _finalize(numeric_value, int(count), total, digest)
+            if chart_type == "pie":
+                data.append({"id": key, "label": key, "value": value})
+            else:
+                data.append({"id": key.isoformat(), "label": bucket_label(key, granularity), "value": value})
+        results[numeric_value] = data
+    return results
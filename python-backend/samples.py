@@ -0,0 +1,262 @@
+import asyncio
+import re
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import Integer, bindparam, case, cast, delete, func, select, text, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from bulk import BULK_CHUNK_SIZE
+from models import Metric, MetricSample
+from rollups import as_utc, utcnow
+
+MAX_POINTS = 1000
+
+# Monthly partitions kept ready beyond the current month, checked every PARTITION_CHECK_SECONDS.
+PARTITION_MONTHS_AHEAD = 2
+PARTITION_CHECK_SECONDS = 6 * 3600
+_PARTITION_LOCK_KEY = 7_245_003
+
+# How far back `change` looks for each metric timeframe.
+TIMEFRAME_WINDOWS = {
+    "today": timedelta(days=1),
+    "week": timedelta(weeks=1),
+    "month": timedelta(days=30),
+    "quarter": timedelta(days=91),
+    "year": timedelta(days=365),
+}
+DEFAULT_WINDOW = TIMEFRAME_WINDOWS["month"]
+
+_NUMBER_RE = re.compile(r"^[^\d+\-.]*([+-]?[\d,]*\.?\d+)\s*([kmb])?\b", re.IGNORECASE)
+_SUFFIXES = {"k": 1e3, "m": 1e6, "b": 1e9}
+_CURRENCY = "$€£¥₹"
+# Readings from here up are written with a K/M/B scale ("$45.2K"), below it in full ("2,847").
+SCALE_FROM = 10_000
+
+def parse_numeric(value) -> Optional[float]:
+    """Numeric reading of a display value such as "$45.2K", "2,847" or "3.2%" (None if there is none)"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = _NUMBER_RE.match(str(value).strip())
+    if not match:
+        return None
+    number = float(match.group(1).replace(",", ""))
+    if match.group(2):
+        number *= _SUFFIXES[match.group(2).lower()]
+    return number
+
+def display_value(number: float, like: Optional[str]) -> str:
+    """``number`` written by its own magnitude, with the currency or percent sign of ``like``.
+
+    "$50K" and 10 give "$10", "$45.2K" and 47300 give "$47.3K", "3.2%" and 3.5
+    give "3.5%". Below SCALE_FROM the number is written out with separators
+    and up to 2 decimals ("2,847"); from there it gets 1 decimal and a K, M or
+    B scale. Percentages are never scaled.
+    """
+    text = (like or "").strip()
+    match = _NUMBER_RE.match(text)
+    currency = "".join(char for char in text[:match.start(1)] if char in _CURRENCY) if match else ""
+    percent = bool(match) and "%" in text[match.end(1):]
+    magnitude, scale, decimals = abs(number), "", 2
+    if not percent and magnitude >= SCALE_FROM:
+        scale = next(suffix for suffix in ("b", "m", "k") if round(magnitude / _SUFFIXES[suffix], 1) >= 1)
+        magnitude, decimals = magnitude / _SUFFIXES[scale], 1
+    formatted = f"{magnitude:,.{decimals}f}".rstrip("0").rstrip(".")
+    return f"{'-' if number < 0 and formatted != '0' else ''}{currency}{formatted}{scale.upper()}{'%' if percent else ''}"
+
+def samples_for(values) -> List[dict]:
+    """Sample rows for (metric_id, display value) pairs whose value reads as a number"""
+    samples = []
+    for metric_id, value in values:
+        numeric = parse_numeric(value) if value is not None else None
+        if numeric is not None:
+            samples.append({"metric_id": metric_id, "value": numeric})
+    return samples
+
+def _month_start(dt: datetime) -> datetime:
+    return dt.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+def _next_month(dt: datetime) -> datetime:
+    return _month_start(dt.replace(day=28) + timedelta(days=4))
+
+def _create_partition(conn, start: datetime) -> None:
+    """Attach the partition for the month starting at ``start``, moving its rows out of the default partition.
+
+    A plain CREATE ... PARTITION OF fails once the default partition holds
+    rows of that month, so the table is created detached, filled from the
+    default partition and then attached.
+    """
+    name, end = f"metric_samples_{start:%Y_%m}", _next_month(start)
+    if conn.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar() is not None:
+        return
+    bounds = {"start": start, "end": end}
+    conn.execute(text(f"CREATE TABLE {name} (LIKE metric_samples INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    moved = conn.execute(text(
+        f"WITH moved AS (DELETE FROM metric_samples_default WHERE recorded_at >= :start AND recorded_at < :end "
+        f"RETURNING metric_id, recorded_at, value) "
+        f"INSERT INTO {name} (metric_id, recorded_at, value) SELECT metric_id, recorded_at, value FROM moved"
+    ), bounds).rowcount
+    conn.execute(text(
+        f"ALTER TABLE metric_samples ATTACH PARTITION {name} FOR VALUES FROM ('{start:%Y-%m-%d}') TO ('{end:%Y-%m-%d}')"
+    ))
+    if moved:
+        print(f"🔄 Moved {moved} samples from metric_samples_default into {name}")
+
+def ensure_sample_partitions(engine: Engine, months_ahead: int = PARTITION_MONTHS_AHEAD) -> None:
+    """Create this month's and the next few months' partitions of metric_samples.
+
+    Only Postgres partitions the table. Rows outside every monthly partition
+    land in metric_samples_default, so a missed run never rejects a write,
+    and a later run moves them into their month's partition.
+    """
+    if engine.dialect.name != "postgresql":
+        return
+    with engine.begin() as conn:
+        # Every worker and instance runs this; one at a time.
+        conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _PARTITION_LOCK_KEY})
+        conn.execute(text("CREATE TABLE IF NOT EXISTS metric_samples_default PARTITION OF metric_samples DEFAULT"))
+        start = _month_start(utcnow())
+        for _ in range(months_ahead + 1):
+            _create_partition(conn, start)
+            start = _next_month(start)
+
+async def keep_sample_partitions(engine: Engine) -> None:
+    """Background task: keep partitions PARTITION_MONTHS_AHEAD ahead for instances that run across month ends"""
+    while True:
+        await asyncio.sleep(PARTITION_CHECK_SECONDS)
+        try:
+            await asyncio.to_thread(ensure_sample_partitions, engine)
+        except Exception as e:
+            print(f"❌ Failed to create metric sample partitions: {e}")
+
+def _insert_for(db: AsyncSession):
+    return postgresql.insert if db.bind.dialect.name == "postgresql" else sqlite.insert
+
+async def record_samples(db: AsyncSession, samples: List[dict]) -> None:
+    """Append {metric_id, value, recorded_at} rows; a repeat of the same instant is ignored"""
+    insert = _insert_for(db)
+    now = utcnow()
+    rows = [{"metric_id": sample["metric_id"], "value": float(sample["value"]),
+             "recorded_at": as_utc(sample.get("recorded_at") or now)} for sample in samples]
+    for start in range(0, len(rows), BULK_CHUNK_SIZE):
+        await db.execute(insert(MetricSample.__table__).on_conflict_do_nothing(), rows[start:start + BULK_CHUNK_SIZE])
+
+async def delete_samples(db: AsyncSession, metric_ids: List[str]) -> None:
+    for start in range(0, len(metric_ids), BULK_CHUNK_SIZE):
+        await db.execute(delete(MetricSample).where(MetricSample.metric_id.in_(metric_ids[start:start + BULK_CHUNK_SIZE])))
+
+async def refresh_changes(db: AsyncSession, metric_ids: List[str]) -> None:
+    """Recompute metrics.change / change_type from history for metrics with enough of it.
+
+    The latest sample is compared with the newest one at least the metric's
+    timeframe window older, or the oldest one when history is shorter. A
+    chunk of metrics costs one windowed query, which picks both per metric,
+    and one executemany UPDATE. Callers pass only metrics whose history or
+    timeframe just changed.
+    """
+    metrics = Metric.__table__
+    at = _epoch_seconds(db, MetricSample.recorded_at)
+    window = case(
+        *[(Metric.timeframe == timeframe, span.total_seconds()) for timeframe, span in TIMEFRAME_WINDOWS.items()],
+        else_=DEFAULT_WINDOW.total_seconds(),
+    )
+    for start in range(0, len(metric_ids), BULK_CHUNK_SIZE):
+        history = (
+            select(
+                MetricSample.metric_id,
+                MetricSample.value,
+                at.label("at"),
+                func.max(at).over(partition_by=MetricSample.metric_id).label("latest_at"),
+                func.first_value(MetricSample.value).over(
+                    partition_by=MetricSample.metric_id, order_by=MetricSample.recorded_at.desc()
+                ).label("latest_value"),
+                window.label("window"),
+            )
+            .join(Metric, Metric.id == MetricSample.metric_id)
+            .where(MetricSample.metric_id.in_(metric_ids[start:start + BULK_CHUNK_SIZE]))
+            .subquery()
+        )
+        # Baseline candidates first (newest first), then the rest oldest first: row 1 is the baseline.
+        old_enough = history.c.at <= history.c.latest_at - history.c.window
+        ranked = select(
+            history.c.metric_id, history.c.value, history.c.at, history.c.latest_at, history.c.latest_value,
+            func.row_number().over(
+                partition_by=history.c.metric_id,
+                order_by=(case((old_enough, 0), else_=1), case((old_enough, -history.c.at), else_=history.c.at)),
+            ).label("pick"),
+        ).subquery()
+        changes = []
+        for metric_id, value, at_seconds, latest_at, latest_value in await db.execute(
+            select(ranked.c.metric_id, ranked.c.value, ranked.c.at, ranked.c.latest_at, ranked.c.latest_value)
+            .where(ranked.c.pick == 1)
+        ):
+            if at_seconds == latest_at or value == 0:
+                continue
+            change = round((latest_value - value) / abs(value) * 100, 2)
+            change_type = "positive" if change > 0 else "negative" if change < 0 else "neutral"
+            changes.append({"_id": metric_id, "change": change, "change_type": change_type})
+        if changes:
+            await db.execute(update(metrics).where(metrics.c.id == bindparam("_id")), changes)
+
+async def latest_reading(db: AsyncSession, metric_id: str) -> Optional[float]:
+    """A metric's newest sample value: one seek on the (metric_id, recorded_at) primary key"""
+    return await db.scalar(
+        select(MetricSample.value).where(MetricSample.metric_id == metric_id).order_by(MetricSample.recorded_at.desc()).limit(1)
+    )
+
+def _epoch_seconds(db: AsyncSession, column):
+    if db.bind.dialect.name == "postgresql":
+        return func.extract("epoch", column)
+    return (func.julianday(column) - 2440587.5) * 86400.0
+
+async def query_samples(
+    db: AsyncSession,
+    metric_id: str,
+    start: datetime,
+    end: datetime,
+    points: int = 100,
+) -> Dict[str, object]:
+    """Samples in [start, end) downsampled to at most ``points`` buckets of min/max/avg.
+
+    Buckets are equal slices of the range computed in SQL, so the rows read
+    are bounded by the range (one partition on Postgres for month-sized
+    windows) and the rows returned by ``points``.
+    """
+    start, end = as_utc(start), as_utc(end)
+    points = max(1, min(points, MAX_POINTS))
+    bucket_seconds = max((end - start).total_seconds() / points, 1.0)
+    offset = (_epoch_seconds(db, MetricSample.recorded_at) - start.timestamp()) / bucket_seconds
+    bucket = func.floor(offset) if db.bind.dialect.name == "postgresql" else cast(offset, Integer)
+
+    rows = (await db.execute(
+        select(
+            bucket.label("bucket"),
+            func.min(MetricSample.value),
+            func.max(MetricSample.value),
+            func.avg(MetricSample.value),
+            func.count(),
+        )
+        .where(MetricSample.metric_id == metric_id, MetricSample.recorded_at >= start, MetricSample.recorded_at < end)
+        # By label, so Postgres sees one expression rather than two with separate binds.
+        .group_by("bucket")
+        .order_by("bucket")
+    )).all()
+
+    return {
+        "metric_id": metric_id,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "bucket_seconds": bucket_seconds,
+        "points": [
+            {
+                "t": (start + timedelta(seconds=int(index) * bucket_seconds)).isoformat(),
+                "min": minimum,
+                "max": maximum,
+                "avg": average,
+                "count": count,
+            }
+            for index, minimum, maximum, average, count in rows
+        ],
+    }
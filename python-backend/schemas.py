@@ -1,15 +1,29 @@
-from pydantic import BaseModel
-from typing import Optional, List, TypeVar, Generic
-from datetime import datetime
+from pydantic import AfterValidator, BaseModel
+from typing import Annotated, Optional, List, TypeVar, Generic
+from datetime import datetime, timedelta, timezone
 
 T = TypeVar('T')
 
+# How far ahead of the server clock a metric reading may be stamped: clock skew, not months that have no partition yet.
+MAX_SAMPLE_LEAD = timedelta(days=1)
+
+def _not_far_future(value: datetime) -> datetime:
+    if (value if value.tzinfo else value.replace(tzinfo=timezone.utc)) > datetime.now(timezone.utc) + MAX_SAMPLE_LEAD:
+        raise ValueError("must not be more than a day in the future")
+    return value
+
+SampleTime = Annotated[datetime, AfterValidator(_not_far_future)]
+
 class PaginatedResponse(BaseModel, Generic[T]):
     items: List[T]
-    total: int
+    total: Optional[int] = None  # omitted when include_total=false
     page: int
     limit: int
-    total_pages: int
+    total_pages: Optional[int] = None
+    next_cursor: Optional[str] = None  # opaque; pass back as cursor= for the next page
+
+class BulkDeleteRequest(BaseModel):
+    ids: List[str]
 
 # Chart schemas
 class ChartBase(BaseModel):
@@ -25,6 +39,9 @@ class ChartBase(BaseModel):
 class ChartCreate(ChartBase):
     pass
 
+class ChartImport(ChartCreate):
+    created_at: Optional[datetime] = None  # keeps a historical row's original time; defaults to now
+
 class ChartUpdate(ChartBase):
     id: str
     title: Optional[str] = None
@@ -55,6 +72,9 @@ class MetricBase(BaseModel):
 class MetricCreate(MetricBase):
     pass
 
+class MetricImport(MetricCreate):
+    created_at: Optional[SampleTime] = None  # keeps a historical row's original time (also its first sample's); defaults to now
+
 class MetricUpdate(MetricBase):
     id: str
     title: Optional[str] = None
@@ -68,6 +88,10 @@ class MetricResponse(MetricBase):
     class Config:
         from_attributes = True
 
+class MetricSampleCreate(BaseModel):
+    value: float
+    recorded_at: Optional[SampleTime] = None  # defaults to now
+
 # Priority schemas
 class PriorityBase(BaseModel):
     title: str
@@ -84,6 +108,9 @@ class PriorityBase(BaseModel):
 class PriorityCreate(PriorityBase):
     pass
 
+class PriorityImport(PriorityCreate):
+    created_at: Optional[datetime] = None  # keeps a historical row's original time; defaults to now
+
 class PriorityUpdate(PriorityBase):
     id: str
     title: Optional[str] = None
@@ -93,6 +120,7 @@ class PriorityUpdate(PriorityBase):
 
 class PriorityResponse(PriorityBase):
     id: str
+    rank_score: int = 0  # higher ranks first; see ranking.py
     created_at: datetime
     updated_at: Optional[datetime] = None
 
@@ -114,6 +142,9 @@ class RecommendationBase(BaseModel):
 class RecommendationCreate(RecommendationBase):
     pass
 
+class RecommendationImport(RecommendationCreate):
+    created_at: Optional[datetime] = None  # keeps a historical row's original time; defaults to now
+
 class RecommendationUpdate(RecommendationBase):
     id: str
     text: Optional[str] = None
@@ -122,8 +153,17 @@ class RecommendationUpdate(RecommendationBase):
 
 class RecommendationResponse(RecommendationBase):
     id: str
+    rank_score: int = 0  # higher ranks first; see ranking.py
     created_at: datetime
     updated_at: Optional[datetime] = None
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+# Event schemas
+class EventCreate(BaseModel):
+    metric: str
+    value: Optional[float] = 1.0
+    channel: Optional[str] = "all"
+    topic: Optional[str] = "all"
+    occurred_at: Optional[datetime] = None
@@ -0,0 +1,110 @@
+import re
+from typing import List
+
+from fastapi import HTTPException
+from sqlalchemy import Connection, Select, column, func, literal_column, select, table, text
+
+# Indexed text columns per table; the first one weighs more in the ranking.
+SEARCH_COLUMNS = {
+    "priorities": ("title", "description"),
+    "recommendations": ("text", "description"),
+}
+MAX_TERMS = 8
+
+_TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+def create_search_indexes(conn: Connection):
+    """Inverted indexes behind the search endpoints.
+
+    Postgres gets a stored, weighted tsvector column with a GIN index.
+    SQLite gets an external-content FTS5 table (with prefix indexes for
+    2-3 character prefixes) kept in sync by triggers, so bulk and ORM writes
+    are indexed alike. It is not stemmed: Porter would rewrite query
+    prefixes ("pay" becomes "pai") and prefix matching already covers
+    inflections. The FTS rows are keyed on <table>_search_keys, an
+    INTEGER PRIMARY KEY per id: the tables' own implicit rowids (their
+    primary key is a string) may be renumbered by VACUUM.
+    """
+    for name, (primary, secondary) in SEARCH_COLUMNS.items():
+        if conn.dialect.name == "postgresql":
+            conn.execute(text(
+                f"ALTER TABLE {name} ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ("
+                f"setweight(to_tsvector('english', coalesce({primary}, '')), 'A') || "
+                f"setweight(to_tsvector('english', coalesce({secondary}, '')), 'B')) STORED"
+            ))
+            conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{name}_search ON {name} USING GIN (search_vector)"))
+            continue
+
+        fts, keys = f"{name}_fts", f"{name}_search_keys"
+        conn.execute(text(f"CREATE TABLE IF NOT EXISTS {keys} (key INTEGER PRIMARY KEY, id TEXT NOT NULL UNIQUE)"))
+        conn.execute(text(
+            f"CREATE VIEW IF NOT EXISTS {name}_search_content AS "
+            f"SELECT {keys}.key, {name}.{primary}, {name}.{secondary} FROM {keys} JOIN {name} ON {name}.id = {keys}.id"
+        ))
+        conn.execute(text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({primary}, {secondary}, "
+            f"content='{name}_search_content', content_rowid='key', tokenize='unicode61', prefix='2 3')"
+        ))
+        old_key, new_key = (f"(SELECT key FROM {keys} WHERE id = {row}.id)" for row in ("old", "new"))
+        old_row = f"INSERT INTO {fts}({fts}, rowid, {primary}, {secondary}) VALUES ('delete', {old_key}, old.{primary}, old.{secondary});"
+        new_row = f"INSERT INTO {fts}(rowid, {primary}, {secondary}) VALUES ({new_key}, new.{primary}, new.{secondary});"
+        conn.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {name} "
+            f"BEGIN INSERT INTO {keys}(id) VALUES (new.id); {new_row} END"
+        ))
+        conn.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {name} "
+            f"BEGIN {old_row} DELETE FROM {keys} WHERE id = old.id; END"
+        ))
+        conn.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {primary}, {secondary} ON {name} "
+            f"BEGIN {old_row} {new_row} END"
+        ))
+        conn.execute(text(f"INSERT OR IGNORE INTO {keys}(id) SELECT id FROM {name}"))
+        conn.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+
+def drop_search_indexes(conn: Connection):
+    """Remove the SQLite full-text tables and triggers, so create_search_indexes builds them afresh"""
+    if conn.dialect.name == "postgresql":
+        return
+    for name in SEARCH_COLUMNS:
+        fts = f"{name}_fts"
+        for trigger in ("ai", "ad", "au"):
+            conn.execute(text(f"DROP TRIGGER IF EXISTS {fts}_{trigger}"))
+        conn.execute(text(f"DROP TABLE IF EXISTS {fts}"))
+        conn.execute(text(f"DROP VIEW IF EXISTS {name}_search_content"))
+        conn.execute(text(f"DROP TABLE IF EXISTS {name}_search_keys"))
+
+def search_terms(q: str) -> List[str]:
+    terms = _TERM_RE.findall(q.lower())[:MAX_TERMS]
+    if not terms:
+        raise HTTPException(status_code=400, detail="Search query needs at least one word")
+    return terms
+
+def search_select(dialect: str, model, columns: list, terms: List[str]) -> Select:
+    """SELECT ``columns`` plus a ``score`` for rows matching every term as a prefix, best first.
+
+    Callers add their filters to the returned statement; ordering and the
+    match condition are already in place.
+    """
+    name = model.__tablename__
+    if dialect == "postgresql":
+        vector = literal_column(f"{name}.search_vector")
+        query = func.to_tsquery("english", " & ".join(f"{term}:*" for term in terms))
+        score = func.ts_rank_cd(vector, query)
+        return (
+            select(*columns, score.label("score"))
+            .where(vector.op("@@")(query))
+            .order_by(score.desc(), model.id)
+        )
+
+    fts = table(f"{name}_fts", column("rowid"))
+    keys = table(f"{name}_search_keys", column("key"), column("id"))
+    # bm25 is lower-is-better; negate it so both backends report higher scores for better matches.
+    score = -func.bm25(literal_column(fts.name), 10.0, 5.0)
+    return (
+        select(*columns, score.label("score"))
+        .select_from(model.__table__.join(keys, keys.c.id == model.id).join(fts, fts.c.rowid == keys.c.key))
+        .where(literal_column(fts.name).op("MATCH")(" ".join(f'"{term}"*' for term in terms)))
+        .order_by(score.desc(), model.id)
+    )
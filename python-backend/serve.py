@@ -0,0 +1,46 @@
+"""Serve the API with one uvicorn worker process per available CPU.
+
+    python serve.py                     # WEB_CONCURRENCY workers, default: one per CPU (affinity and cgroup quota)
+    WEB_CONCURRENCY=4 PORT=8000 python serve.py
+
+Workers share the listening socket, and a state directory for what has to be
+coordinated between them (workers.py): response cache write counters, change
+stream relay sockets, Prometheus metrics and worker indexes. Each run gets a
+fresh directory unless WORKER_STATE_DIR names one. The pool
+budget (DB_MAX_CONNECTIONS) is split across them.
+"""
+import os
+import shutil
+import tempfile
+
+import uvicorn
+
+from workers import available_cpus, prune_state
+
+def main():
+    workers = int(os.getenv("WEB_CONCURRENCY") or available_cpus())
+    # Every worker reads these: pool sizing divides by WEB_CONCURRENCY, and the shared state lives in the directory.
+    os.environ["WEB_CONCURRENCY"] = str(workers)
+    created = None
+    if os.getenv("WORKER_STATE_DIR"):
+        # A directory kept across runs: drop the files of the previous run's workers before new ones start.
+        os.makedirs(os.environ["WORKER_STATE_DIR"], mode=0o700, exist_ok=True)
+        prune_state(os.environ["WORKER_STATE_DIR"])
+    elif workers > 1:
+        created = tempfile.mkdtemp(prefix="glanceable-workers-")
+        os.environ["WORKER_STATE_DIR"] = created
+    print(f"✅ Serving with {workers} worker{'s' if workers > 1 else ''}")
+    try:
+        uvicorn.run(
+            "main:app",
+            host="0.0.0.0",
+            port=int(os.getenv("PORT", "8080")),
+            workers=workers,
+            timeout_graceful_shutdown=int(os.getenv("GRACEFUL_SHUTDOWN_SECONDS", "10")),
+        )
+    finally:
+        if created:
+            shutil.rmtree(created, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
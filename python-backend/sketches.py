@@ -0,0 +1,142 @@
+import json
+import math
+from typing import Iterable, List, Optional
+
+DEFAULT_COMPRESSION = 100
+
+class TDigest:
+    """Mergeable quantile sketch (merging t-digest, Dunning & Ertl).
+
+    Values are summarized as weighted centroids whose size is bounded by the
+    k1 scale function, so centroids are small near the tails and larger around
+    the median. With ``compression`` = 100 a digest holds at most ~100
+    centroids (a few KB serialized) no matter how many values it has seen, and
+    merging digests is associative, so per-bucket digests can be combined over
+    any period.
+
+    Error: the rank error of ``quantile(q)`` is roughly
+    ``q * (1 - q) * pi / compression`` relative to the total count, i.e.
+    about ±0.8% of rank at the median and ±0.1% at p99 for the default
+    compression, and it does not grow with the number of values or merges.
+    While every centroid still holds a single value the result interpolates
+    between neighbouring order statistics, e.g. the usual median of an even
+    sample.
+    """
+
+    def __init__(self, compression: int = DEFAULT_COMPRESSION):
+        self.compression = compression
+        self.means: List[float] = []
+        self.weights: List[float] = []
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self._buffer: List[float] = []
+
+    @property
+    def count(self) -> float:
+        return sum(self.weights) + len(self._buffer)
+
+    def add(self, value: float) -> None:
+        value = float(value)
+        self._buffer.append(value)
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        if len(self._buffer) >= 5 * self.compression:
+            self._compress()
+
+    def update(self, values: Iterable[float]) -> "TDigest":
+        for value in values:
+            self.add(value)
+        return self
+
+    def merge(self, other: "TDigest") -> "TDigest":
+        other._compress()
+        if not other.weights:
+            return self
+        self._compress()
+        centroids = sorted(zip(self.means + other.means, self.weights + other.weights))
+        self.means = [mean for mean, _ in centroids]
+        self.weights = [weight for _, weight in centroids]
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+        self._merge_centroids()
+        return self
+
+    def _k(self, q: float) -> float:
+        return self.compression / (2 * math.pi) * math.asin(2 * min(max(q, 0.0), 1.0) - 1)
+
+    def _compress(self) -> None:
+        if not self._buffer:
+            return
+        centroids = sorted(list(zip(self.means, self.weights)) + [(value, 1.0) for value in self._buffer])
+        self._buffer = []
+        self.means = [mean for mean, _ in centroids]
+        self.weights = [weight for _, weight in centroids]
+        self._merge_centroids()
+
+    def _merge_centroids(self) -> None:
+        total = sum(self.weights)
+        if total == 0:
+            return
+        means: List[float] = [self.means[0]]
+        weights: List[float] = [self.weights[0]]
+        seen = 0.0
+        k_lower = self._k(0.0)
+        for mean, weight in zip(self.means[1:], self.weights[1:]):
+            proposed = weights[-1] + weight
+            if self._k((seen + proposed) / total) - k_lower <= 1:
+                means[-1] += (mean - means[-1]) * weight / proposed
+                weights[-1] = proposed
+            else:
+                seen += weights[-1]
+                k_lower = self._k(seen / total)
+                means.append(mean)
+                weights.append(weight)
+        self.means, self.weights = means, weights
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate the value at quantile ``q`` (0..1); None when empty"""
+        self._compress()
+        if not self.weights:
+            return None
+        if len(self.weights) == 1:
+            return self.means[0]
+        q = min(max(q, 0.0), 1.0)
+        total = sum(self.weights)
+        target = q * total
+
+        # Centroid i is centred at cumulative weight before it plus half its own.
+        cumulative = 0.0
+        prev_center, prev_mean = 0.0, self.min
+        for mean, weight in zip(self.means, self.weights):
+            center = cumulative + weight / 2
+            if target < center:
+                span = center - prev_center
+                fraction = (target - prev_center) / span if span else 0.0
+                return prev_mean + (mean - prev_mean) * fraction
+            cumulative += weight
+            prev_center, prev_mean = center, mean
+        span = total - prev_center
+        fraction = (target - prev_center) / span if span else 1.0
+        return prev_mean + (self.max - prev_mean) * fraction
+
+    def to_json(self) -> str:
+        self._compress()
+        return json.dumps({
+            "c": self.compression,
+            "m": [round(mean, 6) for mean in self.means],
+            "w": self.weights,
+            "min": self.min,
+            "max": self.max,
+        }, separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, data: Optional[str]) -> "TDigest":
+        if not data:
+            return cls()
+        raw = json.loads(data)
+        digest = cls(raw.get("c", DEFAULT_COMPRESSION))
+        digest.means = raw["m"]
+        digest.weights = raw["w"]
+        digest.min = raw["min"]
+        digest.max = raw["max"]
+        return digest
@@ -0,0 +1,28 @@
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@pytest.fixture(scope="session")
+def database_path(tmp_path_factory):
+    """One SQLite file for the session; engines read DATABASE_URL on first use."""
+    path = tmp_path_factory.mktemp("db") / "glanceable.db"
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    return path
+
+@pytest.fixture(scope="session")
+def client(database_path):
+    from fastapi.testclient import TestClient
+    import main
+
+    with TestClient(main.app) as client:
+        yield client
+
+@pytest.fixture
+def sqlite(database_path):
+    connection = sqlite3.connect(database_path)
+    yield connection
+    connection.close()
@@ -0,0 +1,13 @@
+def test_write_moves_the_etag_once_committed(client):
+    first = client.get("/api/user/charts", params={"topic": "etags"})
+    assert client.get("/api/user/charts", params={"topic": "etags"},
+                      headers={"If-None-Match": first.headers["etag"]}).status_code == 304
+
+    created = client.post("/api/user/charts", json={"title": "Versioned", "chart_type": "bar", "numeric_value": "1",
+                                                     "metric": "Views", "topic": "etags"})
+    assert created.status_code == 200
+
+    after = client.get("/api/user/charts", params={"topic": "etags"}, headers={"If-None-Match": first.headers["etag"]})
+    assert after.status_code == 200
+    assert after.headers["etag"] != first.headers["etag"]
+    assert [item["title"] for item in after.json()["items"]] == ["Versioned"]
@@ -0,0 +1,29 @@
+import io
+
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+@pytest.fixture(scope="module")
+def exported_charts(client):
+    for i in range(3):
+        response = client.post("/api/user/charts", json={"title": f"Exported {i}", "chart_type": "bar", "numeric_value": "1",
+                                                          "metric": "Views", "topic": "export"})
+        assert response.status_code == 200
+    return {"topic": "export", "fields": "title,created_at"}
+
+def test_parquet_export(client, exported_charts):
+    response = client.get("/api/user/charts/export", params={**exported_charts, "format": "parquet"})
+
+    assert response.status_code == 200
+    table = pq.read_table(io.BytesIO(response.content))
+    assert table.column("title").to_pylist() == ["Exported 0", "Exported 1", "Exported 2"]
+    assert table.schema.field("created_at").type == pa.timestamp("us", tz="UTC")
+
+def test_arrow_export(client, exported_charts):
+    response = client.get("/api/user/charts/export", params={**exported_charts, "format": "arrow"})
+
+    assert response.status_code == 200
+    table = pa.ipc.open_stream(response.content).read_all()
+    assert table.column("title").to_pylist() == ["Exported 0", "Exported 1", "Exported 2"]
@@ -0,0 +1,18 @@
+def _chart(client, channel, topic):
+    response = client.post("/api/user/charts", json={"title": f"{channel} {topic}", "chart_type": "bar",
+                                                      "numeric_value": "1", "metric": "Views", "timeframe": "facets",
+                                                      "channel": channel, "topic": topic})
+    assert response.status_code == 200
+
+def test_active_filter_keeps_sibling_counts(client):
+    for channel, topic in [("web", "sales"), ("web", "sales"), ("web", "support"), ("email", "sales")]:
+        _chart(client, channel, topic)
+
+    body = client.get("/api/user/charts/facets", params={"timeframe": "facets", "channel": "web"}).json()
+
+    assert body["total"] == 3
+    # Counted without the channel filter, so email is still offered with its count...
+    assert body["facets"]["channel"] == {"web": 3, "email": 1}
+    # ...while the other dimensions are narrowed by it.
+    assert body["facets"]["topic"] == {"sales": 2, "support": 1}
+    assert body["facets"]["timeframe"] == {"facets": 3}
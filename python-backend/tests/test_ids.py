@@ -0,0 +1,29 @@
+from datetime import timedelta
+
+import pytest
+
+import ids
+
+def test_new_id_reclaims_a_lease_about_to_expire(client):
+    ids.generator.expires_at = ids._utcnow() + ids.LEASE_SAFETY_MARGIN / 2
+
+    ids.new_id()
+
+    assert ids.generator.expires_at > ids._utcnow() + ids.LEASE_TTL - timedelta(minutes=1)
+
+def test_new_ids_refuses_without_a_lease_to_renew(client, monkeypatch):
+    monkeypatch.setattr(ids, "_lease_engine", None)
+    monkeypatch.setattr(ids.generator, "expires_at", ids._utcnow())
+
+    with pytest.raises(RuntimeError, match="expired"):
+        ids.new_ids(3)
+
+def test_pinned_worker_id_must_fit_with_the_worker_index(client, monkeypatch):
+    monkeypatch.setenv("WORKER_ID", str(ids.MAX_WORKER_ID))
+    monkeypatch.setattr(ids, "worker_index", lambda: 1)
+    worker_id = ids.generator.worker_id
+
+    with pytest.raises(RuntimeError, match="outside"):
+        ids.claim_worker_id(None)
+
+    assert ids.generator.worker_id == worker_id
@@ -0,0 +1,46 @@
+import orjson
+
+from migrations import _created_at_microseconds
+from database import get_engine
+
+def _page_ids(client, topic, limit=2):
+    ids, cursor = [], ""
+    for _ in range(20):
+        body = client.get("/api/user/charts", params={"topic": topic, "limit": limit, "cursor": cursor}).json()
+        ids += [item["id"] for item in body["items"]]
+        cursor = body["next_cursor"]
+        if not cursor:
+            return ids
+    raise AssertionError(f"next_cursor never ran out, seen {ids}")
+
+def _import(client, rows):
+    body = b"".join(orjson.dumps(row) + b"\n" for row in rows)
+    response = client.post("/api/user/charts/import", content=body)
+    assert response.status_code == 200, response.text
+
+def test_cursor_pages_whole_second_timestamps(client):
+    # Microsecond 0 used to be bound as "...:00" while stored as "...:00.000000", repeating the page forever.
+    _import(client, [{"title": f"Whole second {i}", "chart_type": "bar", "numeric_value": "1", "metric": "Views", "topic": "whole-seconds",
+                      "created_at": f"2024-01-01T00:00:0{i // 2}"} for i in range(5)])
+
+    ids = _page_ids(client, "whole-seconds")
+
+    assert len(ids) == 5
+    assert len(set(ids)) == 5
+
+def test_cursor_pages_rows_from_the_server_default(client, sqlite):
+    _import(client, [{"title": "Imported", "chart_type": "bar", "numeric_value": "1", "metric": "Views", "topic": "server-default",
+                      "created_at": "2024-02-01T00:00:00.5"}])
+    # How CURRENT_TIMESTAMP spelled created_at before every writer set it.
+    sqlite.executemany(
+        "INSERT INTO charts (id, title, chart_type, numeric_value, metric, topic, created_at)"
+        " VALUES (?, ?, 'bar', '1', 'Views', 'server-default', ?)",
+        [(f"legacy-{i}", f"Legacy {i}", "2024-02-01 00:00:00") for i in range(3)])
+    sqlite.commit()
+    with get_engine().begin() as conn:
+        _created_at_microseconds(conn)
+
+    ids = _page_ids(client, "server-default")
+
+    assert sorted(ids[:3]) == ["legacy-0", "legacy-1", "legacy-2"]
+    assert len(ids) == 4
@@ -0,0 +1,109 @@
+"""Query-plan regression test for the /api/user/* filter combinations.
+
+Seeds representative data (benchmarks/seed.py), refreshes the planner's
+statistics and runs EXPLAIN with default settings for every combination of
+filters each list endpoint accepts, and for ``top=N`` unfiltered and under
+the full timeframe/channel/topic filter. A list plan fails if it reads the
+table without an index; an ordered index walk that skips non-matching rows
+passes, as the planner only picks it when matches are common enough for
+LIMIT to stop it early. A ``top=N`` plan must walk a rank index, without a
+sort.
+
+Runs against a temporary SQLite file; set PLAN_CHECK_DATABASE_URL to a
+scratch Postgres database to check Postgres (it gets seeded).
+"""
+import json
+import os
+import re
+import sys
+from itertools import combinations
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from models import Chart, Metric, Priority, Recommendation
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+from seed import seed  # noqa: E402
+
+# Enough rows for the statistics to reflect the seeded value spreads.
+PLAN_ROWS = 20000
+
+# Mirrors the filters applied by the list endpoints in main.py.
+FILTERS = {
+    Chart: {"timeframe": "month", "channel": "web", "topic": "sales", "chart_type": "bar"},
+    Metric: {"timeframe": "month", "channel": "web", "topic": "sales"},
+    Priority: {"timeframe": "month", "channel": "web", "topic": "sales",
+               "status": "pending", "priority": "high", "impact": "high"},
+    Recommendation: {"timeframe": "month", "channel": "web", "topic": "sales",
+                     "urgency": "high", "impact": "high", "category": "feature", "implemented": False},
+}
+
+# Filters a top=N query is checked under, one per rank index: ix_<table>_rank and
+# ix_<table>_timeframe_channel_topic_rank. Narrower filters are left to the planner.
+TOP_FILTERS = ((), ("timeframe", "channel", "topic"))
+
+def _compile(session: Session, model, columns, top: bool = False):
+    query = session.query(model)
+    for column in columns:
+        query = query.filter(getattr(model, column) == FILTERS[model][column])
+    if top:
+        query = query.order_by(model.rank_score.desc(), model.id.desc())
+    else:
+        query = query.order_by(model.created_at, model.id)
+    return str(query.limit(10).statement.compile(session.get_bind(), compile_kwargs={"literal_binds": True}))
+
+def _sqlite_problems(session: Session, sql: str, table: str, index: str, sorts: bool):
+    details = [row[-1] for row in session.execute(text(f"EXPLAIN QUERY PLAN {sql}")).all()]
+    if not any(re.search(rf"\b{index}\b", detail) for detail in details):
+        return details
+    # "SCAN <table>" without an index reads every row; a temp B-tree sorts the matches.
+    return [detail for detail in details
+            if (detail.startswith(f"SCAN {table}") and "INDEX" not in detail) or (sorts and "TEMP B-TREE" in detail)]
+
+def _postgres_problems(session: Session, sql: str, table: str, index: str, sorts: bool):
+    plan = session.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+
+    nodes = []
+    def walk(node):
+        nodes.append(node)
+        for child in node.get("Plans", []):
+            walk(child)
+    walk(plan[0]["Plan"])
+    if not any(re.fullmatch(index, node.get("Index Name", "")) for node in nodes):
+        return [node["Node Type"] for node in nodes]
+    return [f"{node['Node Type']} on {node.get('Relation Name') or node.get('Sort Key')}" for node in nodes
+            if node["Node Type"] == "Seq Scan" or (sorts and node["Node Type"] == "Sort")]
+
+@pytest.fixture(scope="module")
+def seeded_engine(tmp_path_factory):
+    url = os.getenv("PLAN_CHECK_DATABASE_URL") or f"sqlite:///{tmp_path_factory.mktemp('plans') / 'plans.db'}"
+    seed(url, PLAN_ROWS, 0, 0)
+    engine = create_engine(url)
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE"))
+    yield engine
+    engine.dispose()
+
+def test_filters_and_top_n_use_indexes(seeded_engine):
+    problems = _postgres_problems if seeded_engine.dialect.name == "postgresql" else _sqlite_problems
+    failures = []
+    with Session(seeded_engine) as session:
+        for model, filters in FILTERS.items():
+            table = model.__tablename__
+            for size in range(1, len(filters) + 1):
+                for columns in combinations(filters, size):
+                    found = problems(session, _compile(session, model, columns), table, rf"ix_{table}_\w+", False)
+                    if found:
+                        failures.append(f"{table} [{', '.join(columns)}]: {'; '.join(found)}")
+            if hasattr(model, "rank_score"):
+                for columns in TOP_FILTERS:
+                    found = problems(session, _compile(session, model, columns, top=True), table,
+                                     rf"ix_{table}_\w*rank", True)
+                    if found:
+                        failures.append(f"{table} [top, {', '.join(columns) or 'unfiltered'}]: {'; '.join(found)}")
+
+    assert not failures, "\n".join(failures)
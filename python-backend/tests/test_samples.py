@@ -0,0 +1,21 @@
+import pytest
+
+from samples import display_value
+
+@pytest.mark.parametrize("number, like, expected", [
+    (10, "$50K", "$10"),
+    (47300, "$45.2K", "$47.3K"),
+    (2847, "2,847", "2,847"),
+    (3.5, "3.2%", "3.5%"),
+    (1_260_000, "$127", "$1.3M"),
+    (-1234.5, "$5", "-$1,234.5"),
+])
+def test_display_value_uses_the_readings_own_magnitude(number, like, expected):
+    assert display_value(number, like) == expected
+
+def test_posted_sample_becomes_the_value(client):
+    metric_id = client.post("/api/user/metrics", json={"title": "Revenue", "value": "$50K"}).json()["metric"]["id"]
+
+    response = client.post(f"/api/user/metrics/{metric_id}/samples", json=[{"value": 10}])
+
+    assert response.json()["metric"]["value"] == "$10"
@@ -0,0 +1,156 @@
+import fcntl
+import math
+import mmap
+import os
+import re
+import socket
+import struct
+import tempfile
+import threading
+import zlib
+from contextlib import contextmanager
+from typing import Optional
+
+from pooling import worker_count
+
+# Slots in the shared counters file. Names hash into them; two names sharing a slot only share a count.
+COUNTER_SLOTS = 1024
+
+def available_cpus() -> int:
+    """CPUs this process may run on: its affinity mask, capped by a cgroup v2 CPU quota (containers)"""
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cpus = min(cpus, math.ceil(int(quota) / int(period)))
+    except (OSError, ValueError):
+        pass
+    return max(1, cpus)
+
+def _supervisor_key() -> str:
+    """The process that started this worker, by host, pid and start time: a reused pid or another container's pid 1 differ"""
+    ppid = os.getppid()
+    try:
+        with open(f"/proc/{ppid}/stat") as f:
+            started = f.read().rsplit(")", 1)[1].split()[19]
+    except (OSError, IndexError):
+        started = "0"
+    return f"{socket.gethostname()}-{ppid}-{started}"
+
+_state_dir = None
+
+def state_dir() -> Optional[str]:
+    """Directory the worker processes of one server share, or None when this process serves alone.
+
+    serve.py creates a fresh one per run and hands it down as
+    WORKER_STATE_DIR. Workers started by uvicorn or gunicorn with
+    WEB_CONCURRENCY > 1 and no WORKER_STATE_DIR share one named after their
+    supervisor process.
+    """
+    global _state_dir
+    if _state_dir is None:
+        directory = os.getenv("WORKER_STATE_DIR")
+        if not directory and worker_count() > 1:
+            directory = os.path.join(tempfile.gettempdir(), f"glanceable-workers-{_supervisor_key()}")
+        if directory:
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+        _state_dir = directory or ""
+    return _state_dir or None
+
+@contextmanager
+def file_lock(path: str):
+    """Exclusive lock on ``path`` across processes, held for the with block"""
+    with open(path, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+_worker_slot = None
+
+def worker_index() -> int:
+    """This worker's index among the server's workers, 0 when serving alone.
+
+    Each index is a flock on worker-<n>.lock, held until the process exits,
+    so a restarted worker takes over the index its predecessor left.
+    """
+    global _worker_slot
+    directory = state_dir()
+    if directory is None:
+        return 0
+    index = 0
+    while _worker_slot is None:
+        fd = os.open(os.path.join(directory, f"worker-{index}.lock"), os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            _worker_slot = (index, fd)
+        except BlockingIOError:
+            os.close(fd)
+            index += 1
+    return _worker_slot[0]
+
+def _held(path: str) -> bool:
+    """Whether a live process holds the flock on ``path``"""
+    try:
+        fd = os.open(path, os.O_RDWR)
+    except FileNotFoundError:
+        return False
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return False
+    except BlockingIOError:
+        return True
+    finally:
+        os.close(fd)
+
+def prune_state(directory: str) -> None:
+    """Remove what the workers of an earlier server left in a reused state directory.
+
+    Per-worker files are named after the worker index (metrics-<n>.json,
+    changes-<n>.sock); those of an index no live process holds are removed,
+    so /metrics does not keep adding up the previous run's workers.
+    """
+    for name in os.listdir(directory):
+        match = re.fullmatch(r"(?:metrics|changes)-(\d+)\.(?:json|sock)", name)
+        if match and not _held(os.path.join(directory, f"worker-{match.group(1)}.lock")):
+            os.remove(os.path.join(directory, name))
+
+class SharedCounters:
+    """Named 64-bit counters in a memory-mapped file every worker maps.
+
+    Reads are a single aligned load from the mapping; increments take a
+    byte-range lock on the counter's slot.
+    """
+
+    def __init__(self, path: str):
+        size = COUNTER_SLOTS * 8
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        if os.fstat(self._fd).st_size < size:
+            os.ftruncate(self._fd, size)
+        self._map = mmap.mmap(self._fd, size)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _offset(name: str) -> int:
+        return zlib.crc32(name.encode()) % COUNTER_SLOTS * 8
+
+    def get(self, name: str) -> int:
+        return struct.unpack_from("<q", self._map, self._offset(name))[0]
+
+    def incr(self, name: str) -> int:
+        offset = self._offset(name)
+        with self._lock:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, 8, offset)
+            try:
+                value = struct.unpack_from("<q", self._map, offset)[0] + 1
+                struct.pack_into("<q", self._map, offset, value)
+                return value
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, 8, offset)
+
+def shared_counters() -> Optional[SharedCounters]:
+    """Counters shared with the other workers of this server, None when serving alone"""
+    directory = state_dir()
+    return SharedCounters(os.path.join(directory, "counters")) if directory else None